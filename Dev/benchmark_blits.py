@@ -0,0 +1,106 @@
+########################################################################################################################################################
+# Render queue micro-benchmark
+#
+# Compares two ways of building and draining the display queue on the overworld viewport, filled with tiles and entities:
+#   - list:  a new [surface, position] list per image, drained with one Surface.blit per image
+#   - blits: (surface, position) tuples in a reused list, drained with one Surface.blits call
+#
+# Run from the repository root: python Dev/benchmark_blits.py [frames]
+########################################################################################################################################################
+
+########################################################################################################################################################
+# Imports
+## Standard
+import os
+import sys
+import time
+
+## Local
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+import main
+import session
+from entities import create_entity
+from environments import place_object
+from mechanics import place_player, is_blocked
+from pygame_utilities import render_display
+
+########################################################################################################################################################
+# Setup
+def setup():
+    """ Starts a new game in the overworld and fills every open tile in view with an entity. """
+
+    # Initialize without entering the main loop
+    main.game_states = lambda: None
+    main.init()
+
+    session.new_game_obj.temp_obj = session.new_game_obj.init_player()
+    session.new_game_obj._finalize_player()
+
+    # Enter the overworld
+    pyg = session.pyg
+    env = session.player_obj.envs.areas['overworld']['overworld']
+    place_player(ent=session.player_obj.ent, env=env, loc=env.player_coordinates)
+    pyg.overlay_state = None
+    pyg.fade_state    = 'off'
+
+    # Crowd the viewport
+    camera   = env.camera
+    ent_ids  = ['red_radish', 'tentacles_ent']
+    for x in range(int(camera.X // pyg.tile_width), int(camera.right // pyg.tile_width)):
+        for y in range(int(camera.Y // pyg.tile_height), int(camera.bottom // pyg.tile_height)):
+            tile = env.map[x][y]
+            if not is_blocked(tile) and not tile.item:
+                place_object(create_entity(ent_ids[(x + y) % len(ent_ids)]), [x, y], env)
+
+    # Build one frame of the display queue
+    pyg.display_queue = []
+    render_display()
+    return list(pyg.display_queue)
+
+########################################################################################################################################################
+# Benchmarks
+def run_list(source, surface, frames):
+    """ Rebuilds the queue from new lists every frame and blits each entry separately. """
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        queue = [[image, pos] for (image, pos) in source]
+        surface.fill((0, 0, 0))
+        for (image, pos) in queue:
+            surface.blit(image, pos)
+        queue = []
+    return (time.perf_counter() - start) / frames
+
+def run_blits(source, surface, frames):
+    """ Refills one reused queue of tuples every frame and blits it in a single call. """
+
+    queue = []
+    start = time.perf_counter()
+    for _ in range(frames):
+        queue.clear()
+        queue.extend(source)
+        surface.fill((0, 0, 0))
+        surface.blits(queue, doreturn=False)
+    return (time.perf_counter() - start) / frames
+
+def main_benchmark():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    source = setup()
+
+    surface = session.pyg.display
+    t_list  = run_list(source, surface, frames)
+    t_blits = run_blits(source, surface, frames)
+
+    print(f"queue entries per frame: {len(source)}")
+    print(f"list  path: {t_list * 1000:.3f} ms/frame")
+    print(f"blits path: {t_blits * 1000:.3f} ms/frame")
+    print(f"speedup:    {t_list / t_blits:.2f}x")
+
+if __name__ == '__main__':
+    main_benchmark()
+
+########################################################################################################################################################
@@ -0,0 +1,94 @@
+########################################################################################################################################################
+# Level memory benchmark
+#
+# Starts a new game, descends through the dungeon, and climbs back to the first level, once with every level kept in memory and once with
+# the default budget of envs.level_budget. Reports:
+#   - tiles:   number of map tiles in memory after the descent
+#   - heap:    memory allocated by Python during the descent, measured with tracemalloc
+#   - descend: time to build and enter every level
+#   - ascend:  time to enter every level again, which restores the ones that were released
+#
+# Run from the repository root: python Dev/benchmark_levels.py [levels]
+########################################################################################################################################################
+
+########################################################################################################################################################
+# Imports
+## Standard
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+## Local
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import main
+import session
+
+########################################################################################################################################################
+# Benchmark
+def resident_tiles(envs):
+    """ Returns the number of map tiles across all levels in memory. """
+
+    tiles = 0
+    for area in envs.areas.values():
+        for env in area.levels.values():
+            if not env.saved: tiles += len(env.map.flags)
+    return tiles
+
+def use_stairs(effect):
+    """ Takes the stairs of the player's current level. """
+
+    stairs = SimpleNamespace(item=SimpleNamespace(env=session.player_obj.ent.env))
+    effect(stairs)
+
+def run(levels, budget=None):
+    """ Returns tiles, heap, and times of a descent and ascent with the given budget, or the default budget if None. """
+
+    session.new_game_obj.temp_obj = session.new_game_obj.init_player()
+    session.new_game_obj._finalize_player()
+    envs = session.player_obj.envs
+    if budget is not None: envs.level_budget = budget
+    gc.collect()
+
+    # Descend
+    tracemalloc.start()
+    base  = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    session.effects.enter_dungeon()
+    for _ in range(levels - 1):
+        use_stairs(session.effects.descend_dungeon)
+    descend = time.perf_counter() - start
+    envs.areas['dungeon'].discard_level()
+    gc.collect()
+    heap = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    tiles = resident_tiles(envs)
+
+    # Ascend
+    start = time.perf_counter()
+    for _ in range(levels - 1):
+        use_stairs(session.effects.ascend_dungeon)
+    ascend = time.perf_counter() - start
+
+    return tiles, heap, descend, ascend
+
+def main_benchmark():
+    levels = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+
+    # Initialize without entering the main loop
+    main.game_states = lambda: None
+    main.init()
+
+    for (name, budget) in [('unlimited', float('inf')), ('budget', None)]:
+        tiles, heap, descend, ascend = run(levels, budget)
+        print(f"{name:<10} {levels} levels: tiles {tiles:>7}, heap {heap / 1e6:6.1f} MB, descend {descend:5.2f} s, ascend {ascend:5.2f} s (with tracemalloc)")
+
+if __name__ == '__main__':
+    main_benchmark()
+
+########################################################################################################################################################
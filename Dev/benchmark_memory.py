@@ -0,0 +1,78 @@
+########################################################################################################################################################
+# World memory benchmark
+#
+# Starts a full new game (garden, home, overworld, and the first dungeon level) and reports:
+#   - tiles:  number of map tiles in memory, out of all tiles of the levels built so far; levels are built when first used
+#   - heap:   memory allocated by Python while building the world, measured with tracemalloc
+#   - save:   size of the pickled player, as written by the save menu
+#
+# Run from the repository root: python Dev/benchmark_memory.py
+########################################################################################################################################################
+
+########################################################################################################################################################
+# Imports
+## Standard
+import gc
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+## Local
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import main
+import session
+
+########################################################################################################################################################
+# Benchmark
+def main_benchmark():
+
+    # Initialize without entering the main loop
+    main.game_states = lambda: None
+    main.init()
+    gc.collect()
+
+    # Build a new world
+    tracemalloc.start()
+    start = time.perf_counter()
+    base  = tracemalloc.get_traced_memory()[0]
+
+    session.new_game_obj.temp_obj = session.new_game_obj.init_player()
+    session.new_game_obj._finalize_player()
+    session.effects.enter_dungeon()
+
+    duration = time.perf_counter() - start
+    gc.collect()
+    heap = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    # Count tiles in memory and measure the save file
+    resident = 0
+    total    = 0
+    unbuilt  = 0
+    for area in session.player_obj.envs.areas.values():
+        for env in area.levels.values():
+
+            ## Levels that were never built have no map
+            if 'map' not in env.__dict__:
+                unbuilt += 1
+                continue
+
+            tiles  = len(env.map) * len(env.map[0])
+            total += tiles
+            if not env.saved: resident += tiles
+    save = len(pickle.dumps(session.player_obj))
+
+    print(f"tiles: {resident} in memory of {total} built, {unbuilt} levels not built")
+    print(f"heap:  {heap / 1e6:.1f} MB")
+    print(f"save:  {save / 1e6:.1f} MB")
+    print(f"build: {duration:.2f} s (with tracemalloc)")
+
+if __name__ == '__main__':
+    main_benchmark()
+
+########################################################################################################################################################
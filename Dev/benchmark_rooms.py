@@ -0,0 +1,192 @@
+########################################################################################################################################################
+# Room merging benchmark
+#
+# Compares two versions of combine_rooms on a hallucination-sized map with a growing number of random rooms:
+#   - pairs:   every pair of rooms checked, with walls, corners, and tiles held in lists, as before
+#   - buckets: rooms sorted into buckets of the map, only rooms in a shared bucket compared, with walls and corners held in ordered sets
+# Both versions are run on rooms from the same seed, and the resulting tiles, walls, and corners are checked to be identical.
+# Floors may differ only where the previous version left every other tile of a merged room behind.
+#
+# Run from the repository root: python Dev/benchmark_rooms.py [seed]
+########################################################################################################################################################
+
+########################################################################################################################################################
+# Imports
+## Standard
+import os
+import sys
+import time
+import random
+
+## Local
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import main
+from environments import Environment, Room
+
+########################################################################################################################################################
+# Setup
+room_counts = [10, 50, 100, 200]
+
+def create_env(num_rooms, seed):
+    """ Returns a hallucination-sized environment with overlapping rooms. """
+
+    env = Environment(
+        envs          = None,
+        name          = 'benchmark',
+        size          = 3,
+        soundtrack    = [],
+        lvl_num       = 1,
+        wall_img_IDs  = ['walls', 'gold'],
+        floor_img_IDs = ['floors', 'dirt1'],
+        roof_img_IDs  = None,
+        img_IDs       = ['walls', 'gold'],
+        seed          = seed)
+
+    for _ in range(num_rooms):
+        width  = env.rng.randint(8, 20)
+        height = env.rng.randint(8, 20)
+        Room(
+            name          = 'benchmark room',
+            env           = env,
+            x1            = env.rng.randint(0, len(env.map)    - width  - 1),
+            y1            = env.rng.randint(0, len(env.map[0]) - height - 1),
+            width         = width,
+            height        = height,
+            objects       = True,
+            floor_img_IDs = env.floor_img_IDs,
+            wall_img_IDs  = env.wall_img_IDs)
+    return env
+
+########################################################################################################################################################
+# Reference
+def intersect_lists(self, other):
+    """ Previous version of Room.intersect. """
+
+    intersecting_wall = []
+    if (self.x1 <= other.x2 and self.x2 >= other.x1 and
+            self.y1 <= other.y2 and self.y2 >= other.y1):
+        for wall_1 in self.walls_list:
+            if (wall_1.X >= other.x1*32) and (wall_1.X <= other.x2*32):
+                if (wall_1.Y >= other.y1*32) and (wall_1.Y <= other.y2*32):
+                    if wall_1 not in other.walls_list:
+                        intersecting_wall.append(wall_1)
+    return intersecting_wall
+
+def combine_rooms_pairs(self):
+    """ Previous version of combine_rooms. """
+
+    # Sort through each room
+    cache = []
+    rooms_copy = list(self.rooms)
+    for i in range(len(rooms_copy)):
+        for j in range(len(rooms_copy)):
+            if rooms_copy[i] != rooms_copy[j]:
+
+                # Prevent double counting
+                if {rooms_copy[i], rooms_copy[j]} not in cache:
+                    cache.append({rooms_copy[i], rooms_copy[j]})
+
+                    # Find region of overlap
+                    intersections_1 = intersect_lists(self.rooms[i], self.rooms[j])
+                    intersections_2 = intersect_lists(self.rooms[j], self.rooms[i])
+
+                    # True if intersections are found
+                    if intersections_1 and intersections_2:
+                        self.rooms[i].delete = True
+
+                        ## Convert internal wall into floor and remove from lists
+                        for tile in intersections_1:
+
+                            # Keep shared wall_img_IDs
+                            if tile not in rooms_copy[j].walls_list:
+                                tile.blocked   = False
+                                tile.item      = None
+                                tile.img_IDs = tile.room.floor_img_IDs
+
+                                if tile in rooms_copy[i].walls_list:      self.rooms[j].walls_list.append(tile)
+                                if tile in rooms_copy[i].corners_list:    self.rooms[j].corners_list.append(tile)
+                                if tile in rooms_copy[i].noncorners_list: self.rooms[j].noncorners_list.append(tile)
+
+                            if tile.roof_img_IDs and tile.room.roof_img_IDs:
+                                tile.roof_img_IDs = tile.room.roof_img_IDs
+                                tile.img_IDs = tile.room.roof_img_IDs
+                            self.chunks.mark(tile)
+
+                        for tile in intersections_2:
+
+                            # Keep shared wall_img_IDs
+                            if tile not in rooms_copy[i].walls_list:
+                                tile.blocked   = False
+                                tile.item      = None
+                                tile.img_IDs = tile.room.floor_img_IDs
+
+                                # Remove from lists
+                                if tile in self.rooms[j].walls_list:      self.rooms[j].walls_list.remove(tile)
+                                if tile in self.rooms[j].corners_list:    self.rooms[j].corners_list.remove(tile)
+                                if tile in self.rooms[j].noncorners_list: self.rooms[j].noncorners_list.remove(tile)
+
+                            if tile.roof_img_IDs and tile.room.roof_img_IDs:
+                                tile.roof_img_IDs = tile.room.roof_img_IDs
+                                tile.img_IDs = tile.room.roof_img_IDs
+                            self.chunks.mark(tile)
+
+                        for tile in self.rooms[i].tiles_list:
+                            tile.room = self.rooms[j]
+                            self.rooms[j].tiles_list.append(tile)
+                            self.rooms[i].tiles_list.remove(tile)
+                            self.chunks.mark(tile)
+
+    for room in self.rooms[:]:
+        if room.delete:
+            self.rooms.remove(room)
+
+########################################################################################################################################################
+# Benchmark
+def snapshot(env):
+    """ Returns the images and flags of the map, and the walls and corners of each remaining room. """
+
+    grid  = env.map
+    tiles = (bytes(grid.flags), [grid.values[i] for i in grid.arrays['img_IDs']])
+    rooms = [(room.endpoints, [(tile.X, tile.Y) for tile in room.walls_list], [(tile.X, tile.Y) for tile in room.corners_list],
+              [(tile.X, tile.Y) for tile in room.noncorners_list]) for room in env.rooms]
+    return tiles, rooms
+
+def floors(env):
+    """ Returns the room of each tile as a position in env.rooms, or None for tiles of removed rooms. """
+
+    positions = {id(room): i for (i, room) in enumerate(env.rooms)}
+    return [positions.get(id(tile.room)) for column in env.map for tile in column if tile.room]
+
+def main_benchmark():
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+
+    # Initialize without entering the main loop
+    main.game_states = lambda: None
+    main.init()
+
+    for num_rooms in room_counts:
+        env     = create_env(num_rooms, seed)
+        start   = time.perf_counter()
+        combine_rooms_pairs(env)
+        t_pairs = time.perf_counter() - start
+        old     = snapshot(env)
+        old_floors = floors(env)
+
+        env       = create_env(num_rooms, seed)
+        start     = time.perf_counter()
+        env.combine_rooms()
+        t_buckets = time.perf_counter() - start
+        if snapshot(env) != old:
+            raise ValueError(f"{num_rooms} rooms: walls differ for seed {seed}")
+        moved = sum(a != b for (a, b) in zip(old_floors, floors(env)))
+
+        print(f"{num_rooms:>4} rooms, {len(env.rooms):>3} left: pairs {t_pairs * 1000:8.1f} ms, buckets {t_buckets * 1000:6.1f} ms, "
+              f"{t_pairs / t_buckets:6.1f}x, {moved} tiles moved to their merged room")
+
+if __name__ == '__main__':
+    main_benchmark()
+
+########################################################################################################################################################
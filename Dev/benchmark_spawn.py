@@ -0,0 +1,144 @@
+########################################################################################################################################################
+# Spawn pass benchmark
+#
+# Compares two versions of place_objects on open maps with the spawn lists of the overworld and of a deep hallucination:
+#   - loop:   every open tile draws with random.choice and random.randint and creates its objects right away, as before
+#   - table:  chances precompiled per biome, all draws made in one pass, then only the successful ones created
+# Both versions are run over the same seeds; the average number of each item and entity shows that the distribution is kept.
+#
+# Run from the repository root: python Dev/benchmark_spawn.py [seeds]
+########################################################################################################################################################
+
+########################################################################################################################################################
+# Imports
+## Standard
+import os
+import sys
+import time
+import random
+from collections import Counter
+
+## Local
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import main
+import session
+from entities import create_entity
+from items import create_item
+from environments import Environment, voronoi_biomes, place_objects, place_object
+
+########################################################################################################################################################
+# Setup
+## Map size, biomes, items, and entities of each level
+levels = {
+    'overworld': (10,
+        [['forest', ['floors', 'grass3']]] * 4 + [['desert', ['floors', 'sand1']]] * 4 + [['water', ['floors', 'water']]] * 2,
+        [['forest', 'tree',       100],
+         ['forest', 'leafy',      10],
+         ['forest', 'blades',     1],
+         ['desert', 'plant_drug', 1000],
+         ['desert', 'enter_cave', 100]],
+        [['forest', 'red_radish', 50,   [None]],
+         ['wet',    'frog_ent',   500,  [None]],
+         ['forest', 'grass_ent',  1000, [None]],
+         ['desert', 'rock_ent',   50,   [None]]]),
+    'hallucination 10': (3,
+        [['any', ['floors', 'dirt1']]] * 4,
+        [['any', 'jug_of_grapes',  100],
+         ['any', 'shrooms',        10],
+         ['any', 'purple_bulbs',   10],
+         ['any', 'cup_shroom',     25],
+         ['any', 'sword',          1000//10],
+         ['any', 'yellow_dress',   200]],
+        [['any', 'tentacles_ent',  100,  [None]],
+         ['any', 'red_radish',     1000, [None]]])}
+
+def create_env(size, biomes, seed):
+    """ Returns an open environment of the given size with its biomes. """
+
+    env = Environment(
+        envs          = None,
+        name          = 'benchmark',
+        size          = size,
+        soundtrack    = [],
+        lvl_num       = 10,
+        wall_img_IDs  = ['walls', 'gray'],
+        floor_img_IDs = ['floors', 'dirt1'],
+        roof_img_IDs  = None,
+        blocked       = False,
+        hidden        = False,
+        img_IDs       = ['floors', 'dirt1'])
+    voronoi_biomes(env, biomes, rng=seed)
+    return env
+
+########################################################################################################################################################
+# Reference
+def place_objects_loop(env, items, entities):
+    """ Previous version of place_objects. """
+
+    from mechanics import is_blocked
+
+    for y in range(len(env.map[0])):
+        for x in range(len(env.map)):
+            if not is_blocked(env.map[x][y]):
+                item_selection = random.choice(items)
+                if env.map[x][y].biome in session.img.biomes[item_selection[0]]:
+                    if not random.randint(0, item_selection[2]) and not env.map[x][y].item:
+                        item = create_item(item_selection[1])
+                        place_object(item, [x, y], env)
+
+                ent_selection = random.choice(entities)
+                if env.map[x][y].biome in session.img.biomes[ent_selection[0]]:
+                    if not random.randint(0, ent_selection[2]) and not env.map[x][y].item:
+                        entity = create_entity(ent_selection[1])
+                        entity.biome = env.map[x][y].biome
+                        env.ents.append(entity)
+                        place_object(entity, [x, y], env)
+
+########################################################################################################################################################
+# Benchmark
+def count(env):
+    """ Returns the number of each item and entity on the map. """
+
+    counts = Counter()
+    for tile in env.map.occupied(range(len(env.map)), range(len(env.map[0]))):
+        if tile.item: counts[tile.item.name] += 1
+        if tile.ent:  counts[tile.ent.name]  += 1
+    return counts
+
+def run(function, size, biomes, items, entities, seeds):
+    """ Returns the total time and counts of a spawn pass over each seed. """
+
+    duration = 0
+    counts   = Counter()
+    for seed in range(seeds):
+        env = create_env(size, biomes, seed)
+        random.seed(seed)
+        start     = time.perf_counter()
+        function(env, items, entities)
+        duration += time.perf_counter() - start
+        counts   += count(env)
+    return duration, counts
+
+def main_benchmark():
+    seeds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    # Initialize without entering the main loop
+    main.game_states = lambda: None
+    main.init()
+
+    for (name, (size, biomes, items, entities)) in levels.items():
+        t_loop,  c_loop  = run(place_objects_loop, size, biomes, items, entities, seeds)
+        t_table, c_table = run(place_objects,      size, biomes, items, entities, seeds)
+
+        tiles = len(create_env(size, biomes, 0).map) * len(create_env(size, biomes, 0).map[0])
+        print(f"{name}: {tiles} tiles, loop {t_loop / seeds * 1000:.1f} ms, table {t_table / seeds * 1000:.1f} ms, {t_loop / t_table:.1f}x")
+        for key in sorted(set(c_loop) | set(c_table)):
+            print(f"    {key:<16} loop {c_loop[key] / seeds:8.1f}   table {c_table[key] / seeds:8.1f}")
+
+if __name__ == '__main__':
+    main_benchmark()
+
+########################################################################################################################################################
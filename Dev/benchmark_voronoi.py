@@ -0,0 +1,115 @@
+########################################################################################################################################################
+# Biome partition benchmark
+#
+# Compares two versions of voronoi_biomes on an empty map of each size used by the build_* methods:
+#   - loop:   every tile against every region center, one tile at a time, as before
+#   - column: vertical distances found once per region, regions compared a whole column at a time, biomes set in bulk
+# Both versions are run from the same seed, and the resulting biomes and images are checked to be identical.
+#
+# Run from the repository root: python Dev/benchmark_voronoi.py [repeats]
+########################################################################################################################################################
+
+########################################################################################################################################################
+# Imports
+## Standard
+import os
+import sys
+import time
+import random
+
+## Local
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import main
+import session
+from environments import Environment, voronoi_biomes
+
+########################################################################################################################################################
+# Setup
+## Map sizes and biomes of each build method
+builds = {
+    'garden':        (1,  [['forest', ['floors', 'grass4']]]),
+    'cave':          (1,  [['dungeon', ['walls', 'dark_red']]]),
+    'dungeon 1':     (2,  [['dungeon', ['walls', 'gray']]]),
+    'hallucination': (3,  [['any', ['walls', 'gold']]] * 4),
+    'overworld':     (10, [['forest', ['floors', 'grass3']]] * 4 + [['desert', ['floors', 'sand1']]] * 4 + [['water', ['floors', 'water']]] * 2)}
+
+def create_env(size):
+    """ Returns an empty environment of the given size. """
+
+    return Environment(
+        envs          = None,
+        name          = 'benchmark',
+        size          = size,
+        soundtrack    = [],
+        lvl_num       = 0,
+        wall_img_IDs  = ['walls', 'gray'],
+        floor_img_IDs = ['floors', 'dirt1'],
+        roof_img_IDs  = None,
+        img_IDs       = ['walls', 'gray'])
+
+########################################################################################################################################################
+# Reference
+def voronoi_loop(env, biomes, rng):
+    """ Previous version of voronoi_biomes. """
+
+    pyg = session.pyg
+
+    num_regions    = len(biomes)
+    region_centers = [[rng.randint(0, len(env.map[0])), rng.randint(0, len(env.map))] for _ in range(num_regions)]
+    region_weights = [rng.uniform(1, 3) for _ in range(num_regions)]
+    seeds_with_ids = [[i, center, weight] for i, (center, weight) in enumerate(zip(region_centers, region_weights))]
+
+    for y in range(len(env.map[0])):
+        for x in range(len(env.map)):
+            tile         = env.map[x][y]
+            min_distance = float('inf')
+            biome        = None
+            for i in range(len(seeds_with_ids)):
+                region_center = [seeds_with_ids[i][1][0] * pyg.tile_width, seeds_with_ids[i][1][1] * pyg.tile_height]
+                weight        = seeds_with_ids[i][2]
+                distance      = (abs(region_center[0] - tile.X) + abs(region_center[1] - tile.Y)) / weight
+                if distance < min_distance:
+                    min_distance = distance
+                    biome        = biomes[i][0]
+                    img_IDs      = biomes[i][1]
+            tile.biome   = biome
+            tile.img_IDs = img_IDs
+
+########################################################################################################################################################
+# Benchmark
+def snapshot(env):
+    return [(tile.biome, tuple(tile.img_IDs)) for column in env.map for tile in column]
+
+def main_benchmark():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    # Initialize without entering the main loop
+    main.game_states = lambda: None
+    main.init()
+
+    for (name, (size, biomes)) in builds.items():
+        env     = create_env(size)
+        t_loop  = float('inf')
+        t_new   = float('inf')
+        for seed in range(repeats):
+            start  = time.perf_counter()
+            voronoi_loop(env, biomes, random.Random(seed))
+            t_loop = min(t_loop, time.perf_counter() - start)
+            old    = snapshot(env)
+
+            start  = time.perf_counter()
+            voronoi_biomes(env, biomes, rng=seed)
+            t_new  = min(t_new, time.perf_counter() - start)
+            if snapshot(env) != old:
+                raise ValueError(f"{name}: biomes differ for seed {seed}")
+
+        tiles = len(env.map) * len(env.map[0])
+        print(f"{name:<14} {tiles:>6} tiles, {len(biomes):>2} regions: loop {t_loop * 1000:7.1f} ms, column {t_new * 1000:6.1f} ms, {t_loop / t_new:5.1f}x")
+
+if __name__ == '__main__':
+    main_benchmark()
+
+########################################################################################################################################################
@@ -0,0 +1,182 @@
+########################################################################################################################################################
+# Placed wall benchmark
+#
+# Compares two versions of build_room while walls are placed one at a time, as with the catalog menu:
+#   - walk: every placement walks through all connected walls and searches them for a cycle, as before
+#   - sets: placed walls kept in sets of touching walls, so each placement only looks at the eight tiles around it
+# Shapes are a square outline and a square compound split into cells by inner walls, each drawn one wall at a time.
+# Reports the time spent in build_room, the number of rooms created, and the number of enclosed floor tiles.
+#
+# Run from the repository root: python Dev/benchmark_walls.py [size]
+########################################################################################################################################################
+
+########################################################################################################################################################
+# Imports
+## Standard
+import os
+import sys
+import time
+
+## Local
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import main
+import session
+from environments import Environment, Room, create_tile
+
+########################################################################################################################################################
+# Setup
+def outline(size):
+    """ Returns the positions of a square outline, in drawing order. """
+
+    top    = [(x, 0)        for x in range(size)]
+    right  = [(size-1, y)   for y in range(1, size)]
+    bottom = [(x, size-1)   for x in range(size-2, -1, -1)]
+    left   = [(0, y)        for y in range(size-2, 0, -1)]
+    return top + right + bottom + left
+
+def compound(size, cells):
+    """ Returns the positions of a square outline with inner walls every few tiles, in drawing order. """
+
+    inner = [i * (size - 1) // cells for i in range(1, cells)]
+    walls = outline(size)
+    for x in inner:
+        walls += [(x, y) for y in range(1, size-1)]
+    for y in inner:
+        walls += [(x, y) for x in range(1, size-1) if x not in inner]
+    return walls
+
+def create_env():
+    """ Returns an open environment and puts the player in it. """
+
+    env = Environment(
+        envs          = session.player_obj.envs,
+        name          = 'benchmark',
+        size          = 4,
+        soundtrack    = [],
+        lvl_num       = 0,
+        wall_img_IDs  = ['walls', 'gray'],
+        floor_img_IDs = ['floors', 'dirt1'],
+        roof_img_IDs  = None,
+        blocked       = False,
+        hidden        = False,
+        img_IDs       = ['floors', 'dirt1'])
+    session.player_obj.ent.env = env
+    return env
+
+########################################################################################################################################################
+# Reference
+def build_room_walk(self, obj):
+    """ Previous version of build_room. The search failed on a tile without a parent or on a finished tile, so both are checked here. """
+
+    from mechanics import get_vicinity
+
+    first_neighbors = [obj]
+    for first_neighbor in get_vicinity(obj).values():
+        if first_neighbor.placed:
+            first_neighbors.append(first_neighbor)
+
+    connected = dict()
+    queue     = list(first_neighbors)
+    visited   = set()
+    while queue:
+        tile = queue.pop(0)
+        if tile in visited: continue
+        visited.add(tile)
+        connected[tile] = []
+        for neighbor in get_vicinity(tile).values():
+            if neighbor.placed:
+                connected[tile].append(neighbor)
+                if (neighbor not in visited) and (neighbor not in queue):
+                    queue.append(neighbor)
+
+    def has_closed_boundary(graph):
+        visited = set()
+
+        def dfs(node, parent, path):
+            visited.add(node)
+            path.append(node)
+            for neighbor in graph[node]:
+                if neighbor not in visited:
+                    if dfs(neighbor, node, path):
+                        return True
+                elif ((parent is None) or (neighbor != parent)) and (neighbor in path):
+                    cycle_start_index = path.index(neighbor)
+                    cycle_length = len(path) - cycle_start_index
+                    if cycle_length >= 4:
+                        return True
+            path.pop()
+            return False
+
+        for node in graph:
+            if node not in visited:
+                if dfs(node, None, []):
+                    return True
+        return False
+
+    if has_closed_boundary(connected):
+        xs = [tile.X//32 for tile in connected.keys()]
+        ys = [tile.Y//32 for tile in connected.keys()]
+        Room(
+            name     = 'placed',
+            env      = self,
+            x1       = min(xs),
+            y1       = min(ys),
+            width    = int(max(xs) - min(xs)),
+            height   = int(max(ys) - min(ys)),
+            biome    = 'city',
+            objects  = True,
+            floor_img_IDs = ['floors', 'wood'],
+            wall_img_IDs  = obj.img_IDs,
+            roof_img_IDs  = self.roof_img_IDs,
+            boundary = {
+                'boundary tiles':       list(connected.keys()),
+                'boundary coordinates': set((tile.X//32, tile.Y//32) for tile in connected.keys()),
+                'min x': min(xs), 'max x': max(xs), 'min y': min(ys), 'max y': max(ys)})
+
+########################################################################################################################################################
+# Benchmark
+def run(build_room, walls):
+    """ Places each wall and returns the time spent in build_room, the number of rooms, and the enclosed floor tiles. """
+
+    env      = create_env()
+    duration = 0
+    for (x, y) in walls:
+        tile   = create_tile('gray')
+        tile.X = (x + 1) * 32
+        tile.Y = (y + 1) * 32
+        env.map[x + 1][y + 1] = tile
+        tile.placed = True
+
+        start     = time.perf_counter()
+        build_room(env, tile)
+        duration += time.perf_counter() - start
+
+    floors = {(tile.X, tile.Y) for room in env.rooms for tile in room.tiles_list if not tile.placed}
+    return duration, len(env.rooms), len(floors)
+
+def main_benchmark():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+
+    # Initialize without entering the main loop
+    main.game_states = lambda: None
+    main.init()
+    session.new_game_obj.temp_obj = session.new_game_obj.init_player()
+    session.new_game_obj._finalize_player()
+
+    for (name, walls) in [('outline', outline(size)), ('compound', compound(size, 4))]:
+        results = []
+        for build_room in [build_room_walk, Environment.build_room]:
+            try:
+                duration, rooms, floors = run(build_room, walls)
+                results.append(f"{duration * 1000:8.1f} ms, {rooms:>3} rooms, {floors:>4} floors")
+            except RecursionError:
+                results.append(f"{'recursion limit':>32}")
+        print(f"{name:<8} {len(walls):>4} walls: walk {results[0]}   sets {results[1]}")
+
+if __name__ == '__main__':
+    main_benchmark()
+
+########################################################################################################################################################
@@ -0,0 +1,119 @@
+########################################################################################################################################################
+# Zoom benchmark
+#
+# Compares two ways of drawing the overworld viewport at each zoom level, once the visible chunks are composed:
+#   - scale: images drawn at 32 pixels per tile onto a surface the size of the camera, which is then scaled to the screen, as before
+#   - atlas: images replaced with copies pre-scaled to the zoom level and drawn onto the screen-sized display, with nothing scaled afterwards
+# Reports the time per frame of each, and the number of images in the atlas of each zoom level.
+#
+# Run from the repository root: python Dev/benchmark_zoom.py [frames]
+########################################################################################################################################################
+
+########################################################################################################################################################
+# Imports
+## Standard
+import os
+import sys
+import time
+
+## Local
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+import main
+import session
+from mechanics import place_player
+from pygame_utilities import render_display
+
+########################################################################################################################################################
+# Setup
+zoom_levels = [0.4, 0.5, 0.7, 1.0, 1.3, 1.5, 2.0]
+
+def setup():
+    """ Starts a new game in the overworld and returns its camera. """
+
+    # Initialize without entering the main loop
+    main.game_states = lambda: None
+    main.init()
+
+    session.new_game_obj.temp_obj = session.new_game_obj.init_player()
+    session.new_game_obj._finalize_player()
+
+    # Enter the overworld
+    pyg = session.pyg
+    env = session.player_obj.envs.areas['overworld']['overworld']
+    place_player(ent=session.player_obj.ent, env=env, loc=env.player_coordinates)
+    pyg.overlay_state = None
+    pyg.fade_state    = 'off'
+    return env.camera
+
+def build_queue(camera, zoom):
+    """ Returns one frame of the display queue with the camera's view at the given zoom level. """
+
+    pyg = session.pyg
+
+    camera.zoom = zoom
+    pyg.display_queue = []
+    render_display()
+    session.img.render()
+    return list(pyg.display_queue)
+
+########################################################################################################################################################
+# Benchmarks
+def run_scale(source, size, frames):
+    """ Draws the queue at 32 pixels per tile and scales the result to the screen every frame. """
+
+    pyg     = session.pyg
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    screen  = pygame.Surface((pyg.screen_width, pyg.screen_height), pygame.SRCALPHA)
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        surface.fill((0, 0, 0))
+        surface.blits(source, doreturn=False)
+        pygame.transform.scale(surface, (pyg.screen_width, pyg.screen_height), screen)
+    return (time.perf_counter() - start) / frames
+
+def run_atlas(source, frames):
+    """ Moves the queue to the zoom level through the atlas and draws it onto the display every frame. """
+
+    pyg   = session.pyg
+    queue = []
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        queue.clear()
+        queue.extend(source)
+        pyg.zoom_queue(queue)
+        pyg.display.fill((0, 0, 0))
+        pyg.display.blits(queue, doreturn=False)
+    return (time.perf_counter() - start) / frames
+
+def main_benchmark():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    camera = setup()
+    pyg    = session.pyg
+
+    for zoom in zoom_levels:
+        camera.zoom_in(custom=zoom)
+        size = (camera.width, camera.height)
+
+        # Queue with images at 32 pixels per tile, as drawn before
+        world = build_queue(camera, 1)
+
+        # Queue with chunks composed at the zoom level
+        source = build_queue(camera, zoom)
+        pyg.set_zoom(zoom)
+        run_atlas(source, 1)
+
+        t_scale = run_scale(world, size, frames)
+        t_atlas = run_atlas(source, frames)
+        images  = len(session.img.atlas(zoom))
+        print(f"zoom {zoom:3.1f}: scale {t_scale * 1000:6.2f} ms, atlas {t_atlas * 1000:6.2f} ms, {t_scale / t_atlas:5.2f}x, {images:>3} images in atlas")
+
+if __name__ == '__main__':
+    main_benchmark()
+
+########################################################################################################################################################
@@ -188,16 +188,16 @@ class MainMenu:
         #########################################################
         # Render surfaces
         ## Background
-        pyg.overlay_queue.append([self.background_fade, (0, 0)])
+        pyg.overlay_queue.append((self.background_fade, (0, 0)))
 
         ## Header
         if pyg.startup_toggle:
-            pyg.overlay_queue.append([self.header_surface, self.header_pos])
+            pyg.overlay_queue.append((self.header_surface, self.header_pos))
         
         ## Logo
         else:
             for i in range(len(self.logo_surfaces)):
-                pyg.overlay_queue.append([self.logo_surfaces[i], self.logo_pos[i]])
+                pyg.overlay_queue.append((self.logo_surfaces[i], self.logo_pos[i]))
         
         ## Choices
         for i in range(len(self.choices)):
@@ -209,12 +209,12 @@ class MainMenu:
 
             offset   = spacing * i
             position = (self.choice_pos[0], self.choice_pos[1] + offset)
-            pyg.overlay_queue.append([surface, position])
+            pyg.overlay_queue.append((surface, position))
         
         ## Cursor
         offset     = spacing * self.choice
         cursor_pos = (self.cursor_pos[0], self.cursor_pos[1] + offset)
-        pyg.overlay_queue.append([self.cursor_surface, cursor_pos])
+        pyg.overlay_queue.append((self.cursor_surface, cursor_pos))
 
     # Keys
     def key_UP(self):
@@ -406,6 +406,7 @@ class NewGameMenu:
             self.last_rotate_time = float(time.time())
             self.temp_obj.ent.img_IDs[1] = self.orientations[
                 self.orientations.index(self.temp_obj.ent.img_IDs[1]) - 1]
+            self.temp_obj.ent.refresh_sprite()
         
         #########################################################
         # Render menu
@@ -414,12 +415,12 @@ class NewGameMenu:
             surface  = self.choice_surfaces[i]
             offset   = spacing * i
             position = (self.choice_pos[0], self.choice_pos[1] + offset)
-            pyg.overlay_queue.append([surface, position])
+            pyg.overlay_queue.append((surface, position))
         
         ## Cursor
         offset     = spacing * self.choice
         cursor_pos = (self.cursor_pos[0], self.cursor_pos[1] + offset)
-        pyg.overlay_queue.append([self.cursor_surface, cursor_pos])
+        pyg.overlay_queue.append((self.cursor_surface, cursor_pos))
 
     # Keys
     def key_UP(self):
@@ -514,12 +515,14 @@ class NewGameMenu:
         elif self.choice == 3:
             if self.temp_obj.ent.img_IDs[0] == 'white_skin':   self.temp_obj.ent.img_IDs[0] = 'black_skin'
             elif self.temp_obj.ent.img_IDs[0] == 'black_skin': self.temp_obj.ent.img_IDs[0] = 'white_skin'
+            self.temp_obj.ent.refresh_sprite()
         
         #########################################################
         # Apply handedness option
         elif self.choice == 4:
             if self.temp_obj.ent.handedness == 'left':      self.temp_obj.ent.handedness = 'right'
             elif self.temp_obj.ent.handedness == 'right':   self.temp_obj.ent.handedness = 'left'
+            self.temp_obj.ent.refresh_sprite()
 
     def fade_to_game(self):
         pyg = session.pyg
@@ -647,22 +650,22 @@ class FileMenu:
         pyg = session.pyg
 
         ## Background
-        pyg.overlay_queue.append([self.backgrounds_render[self.choice], (0, 0)])
-        pyg.overlay_queue.append([self.background_fade,                 (0, 0)])
+        pyg.overlay_queue.append((self.backgrounds_render[self.choice], (0, 0)))
+        pyg.overlay_queue.append((self.background_fade,                 (0, 0)))
         
         ## Header
-        pyg.overlay_queue.append([self.header_surfaces[self.game_state], self.header_pos])
+        pyg.overlay_queue.append((self.header_surfaces[self.game_state], self.header_pos))
         
         ## Choices
         for i in range(len(self.choices)):
             offset   = spacing * i
             position = (self.choice_pos[0], self.choice_pos[1] + offset)
-            pyg.overlay_queue.append([self.choice_surfaces[i], position])
+            pyg.overlay_queue.append((self.choice_surfaces[i], position))
 
         ## Cursor
         offset     = spacing * self.choice
         cursor_pos = (self.cursor_pos[0], self.cursor_pos[1] + offset)
-        pyg.overlay_queue.append([self.cursor_surface, cursor_pos])
+        pyg.overlay_queue.append((self.cursor_surface, cursor_pos))
 
     # Keys
     def key_UP(self):
@@ -824,15 +827,15 @@ class CtrlMenu:
         # Render background
         black = pygame.Surface(pyg.overlays.get_size())
         black.fill(pyg.black)
-        pyg.overlay_queue.append([black, (0, 0)])
+        pyg.overlay_queue.append((black, (0, 0)))
         
         # Render header
-        pyg.overlay_queue.append([self.header_render, (25, 10)])
+        pyg.overlay_queue.append((self.header_render, (25, 10)))
         
         # Render categories and options
         for i in range(len(self.layout_render)):
             offset = spacing * i
-            pyg.overlay_queue.append([self.layout_render[i], (50, 38+offset)])
+            pyg.overlay_queue.append((self.layout_render[i], (50, 38+offset)))
 
     # Keys
     def key_BACK(self):
@@ -964,8 +967,8 @@ class StatsMenu:
         pyg.update_gui()
         
         # Background
-        pyg.overlay_queue.append([self.background_fill, (32, 32)])
-        pyg.overlay_queue.append([self.background_border, (32, 32)])
+        pyg.overlay_queue.append((self.background_fill, (32, 32)))
+        pyg.overlay_queue.append((self.background_border, (32, 32)))
         
         # Stats
         Y = 32
@@ -974,8 +977,8 @@ class StatsMenu:
             key = pyg.font.render(key, True, pyg.gray)
             val = pyg.font.render(val, True, pyg.gray)
 
-            pyg.overlay_queue.append([key, (self.X1, Y)])
-            pyg.overlay_queue.append([val, (self.X2, Y)])
+            pyg.overlay_queue.append((key, (self.X1, Y)))
+            pyg.overlay_queue.append((val, (self.X2, Y)))
 
             Y += self.spacing
 
@@ -1094,14 +1097,14 @@ class Textbox:
         pyg = session.pyg
         
         # Render backdrop
-        pyg.overlay_queue.append([self.background_fade, (0, 0)])
-        pyg.overlay_queue.append([self.backdrop,        self.backdrop_pos])
-        pyg.overlay_queue.append([self.border,          self.backdrop_pos])
+        pyg.overlay_queue.append((self.background_fade, (0, 0)))
+        pyg.overlay_queue.append((self.backdrop,        self.backdrop_pos))
+        pyg.overlay_queue.append((self.border,          self.backdrop_pos))
                 
         # Render header and text
-        pyg.overlay_queue.append([self.header_render, self.header_pos])
+        pyg.overlay_queue.append((self.header_render, self.header_pos))
         for i in range(len(self.text_render)):
-            pyg.overlay_queue.append([self.text_render[i], self.text_pos[i]])
+            pyg.overlay_queue.append((self.text_render[i], self.text_pos[i]))
 
     def key_BACK(self):
         pyg = session.pyg
@@ -80,16 +80,20 @@ class EffectsSystem:
         """ Adds or removes ability for a given entity. """
 
         if effect_obj.trigger != 'on_use':
+            active_effects = ent.active_effects
 
             # Add effect
-            if effect_obj.name not in ent.active_effects.keys():
-                ent.active_effects[effect_obj.name] = effect_obj
+            if effect_obj.name not in active_effects.keys():
+                active_effects[effect_obj.name] = effect_obj
                 effect_obj.owner = ent
             
             # Remove effect
             else:
-                del ent.active_effects[effect_obj.name]
+                del active_effects[effect_obj.name]
                 effect_obj.owner = None
+            
+            ## Tiles only keep effects that are assigned back
+            ent.active_effects = active_effects
         
             effect_obj.activate(on_toggle=True)
 
@@ -131,6 +135,7 @@ class EffectsSystem:
             tile.blocked     = False
             tile.unbreakable = False
             tile.img_IDs     = ent.env.floor_img_IDs
+            ent.env.chunks.mark(tile)
         
             # Decrease condition
             if effect_obj.item.uses <= 100:
@@ -167,6 +172,7 @@ class EffectsSystem:
             tile           = effect_obj.owner.tile
             tile.img_IDs = ['floors', 'water']
             tile.biome     = 'water'
+            tile.env.chunks.mark(tile)
 
             # Update effect
             effect_obj.item.uses -= 1
@@ -301,6 +307,7 @@ class EffectsSystem:
             ent = session.player_obj.ent,
             env = area[lvl_num-1],
             loc = area[lvl_num-1].center)
+        area.pregenerate(f'dungeon level {lvl_num+1}', lvl_num+1)
 
     @register("descend_dungeon")
     def descend_dungeon(self, effect_obj, **kwargs):
@@ -319,6 +326,7 @@ class EffectsSystem:
                     ent = session.player_obj.ent,
                     env = area[lvl_num-1],
                     loc = area[lvl_num-1].center)
+                area.pregenerate(f'dungeon level {lvl_num+1}', lvl_num+1)
                 return
 
         ## Create a new level
@@ -327,6 +335,7 @@ class EffectsSystem:
             ent = session.player_obj.ent,
             env = area[lvl_num-1],
             loc = area[lvl_num-1].center)
+        area.pregenerate(f'dungeon level {lvl_num+1}', lvl_num+1)
 
     @register("ascend_dungeon")
     def ascend_dungeon(self, effect_obj, **kwargs):
@@ -394,6 +403,7 @@ class EffectsSystem:
                     ent = session.player_obj.ent,
                     env = area[lvl_num-1],
                     loc = area[lvl_num-1].center)
+                area.pregenerate('cave '+str(len(area.levels)), lvl_num+1)
                 return
 
         ## Create a new level
@@ -402,6 +412,7 @@ class EffectsSystem:
             ent = session.player_obj.ent,
             env = area[lvl_num-1],
             loc = area[lvl_num-1].center)
+        area.pregenerate('cave '+str(len(area.levels)), lvl_num+1)
 
     @register("ascend_cave")
     def ascend_cave(self, effect_obj, **kwargs):
@@ -430,52 +441,66 @@ class EffectsSystem:
             loc = area[lvl_num-1].center)
 
     @register("enter_hallucination")
-    def enter_hallucination(self, effect_obj=None):
-        pyg = session.pyg
+    def enter_hallucination(self, effect_obj=None, **kwargs):
+        """ Fades out and advances the player to the next hallucination.
+            The level is built a step at a time during the fade; see enter_hallucination_queue. """
+        
+        pyg  = session.pyg
+        envs = session.player_obj.envs
+        ent  = session.player_obj.ent
+
+        # Find area and level
+        if 'hallucination' not in envs.areas.keys():
+            envs.add_area('hallucination')
+            pyg.overlay_state = None
+        area = envs.areas['hallucination']
+        
+        if ent.env.name == 'hallucination': lvl_num = ent.env.lvl_num + 1
+        else:                                lvl_num = 1
+        
+        # Start building the level
+        area.pregenerate(f'hallucination {lvl_num}', lvl_num)
 
         pyg.add_intertitle(". . . ! Your vision blurs as the substance seeps through your veins.")
-        pyg.fn_queue.append([self.enter_hallucination_queue,  {}])
+        pyg.fn_queue.append([self.enter_hallucination_queue, {'lvl_num': lvl_num}])
         pyg.fade_state = 'out'
 
-    def enter_hallucination_queue(self):
-        """ Advances player to the next level. """
+    def enter_hallucination_queue(self, lvl_num):
+        """ Builds one step of the hallucination per frame while the screen is black, then places the player in it. """
     
         ## Shorthand
         envs = session.player_obj.envs
         ent  = session.player_obj.ent
         pyg  = session.pyg
+        area = envs.areas['hallucination']
+        name = f'hallucination {lvl_num}'
         
         #########################################################
-        # Create and/or enter
-        ## Create environment
-        if 'hallucination' not in envs.areas.keys():
-            envs.add_area('hallucination')
-            envs.areas['hallucination'].add_level('hallucination')
-            pyg.overlay_state = None
-            envs.build_hallucination_level()
-
-        ## Enter the first hallucination
-        if ent.env.name != 'hallucination':
-            place_player(
-                ent = ent,
-                env = envs.areas['hallucination'][0],
-                loc = envs.areas['hallucination'][0].center)
+        # Build
+        ## Continue on the next frame until the level is finished
+        record = area.pregenerated
+        if record and (record['name'] == name) and record['steps']:
+            area.continue_level()
+            pyg.fn_queue.insert(0, [self.enter_hallucination_queue, {'lvl_num': lvl_num}])
+            return
         
-        ## Enter the next saved hallucination
-        elif ent.env.lvl_num < len(envs.areas['hallucination'].levels):
-            lvl_num = ent.env.lvl_num
-            place_player(
-                ent = ent,
-                env = envs.areas['hallucination'][lvl_num],
-                loc = envs.areas['hallucination'][lvl_num].center)
+        ## Add the finished level, or build it if it was not started
+        if name not in area.levels:
+            area.add_level(name, lvl_num)
         
-        ## Enter a new hallucination
-        else:
-            envs['hallucination'].add_level('hallucination')
-            place_player(
-                ent = ent,
-                env = envs.areas['hallucination'][-1],
-                loc = envs.areas['hallucination'][-1].center)
+        #########################################################
+        # Enter
+        ## Change player into tentacles
+        if ent.env.name != 'hallucination':
+            ent.img_names_backup = ent.img_IDs
+            ent.img_IDs = ['tentacles_ent', 'front']
+            ent.refresh_sprite()
+        
+        place_player(
+            ent = ent,
+            env = area[name],
+            loc = area[name].center)
+        area.pregenerate(f'hallucination {lvl_num+1}', lvl_num+1)
 
     @register("enter_bitworld")
     def enter_bitworld(self, effect_obj, **kwargs):
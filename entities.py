@@ -10,6 +10,7 @@
 import random
 import time
 import copy
+from collections import OrderedDict
 
 ## Specific
 import pygame
@@ -31,6 +32,9 @@ class PlayerData:
             - Dialogue:     all dialogue that has been loaded, as well as the current state for each
     """
 
+    # Default for saves made before dialogue changes were counted
+    dialogue_version = 0
+
     def __init__(self):
         """ Holds everything regarding the player.
 
@@ -60,8 +64,9 @@ class PlayerData:
         self.envs = self._new_environments()
 
         # Dialogue
-        self.dialogue_cache  = {}
-        self.dialogue_states = {}
+        self.dialogue_cache   = {}
+        self.dialogue_states  = {}
+        self.dialogue_version = 0 # incremented when any dialogue state changes
 
         self.ent.last_env = self.envs.areas['underworld']['womb']
         place_player(
@@ -195,6 +200,14 @@ class PlayerData:
 
 class Entity:
     """ Player, enemies, and NPCs. Manages stats, inventory, and basic mechanics. """
+
+    # Composited sprites; shared by every entity with the same appearance
+    sprites      = OrderedDict()
+    sprites_size = 512
+
+    # Appearance and bubble state; reset to None to recompute
+    appearance   = None
+    bubble_state = None
     
     # Core
     def __init__(self, ent_id, **kwargs):
@@ -308,6 +321,28 @@ class Entity:
         else:      return (self.X//pyg.tile_width, self.Y//pyg.tile_height)
 
     # Rendering
+    def refresh_sprite(self):
+        """ Drops the cached appearance. Call after changing skin, direction, handedness, or equipment. """
+        
+        self.appearance = None
+
+    def _find_appearance(self, swimming):
+        """ Returns a hashable description of everything that is layered in draw(). """
+
+        equipment = []
+        if self.img_IDs[0] in session.img.skin_options:
+            for item in self.equipment.values():
+                if item is not None:
+                    equipment.append((item.slot, item.img_IDs[0], item.role, item.hidden))
+        
+        return (
+            self.img_IDs[0],
+            self.img_IDs[1],
+            self.handedness,
+            swimming,
+            not self.rand_Y,
+            tuple(equipment))
+
     def _find_body(self, swimming):
         
         ## Left handed
@@ -413,7 +448,7 @@ class Entity:
         return img_list
     
     def draw(self, loc=None):
-        """ Adds skin and equipment layers to a fresh surface.
+        """ Adds skin and equipment layers to a surface, which is shared by entities that look the same.
 
             Parameters
             ----------
@@ -421,8 +456,6 @@ class Entity:
             loc     : list of int; screen coordinates """
         
         pyg = session.pyg
-        
-        surface = pygame.Surface((64, 64), pygame.SRCALPHA)
 
         #########################################################
         # Set location
@@ -434,46 +467,83 @@ class Entity:
             Y = self.Y - self.env.camera.Y
         
         #########################################################
-        # Body
+        # Find appearance
         ## Toggle lower half
         if self.tile.biome in session.img.biomes['sea']: swimming = True
         else:                                            swimming = False
 
-        ## Body
-        img = self._find_body(swimming)
-        surface.blit(img, (0, 0))
-    
-        ## Equipment for humanoids
-        if self.img_IDs[0] in session.img.skin_options:
-            img_finders = [
-                self._find_chest,
-                self._find_armor,
-                self._find_face,
-                self._find_hair,
-                self._find_holdables]
+        ## Recompute only when invalidated or when entering or leaving water
+        if (self.appearance is None) or (self.appearance[3] != swimming):
+            self.appearance = self._find_appearance(swimming)
+        
+        #########################################################
+        # Reuse or construct the sprite
+        sprites = Entity.sprites
+        surface = sprites.get(self.appearance)
+        if surface is not None:
+            sprites.move_to_end(self.appearance)
+        
+        else:
+            surface = pygame.Surface((64, 64), pygame.SRCALPHA)
+
+            ## Body
+            img = self._find_body(swimming)
+            surface.blit(img, (0, 0))
+        
+            ## Equipment for humanoids
+            if self.img_IDs[0] in session.img.skin_options:
+                img_finders = [
+                    self._find_chest,
+                    self._find_armor,
+                    self._find_face,
+                    self._find_hair,
+                    self._find_holdables]
+                
+                for img_finder in img_finders:
+                    img = img_finder(swimming)
+                    if img is not None:
+                        if isinstance(img, list):
+                            for item in img:
+                                surface.blit(item, (0, 0))
+                        else:
+                            surface.blit(img, (0, 0))
             
-            for img_finder in img_finders:
-                img = img_finder(swimming)
-                if img is not None:
-                    if isinstance(img, list):
-                        for item in img:
-                            surface.blit(item, (0, 0))
-                    else:
-                        surface.blit(img, (0, 0))
+            sprites[self.appearance] = surface
+            if len(sprites) > Entity.sprites_size:
+                sprites.popitem(last=False)
         
-        pyg.display_queue.append([surface, (X, Y)])
+        pyg.display_queue.append((surface, (X, Y)))
 
-        #########################################################
-        # Bubbles
-        bubble = None
-        shift  = 32 - session.img.ent_data[self.img_IDs[0]]['height']
+    def draw_bubble(self, loc=None):
+        """ Adds a quest or trade bubble above the entity. Drawn separately so that it is not hidden by roofs.
 
-        if self.quest_active():                bubble = 'dots_bubble'
-        if self.trade_active() and not bubble: bubble = 'cart_bubble'
+            Parameters
+            ----------
+            loc     : list of int; screen coordinates """
+        
+        pyg = session.pyg
+
+        # Set location
+        if loc:
+            X = loc[0]
+            Y = loc[1]
+        else:
+            X = self.X - self.env.camera.X
+            Y = self.Y - self.env.camera.Y
+        
+        # Select bubble; only checked when dialogue or time of day changes
+        key = (session.player_obj.dialogue_version, session.player_obj.ent.env.env_time)
+        if (self.bubble_state is None) or (self.bubble_state[0] != key):
+            bubble = None
+            if self.quest_active():                bubble = 'dots_bubble'
+            if self.trade_active() and not bubble: bubble = 'cart_bubble'
+            self.bubble_state = (key, bubble)
+        bubble = self.bubble_state[1]
         
         if bubble:
+            shift = 32 - session.img.ent_data[self.img_IDs[0]]['height']
             loc = (X, Y - pyg.tile_height + shift)
-            pyg.display_queue.append([session.img.dict['bubbles'][bubble], loc])
+            pyg.display_queue.append((session.img.dict['bubbles'][bubble], loc))
 
 class Dialogue:
     """ Imports and stores dialogue from JSON files, and returns a random piece of accessible dialogue.
@@ -516,6 +586,7 @@ class Dialogue:
                 'dialogue_id': 'default', # ex. 'quest_1_dialogue_1'
                 'owner_id':    None,      # ex. 'quest_1'
                 'queue':       {}}        # ex. {'quest_2': 'quest_2_dialogue_1'}
+            session.player_obj.dialogue_version += 1
 
     def _get_dialogue(self, ent_id):
         """ Return a random dialogue string from the character's current set of available options. """
@@ -559,6 +630,8 @@ class Dialogue:
 
                 # Add new entry to the end
                 state['queue'][owner_id] = dialogue_id
+        
+        session.player_obj.dialogue_version += 1
 
     def release_dialogue(self, ent_id, owner_id):
         """ Release dialogue ownership and hand off to the next queued quest if present. """
@@ -585,6 +658,8 @@ class Dialogue:
             # Remove from the queue
             elif owner_id in state['queue']:
                 state['queue'].pop(owner_id)
+        
+        session.player_obj.dialogue_version += 1
 
     def emit_dialogue(self, ent_id):
         """ Loads dialogue, sends it to the GUI, and plays some audio. """
@@ -682,6 +757,7 @@ def create_NPC(NPC_id):
                 session.items.pick_up(ent, item, silent=True)
                 session.items.toggle_equip(item, silent=True)
                 if NPC['trade_times']: item.hidden = True
+        ent.refresh_sprite()
 
         # Trading
         ent.trade_times = NPC['trade_times']
@@ -14,9 +14,16 @@
 ########################################################################################################################################################
 # Imports
 ## Standard
+import io
+import os
 import time
 import random
 import copy
+import pickle
+import tempfile
+from array import array
+from collections import OrderedDict, deque
+from types import MappingProxyType
 
 ## Specific
 import pygame
@@ -41,6 +48,11 @@ class Environments:
             player_obj.envs = Environments(player_obj)
             player_obj.envs.add_area('area name')
             player_obj.envs.areas['area name'].add_level('environment name')
+
+            Parameters
+            ----------
+            level_budget : int; number of map tiles kept in memory across all levels, at roughly 70 bytes each in a dungeon
+            level_clock  : int; counts entries into levels, to find the least recently used ones
         """
 
         # Owner
@@ -54,10 +66,33 @@ class Environments:
         # Environment container
         self.areas = {}
 
+        # Memory
+        self.level_budget = 100_000
+        self.level_clock  = 0
+
     def add_area(self, name, permadeath=False):
         self.areas[name] = Area(name, self, permadeath)
         return self.areas[name]
 
+    def touch(self, env):
+        """ Marks a level as just used, then stores the least recently used levels until the rest fit in the budget.
+            The player's level is never stored. """
+
+        self.level_clock += 1
+        env.last_used     = self.level_clock
+
+        # Find levels in memory
+        levels = [level for area in list(self.areas.values()) for level in area.levels.values() if not level.saved]
+        tiles  = sum(len(level.map.flags) for level in levels)
+
+        # Store the oldest first
+        for level in sorted(levels, key=lambda level: level.last_used):
+            if tiles <= self.level_budget:                      break
+            if level in [env, self.player_obj.ent.env]: continue
+            
+            tiles -= len(level.map.flags)
+            level.area.store_level(level)
+
     # Underworld
     def build_garden(self, area):
         """ Generates the overworld environment. """
@@ -116,8 +151,8 @@ class Environments:
         entities = [['forest', 'red_radish', 50, [None]]]
         place_objects(env, items, entities)
         
-        x = center[0] + random.randint(1, 5)
-        y = center[1] + random.randint(1, 5)
+        x = center[0] + env.rng.randint(1, 5)
+        y = center[1] + env.rng.randint(1, 5)
         item = create_item('jug_of_water')
         place_object(item, (x, y), env)
 
@@ -341,7 +376,7 @@ class Environments:
         
         # Set weather
         env.weather = Weather(env, light_set=None, clouds=True)
-        for _ in range(random.randint(0, 10)):
+        for _ in range(env.rng.randint(0, 10)):
             env.weather.create_cloud()
 
         ## Generate biomes
@@ -369,10 +404,10 @@ class Environments:
         while room_counter < num_rooms:
             
             # Generate location
-            width  = random.randint(self.room_min_size, self.room_max_size)
-            height = random.randint(self.room_min_size, self.room_max_size)
-            x      = random.randint(x_1, x_2(width))
-            y      = random.randint(y_1, y_2(height))
+            width  = env.rng.randint(self.room_min_size, self.room_max_size)
+            height = env.rng.randint(self.room_min_size, self.room_max_size)
+            x      = env.rng.randint(x_1, x_2(width))
+            y      = env.rng.randint(y_1, y_2(height))
             
             # Check for solid ground
             failed = False
@@ -397,7 +432,7 @@ class Environments:
                     wall_img_IDs   = env.wall_img_IDs,
                     roof_img_IDs   = env.roof_img_IDs,
                     unbreakable    = True,
-                    plan           = create_text_room(width, height))
+                    plan           = create_text_room(width, height, rng=env.rng))
 
                 room_counter += 1
                 x, y = new_room.center()[0], new_room.center()[1]
@@ -417,10 +452,10 @@ class Environments:
         while room_counter < num_rooms:
             
             # Generate location
-            width  = random.randint(self.room_min_size, self.room_max_size)
-            height = random.randint(self.room_min_size, self.room_max_size)
-            x      = random.randint(x_1, x_2(width))
-            y      = random.randint(y_1, y_2(height))
+            width  = env.rng.randint(self.room_min_size, self.room_max_size)
+            height = env.rng.randint(self.room_min_size, self.room_max_size)
+            x      = env.rng.randint(x_1, x_2(width))
+            y      = env.rng.randint(y_1, y_2(height))
             
             # Check for solid ground
             failed = False
@@ -531,9 +566,9 @@ class Environments:
             ent = create_NPC(name)
             
             # Select room not occupied by player
-            room = random.choice(env.rooms)
+            room = env.rng.choice(env.rooms)
             while room.name in room_list:
-                room = random.choice(env.rooms)
+                room = env.rng.choice(env.rooms)
             room_list.append(room.name)
             
             # Select spawn location
@@ -552,9 +587,9 @@ class Environments:
             ent = create_NPC('random')
             
             # Select room not occupied by player
-            room = random.choice(env.rooms)
+            room = env.rng.choice(env.rooms)
             while room.name in ['home room', 'church']:
-                room = random.choice(env.rooms)
+                room = env.rng.choice(env.rooms)
             
             # Select spawn location
             for i in range(3):
@@ -571,8 +606,8 @@ class Environments:
             
         return env
 
-    def build_cave(self, area, lvl_num):
-        """ Generates a cave environment. """
+    def build_cave(self, area, lvl_num, seed=None):
+        """ Generates a cave environment a step at a time, yielding it after each step. The same seed gives the same cave. """
         
         ###############################################################
         # Initialize environment
@@ -588,7 +623,8 @@ class Environments:
             roof_img_IDs  = None,
             blocked       = True,
             hidden        = True,
-            area          = area)
+            area          = area,
+            seed          = seed)
         
         # Set weather
         env.weather = Weather(env, light_set=16, clouds=False)
@@ -600,17 +636,18 @@ class Environments:
         # Generate biomes
         biomes = [['dungeon', ['walls', 'dark_red']]]
         voronoi_biomes(env, biomes)
+        yield env
         
         ###############################################################
         # Construct rooms
-        num_rooms = random.randint(2, 10)
+        num_rooms = env.rng.randint(2, 10)
         for i in range(num_rooms):
             
             # Construct room
-            width    = random.randint(self.room_min_size, self.room_max_size)
-            height   = random.randint(self.room_min_size, self.room_max_size)
-            x        = random.randint(0, len(env.map)    - width  - 1)
-            y        = random.randint(0, len(env.map[0]) - height - 1)
+            width    = env.rng.randint(self.room_min_size, self.room_max_size)
+            height   = env.rng.randint(self.room_min_size, self.room_max_size)
+            x        = env.rng.randint(0, len(env.map)    - width  - 1)
+            y        = env.rng.randint(0, len(env.map[0]) - height - 1)
             
             new_room = Room(
                 name    = 'cave room',
@@ -625,14 +662,16 @@ class Environments:
                 floor_img_IDs   = env.floor_img_IDs,
                 wall_img_IDs   = env.wall_img_IDs,
                 roof_img_IDs    = env.roof_img_IDs)
+            yield env
         
         # Combine rooms and add doors
         env.combine_rooms()
+        yield env
         
         # Paths
         for i in range(len(env.rooms)):
             room_1, room_2 = env.rooms[i], env.rooms[i-1]
-            chance_1, chance_2 = 0, random.randint(0, 1)
+            chance_1, chance_2 = 0, env.rng.randint(0, 1)
             if not chance_1:
                 (x_1, y_1), (x_2, y_2) = room_1.center(), room_2.center()
                 if not chance_2:
@@ -656,12 +695,12 @@ class Environments:
             ['dungeon', 'red_ent',        300,  [None]],
             ['dungeon', 'round3_ent',     50,   [None]]]
         place_objects(env, items, entities)
+        yield env
         
         # Place player in first room
         (x, y) = env.rooms[0].center()
         env.player_coordinates = [x, y]
         env.center = new_room.center()
-        self.player_obj.ent.tile = env.map[x][y]
         
         # Generate acending stairs under player
         stairs = create_item('descend_cave')
@@ -676,11 +715,11 @@ class Environments:
             stairs = create_item('ascend_cave')
         place_object(stairs, [x, y], env)
 
-        return env
+        yield env
 
     # Dreams
-    def build_dungeon(self, area, lvl_num):
-        """ Generates the overworld environment. """
+    def build_dungeon(self, area, lvl_num, seed=None):
+        """ Generates a dungeon environment a step at a time, yielding it after each step. The same seed gives the same dungeon. """
         
         ###############################################################
         # Initialize environment
@@ -696,7 +735,8 @@ class Environments:
             roof_img_IDs  = None,
             blocked       = True,
             hidden        = True,
-            area          = area)
+            area          = area,
+            seed          = seed)
         
         # Set weather
         env.weather = Weather(env, light_set=0, clouds=False)
@@ -708,6 +748,7 @@ class Environments:
         # Generate biomes
         biomes = [['dungeon', ['walls', 'gray']]]
         voronoi_biomes(env, biomes)
+        yield env
         
         ###############################################################
         # Construct rooms
@@ -715,12 +756,12 @@ class Environments:
         for i in range(num_rooms):
             
             # Construct room
-            width    = random.randint(self.room_min_size, self.room_max_size)
-            height   = random.randint(self.room_min_size, self.room_max_size)
-            x        = random.randint(0, len(env.map)    - width  - 1)
-            y        = random.randint(0, len(env.map[0]) - height - 1)
+            width    = env.rng.randint(self.room_min_size, self.room_max_size)
+            height   = env.rng.randint(self.room_min_size, self.room_max_size)
+            x        = env.rng.randint(0, len(env.map)    - width  - 1)
+            y        = env.rng.randint(0, len(env.map[0]) - height - 1)
             
-            floor_img_IDs = random.choice([
+            floor_img_IDs = env.rng.choice([
                 ['floors', 'dark_green_floor'],
                 ['floors', 'dark_green_floor'],
                 ['floors', 'green_floor']])
@@ -738,14 +779,16 @@ class Environments:
                 floor_img_IDs   = floor_img_IDs,
                 wall_img_IDs   = env.wall_img_IDs,
                 roof_img_IDs    = env.roof_img_IDs)
+            yield env
         
         # Combine rooms and add doors
         env.combine_rooms()
+        yield env
         
         # Paths
         for i in range(len(env.rooms)):
             room_1, room_2 = env.rooms[i], env.rooms[i-1]
-            chance_1, chance_2 = 0, random.randint(0, 1)
+            chance_1, chance_2 = 0, env.rng.randint(0, 1)
             if not chance_1:
                 (x_1, y_1), (x_2, y_2) = room_1.center(), room_2.center()
                 if not chance_2:
@@ -772,12 +815,12 @@ class Environments:
             ['land', 'red_radish',   1000,  [None]],
             ['land', 'round1_ent',   30,    [None]]]
         place_objects(env, items, entities)
+        yield env
         
         # Place player in first room
         (x, y) = env.rooms[0].center()
         env.player_coordinates = [x, y]
         env.center = new_room.center()
-        self.player_obj.ent.tile = env.map[x][y]
 
         # Generate stairs in the last room
         stairs = create_item('descend_dungeon')
@@ -789,7 +832,7 @@ class Environments:
             stairs = create_item('ascend_dungeon')
             place_object(stairs, [x, y], env)
 
-        return env
+        yield env
 
     def build_bitworld(self, area):
         from pygame_utilities import bw_binary
@@ -827,15 +870,12 @@ class Environments:
         # Test quests
         session.questlogs.load_quest('kill_the_town', area)
 
-    def build_hallucination(self, area, lvl_num=0):
-        """ Generates the overworld environment. """
+    def build_hallucination(self, area, lvl_num, seed=None):
+        """ Generates a hallucination environment a step at a time, yielding it after each step. The same seed gives the same hallucination.
+            The player is changed into tentacles when entering; see enter_hallucination_queue. """
         
         ###############################################################
         ## Initialize environment
-        if not lvl_num:
-            if not self.areas['hallucination'].levels: lvl_num = 1
-            else:                                      lvl_num = 1 + self.areas['hallucination'][-1].lvl_num        
-        
         env = Environment(
             envs          = self,
             name          = 'hallucination',
@@ -848,7 +888,8 @@ class Environments:
             roof_img_IDs  = None,
             blocked       = True,
             hidden        = True,
-            area          = area)
+            area          = area,
+            seed          = seed)
         
         # Set weather
         env.weather = Weather(env, light_set=32, clouds=False)
@@ -864,6 +905,7 @@ class Environments:
         env.camera = Camera(self.player_obj.ent)
         env.camera.fixed = False
         env.camera.zoom_in(custom=1)
+        yield env
         
         ###############################################################
         # Construct rooms
@@ -871,10 +913,10 @@ class Environments:
         for i in range(num_rooms):
             
             # Construct room
-            width    = random.randint(self.room_min_size*2, self.room_max_size*2)
-            height   = random.randint(self.room_min_size*2, self.room_max_size*2)
-            x        = random.randint(0, len(env.map)    - width  - 1)
-            y        = random.randint(0, len(env.map[0]) - height - 1)
+            width    = env.rng.randint(self.room_min_size*2, self.room_max_size*2)
+            height   = env.rng.randint(self.room_min_size*2, self.room_max_size*2)
+            x        = env.rng.randint(0, len(env.map)    - width  - 1)
+            y        = env.rng.randint(0, len(env.map[0]) - height - 1)
             
             new_room = Room(
                 name    = 'hallucination backdrop',
@@ -889,9 +931,11 @@ class Environments:
                 floor_img_IDs   = env.floor_img_IDs,
                 wall_img_IDs   = env.wall_img_IDs,
                 roof_img_IDs    = env.roof_img_IDs)
+            yield env
         
         # Combine rooms and add doors
         env.combine_rooms()
+        yield env
         
         ## Construct rooms
         num_rooms             = 5
@@ -903,10 +947,10 @@ class Environments:
         while room_counter < num_rooms:
             
             # Generate location
-            width  = random.randint(self.room_min_size, self.room_max_size)
-            height = random.randint(self.room_min_size, self.room_max_size)
-            x      = random.randint(x_1, x_2(width))
-            y      = random.randint(y_1, y_2(height))
+            width  = env.rng.randint(self.room_min_size, self.room_max_size)
+            height = env.rng.randint(self.room_min_size, self.room_max_size)
+            x      = env.rng.randint(x_1, x_2(width))
+            y      = env.rng.randint(y_1, y_2(height))
             
             # Check for solid ground
             failed = False
@@ -929,10 +973,11 @@ class Environments:
                     floor_img_IDs  = ['floors', 'dark_green_floor'],
                     wall_img_IDs  = env.wall_img_IDs,
                     roof_img_IDs   = env.roof_img_IDs,
-                    plan = create_text_room(width, height, doors=False))
+                    plan = create_text_room(width, height, doors=False, rng=env.rng))
 
                 room_counter += 1
                 x, y = new_room.center()[0], new_room.center()[1]
+                yield env
             
             # Spawn rooms elsewhere if needed
             else: counter += 1
@@ -943,7 +988,7 @@ class Environments:
         # Paths
         for i in range(len(env.rooms)):
             room_1, room_2 = env.rooms[i], env.rooms[i-1]
-            chance_1, chance_2 = 0, random.randint(0, 1)
+            chance_1, chance_2 = 0, env.rng.randint(0, 1)
             if not chance_1:
                 (x_1, y_1), (x_2, y_2) = room_1.center(), room_2.center()
                 if not chance_2:
@@ -968,16 +1013,12 @@ class Environments:
             ['any', 'tentacles_ent',      100,  [None]],
             ['any', 'red_radish',     1000, [None]]]
         place_objects(env, items, entities)
-        
-        # Change player into tentacles
-        self.player_obj.ent.img_names_backup = self.player_obj.ent.img_IDs
-        self.player_obj.ent.img_IDs = ['tentacles_ent', 'front']
+        yield env
         
         # Place player in first room
         (x, y) = env.rooms[0].center()
         env.player_coordinates = [x, y]
         env.center = new_room.center()
-        self.player_obj.ent.tile = env.map[x][y]
         
         # Generate stairs in the last room
         (x, y) = env.rooms[-2].center()
@@ -985,7 +1026,7 @@ class Environments:
         stairs.name = 'hallucination'
         place_object(stairs, [x, y], env)
 
-        return env
+        yield env
 
 class Area:
 
@@ -995,12 +1036,14 @@ class Area:
         
             Parameters
             ----------
-            name       : str; identifier for the set of environments
-            envs       : Environments object; parent
-            permadeath : bool; triggers awakening if False
+            name         : str; identifier for the set of environments
+            envs         : Environments object; parent
+            permadeath   : bool; triggers awakening if False
 
-            levels     : dict; keys are names of Environment objects, which are the values
-            last_env   : Environment object; last occupied by player before switching areas
+            levels       : dict; keys are names of Environment objects, which are the values
+                           Levels that are not in memory are placeholders with a saved attribute; see restore_level
+            last_env     : Environment object; last occupied by player before switching areas
+            pregenerated : dict or None; name, lvl_num, remaining steps, and env of a level built ahead of time
 
             Example
             -------
@@ -1020,29 +1063,180 @@ class Area:
 
         self.display_fx = None
 
+        self.pregenerated = None
+
     def add_level(self, name, lvl_num=None):
-        if name       == 'womb':      env = self.envs.build_womb(self)
-        elif name     == 'garden':    env = self.envs.build_garden(self)
-        elif name     == 'home':      env = self.envs.build_home(self)
-        elif name     == 'overworld': env = self.envs.build_overworld(self)
-        elif name     == 'bitworld':  env = self.envs.build_bitworld(self)
-        elif name[:7] == 'dungeon':   env = self.envs.build_dungeon(self, lvl_num)
-        elif name[:4] == 'cave':      env = self.envs.build_cave(self,    lvl_num)
+        """ Adds a level to the area. Levels other than bitworld are only built when first used; see restore_level. """
 
+        # Use a level that was built ahead of time
+        env = self.claim_level(name, lvl_num)
         if env:
-            print(env.name, (len(env.map), len(env.map[0])))
             self.levels[name] = env
+            self.envs.touch(env)
+        
+        # Wait to build the level
+        elif (name in ['womb', 'garden', 'home', 'overworld']) or (name[:7] == 'dungeon') or (name[:4] == 'cave') or (name[:13] == 'hallucination'):
+            self.levels[name] = Environment.placeholder(
+                envs    = self.envs,
+                area    = self,
+                name    = name,
+                lvl_num = lvl_num,
+                saved   = {'name': name, 'lvl_num': lvl_num})
+        
+        # Build the level now
+        else:
+            env = self.build_level(name, lvl_num)
+            if env: self.levels[name] = env
+
+    def build_level(self, name, lvl_num=None, seed=None):
+        """ Constructs a level without adding it to the area.
+            Dungeons, caves, and hallucinations depend only on their seed, so they keep a journal of changes and are saved as seed and journal. """
+
+        env = None
+        for env in self.build_steps(name, lvl_num, seed): pass
+        return env
+
+    def build_steps(self, name, lvl_num=None, seed=None):
+        """ Constructs a level a step at a time, yielding the level after each step. Only dungeons, caves, and hallucinations take more than one step. """
+
+        if name       == 'womb':      yield self.envs.build_womb(self)
+        elif name     == 'garden':    yield self.envs.build_garden(self)
+        elif name     == 'home':      yield self.envs.build_home(self)
+        elif name     == 'overworld': yield self.envs.build_overworld(self)
+        elif name     == 'bitworld':  yield self.envs.build_bitworld(self)
+        
+        elif (name[:7] == 'dungeon') or (name[:4] == 'cave') or (name[:13] == 'hallucination'):
+            if name[:7] == 'dungeon':  steps = self.envs.build_dungeon(self,       lvl_num, seed)
+            elif name[:4] == 'cave':   steps = self.envs.build_cave(self,          lvl_num, seed)
+            else:                      steps = self.envs.build_hallucination(self, lvl_num, seed)
+            
+            for env in steps: yield env
+            env.start_journal(name)
+
+    def restore_level(self, env):
+        """ Brings a level back into memory and returns it. Called when the level is entered or looked up.
+            The level is filled into the placeholder and its map, so references held elsewhere stay valid.
+
+            Parameters
+            ----------
+            env : Environment object; placeholder, with one of the following in env.saved
+                  path or data : level written by store_level
+                  tiles        : seed and journal of a dungeon, cave, or hallucination from a save file, which is rebuilt
+                  otherwise    : name and lvl_num of a level that has not been built yet
+        """
+
+        saved = env.saved
+        
+        # Load a stored level
+        if ('path' in saved) or ('data' in saved):
+            load_level(env, saved)
+
+        # Build the level
+        else:
+            summary = env.summary()
+            if 'map' not in env.__dict__: env.map = TileGrid.__new__(TileGrid)
+            
+            move_level(self.build_level(saved['name'], saved['lvl_num'], seed=saved.get('seed')), env)
+            if 'tiles' in saved:
+                env.apply_journal(saved)
+                
+                ## Keep the player's last position and the time
+                env.player_coordinates = summary['player_coordinates']
+                env.env_date           = summary['env_date']
+                env.env_time           = summary['env_time']
+
+        self.envs.touch(env)
+        return env
+
+    def store_level(self, env):
+        """ Releases a level from memory, leaving the Environment object and its map as a placeholder that restore_level fills in again.
+            The level is written to a temporary file, except for its entities and items, which stay in memory so that quests,
+            inventories, and other levels can keep referring to them. Dungeons, caves, and hallucinations also keep their seed and journal,
+            which are written to the save file in place of the level; see Environment.__getstate__. """
+
+        grid    = env.map
+        path    = store_path()
+        objects = level_objects(env)
+        with open(path, 'wb') as file:
+            LevelPickler(file, env, objects).dump(level_state(env))
+        saved = {'name': env.name, 'path': path, 'objects': objects}
+        
+        if env.journal is not None:
+            saved['journal'] = env.export_journal()
+        
+        summary = env.summary()
+        env.__dict__.clear()
+        env.__dict__.update(summary, map=grid, journal=None, saved=saved)
+        grid.release()
+
+    def pregenerate(self, name, lvl_num):
+        """ Starts building a level while the player explores the current one. One step is built per frame; see continue_level.
+            The level is handed to add_level when the player reaches it, or dropped if the player leaves the area.
+            Only used for caves, dungeons, and hallucinations, whose builders do not change the player or the current level.
+
+            Parameters
+            ----------
+            name    : str; name that add_level will be called with
+            lvl_num : int; depth of the level
+        """
+
+        # Skip levels that already exist or are being built
+        if any(env.lvl_num == lvl_num for env in self.levels.values()): return
+        if self.pregenerated and (self.pregenerated['name'] == name) and (self.pregenerated['lvl_num'] == lvl_num): return
+
+        # Build between frames
+        steps = self.build_steps(name, lvl_num, seed=random.getrandbits(32))
+        self.pregenerated = {'name': name, 'lvl_num': lvl_num, 'steps': steps, 'env': None}
+
+    def continue_level(self):
+        """ Builds one step of the pregenerated level, if it is not finished. """
+
+        record = self.pregenerated
+        if record and record['steps']:
+            try:                  record['env']   = next(record['steps'])
+            except StopIteration: record['steps'] = None
+
+    def claim_level(self, name, lvl_num):
+        """ Returns the pregenerated level if it matches, building its remaining steps first.
+            Returns None if there is no match, in which case add_level builds it instead. """
+
+        record, self.pregenerated = self.pregenerated, None
+        if record and (record['name'] == name) and (record['lvl_num'] == lvl_num):
+            env = record['env']
+            if record['steps']:
+                for env in record['steps']: pass
+            return env
+
+    def discard_level(self):
+        """ Drops the pregenerated level and its remaining steps. """
+
+        self.pregenerated = None
 
     def __getitem__(self, key):
-        """ Allows the instance to be treated as a dictionary with levels as values. """
+        """ Allows the instance to be treated as a dictionary with levels as values. Levels are restored if needed. """
+
+        if isinstance(key, int):   env = list(self.levels.values())[key]
+        elif isinstance(key, str): env = self.levels[key]
+        
+        if env.saved: env = self.restore_level(env)
+        return env
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+
+        del state['pregenerated']
+
+        return state
 
-        if isinstance(key, int):   return list(self.levels.values())[key]
-        elif isinstance(key, str): return self.levels[key]
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        
+        self.pregenerated = None
 
 class Environment:
     """ Generates and manages each world, such as each floor of the dungeon. """
     
-    def __init__(self, envs, name, size, soundtrack, lvl_num, wall_img_IDs, floor_img_IDs, roof_img_IDs, blocked=True, hidden=True, img_IDs=['', ''], area=None):
+    def __init__(self, envs, name, size, soundtrack, lvl_num, wall_img_IDs, floor_img_IDs, roof_img_IDs, blocked=True, hidden=True, img_IDs=['', ''], area=None, seed=None):
         """ Environment parameters
             ----------------------
             envs        : Environments object; owner
@@ -1053,6 +1247,11 @@ class Environment:
             soundtrack  : list of pygame audio files
             entities    : list of Entity objects
             camera      : Camera object 
+            seed        : int; seeds rng, or a random seed if None
+            rng         : random.Random object; used for everything random while building the environment
+            journal     : dict or None; generated items and entities of a level that is saved as its seed and changes
+            saved       : dict or None; seed and changes, or stored copy, of a level that is not in memory
+            last_used   : int; value of envs.level_clock when the level was last entered
             
             Tile parameters
             ---------------
@@ -1081,6 +1280,13 @@ class Environment:
         self.lvl_num    = lvl_num
         self.size       = size
         self.soundtrack = soundtrack
+
+        # Random numbers
+        self.seed    = seed if (seed is not None) else random.getrandbits(32)
+        self.rng     = random.Random(self.seed)
+        self.journal   = None
+        self.saved     = None
+        self.last_used = 0
         
         # World clock
         self.env_date = 0
@@ -1093,42 +1299,173 @@ class Environment:
         self.rooms         = []
         
         # Generate map tiles
-        self.map = []
-        X_range  = [0, self.size * pyg.screen_width]
-        Y_range  = [0, self.size * pyg.screen_height]
-        for X in range(X_range[0], X_range[1], pyg.tile_width):
-            row = [] 
-            for Y in range(Y_range[0], Y_range[1], pyg.tile_height):
-
-                tile               = create_tile(img_IDs[1])
-                tile.env           = self
-                tile.wall_img_IDs  = wall_img_IDs
-                tile.floor_img_IDs = floor_img_IDs
-                tile.roof_img_IDs  = roof_img_IDs
-                tile.X             = X
-                tile.Y             = Y
-                
-                # Handle edges
-                if (X in X_range) or (Y in Y_range):
-                    tile.blocked     = True
-                    tile.hidden      = hidden
-                    tile.unbreakable = True
-                
-                # Handle bulk
-                else:
-                    tile.blocked     = blocked
-                    tile.hidden      = hidden
-                    tile.unbreakable = False
-                
-                row.append(tile)
-            self.map.append(row)
+        ## Handle bulk
+        tile               = create_tile(img_IDs[1])
+        tile.wall_img_IDs  = wall_img_IDs
+        tile.floor_img_IDs = floor_img_IDs
+        tile.roof_img_IDs  = roof_img_IDs
+        tile.blocked       = blocked
+        tile.hidden        = hidden
+        tile.unbreakable   = False
+        self.map = TileGrid(
+            env    = self,
+            width  = self.size * pyg.screen_width  // pyg.tile_width,
+            height = self.size * pyg.screen_height // pyg.tile_height,
+            tile   = tile)
+        
+        ## Handle edges
+        for (x, y) in [(x, 0) for x in range(len(self.map))] + [(0, y) for y in range(1, len(self.map[0]))]:
+            self.map[x][y].blocked     = True
+            self.map[x][y].unbreakable = True
         
         # Other
         self.ents = []
         self.player_coordinates = [0, 0]
         self.camera             = None
+        self.chunks             = Chunks(self)
+        self.placed_walls       = PlacedWalls(self)
         self.center             = [int(len(self.map)/2), int(len(self.map[0])/2)]
 
+    # Persistence
+    def start_journal(self, name):
+        """ Records the items and entities of a newly built level and begins tracking changes to its tiles.
+            Together with the seed, this allows the level to be saved as its changes and rebuilt when it is needed.
+
+            Parameters
+            ----------
+            name : str; name of the level in its area, used to rebuild it
+        """
+
+        grid  = self.map
+        items = grid.objects['item']
+        ents  = {}
+        for ent in self.ents:
+            if ent is not self.envs.player_obj.ent:
+                ents[ent.X // grid.tile_width * grid.height + ent.Y // grid.tile_height] = ent
+
+        self.journal = {'name': name, 'items': dict(items), 'ents': ents}
+        grid.changed = {}
+
+    def export_journal(self):
+        """ Returns the changes to the level since it was built.
+
+            Returns
+            -------
+            saved : dict; name, seed, and lvl_num of the level, and
+                    tiles   : dict; tile index -> {field: value} for each changed field, with 'flags' for the packed flags
+                    removed : list of int; tile indices of generated items that are gone
+                    killed  : list of int; tile indices where generated entities that are gone were created
+                    items   : dict; tile index -> Item object, for items that were not generated there
+                    ents    : list of Entity objects that were not generated on the level, other than the player
+        """
+
+        grid   = self.map
+        items  = grid.objects['item']
+        player = self.envs.player_obj.ent
+        alive  = {id(ent) for ent in self.ents}
+
+        # Changed tiles
+        tiles = {}
+        for (index, fields) in grid.changed.items():
+            tile = grid.view(index)
+            tiles[index] = {field: grid.flags[index] if field == 'flags' else getattr(tile, field) for field in fields}
+        
+        # Generated objects that are gone
+        removed = [index for (index, item) in self.journal['items'].items() if items.get(index) is not item]
+        killed  = [index for (index, ent) in self.journal['ents'].items() if ent.dead or (id(ent) not in alive)]
+        
+        # Objects that were added
+        generated = {id(ent) for ent in self.journal['ents'].values()}
+        added     = {index: item for (index, item) in items.items() if self.journal['items'].get(index) is not item}
+        ents      = []
+        for ent in self.ents:
+            if (id(ent) not in generated) and (ent is not player) and (ent not in ents):
+                ents.append(ent)
+
+        return {
+            'name':    self.journal['name'],
+            'seed':    self.seed,
+            'lvl_num': self.lvl_num,
+            'tiles':   tiles,
+            'removed': removed,
+            'killed':  killed,
+            'items':   added,
+            'ents':    ents}
+
+    def apply_journal(self, saved):
+        """ Repeats saved changes on a level that was just rebuilt from the same seed. See export_journal. """
+
+        pyg  = session.pyg
+        grid = self.map
+
+        # Remove generated objects
+        for index in saved['removed']:
+            grid.view(index).item = None
+        
+        for index in saved['killed']:
+            ent = self.journal['ents'][index]
+            ent.dead = True
+            ent.tile.ent = None
+            while ent in self.ents: self.ents.remove(ent)
+        
+        # Add other objects
+        for (index, item) in saved['items'].items():
+            place_object(item, [index // grid.height, index % grid.height], self)
+        
+        for ent in saved['ents']:
+            place_object(ent, [ent.X // pyg.tile_width, ent.Y // pyg.tile_height], self)
+        
+        # Restore changed tiles
+        for (index, fields) in saved['tiles'].items():
+            tile = grid.view(index)
+            for (field, value) in fields.items():
+                if field == 'flags': grid.flags[index] = value
+                else:                setattr(tile, field, value)
+            for field in fields: grid.record(index, field)
+
+    def saved_by_seed(self):
+        """ Returns True if the level is saved as its seed and changes instead of in full.
+            This is the case for dungeons, caves, and hallucinations, whether in memory or stored, unless the player is on the level. """
+
+        journaled = (self.journal is not None) or bool(self.saved and ('journal' in self.saved))
+        return journaled and (self is not self.envs.player_obj.ent.env)
+
+    def summary(self):
+        """ Returns the attributes that a placeholder keeps while the rest of the level is not in memory. """
+
+        keys = ['envs', 'area', 'name', 'lvl_num', 'size', 'soundtrack', 'seed',
+                'env_date', 'env_time', 'player_coordinates', 'center', 'last_used']
+        return {key: self.__dict__[key] for key in keys if key in self.__dict__}
+
+    @staticmethod
+    def placeholder(**state):
+        """ Returns an Environment object with only the given attributes, which is filled in by Area.restore_level. """
+
+        env = Environment.__new__(Environment)
+        env.__dict__.update(journal=None, saved=None, last_used=0)
+        env.__dict__.update(state)
+        return env
+
+    def __getstate__(self):
+        if self.saved_by_seed():
+            state = self.summary()
+            state['map']     = self.map
+            state['journal'] = None
+            state['saved']   = self.export_journal() if self.journal is not None else self.saved['journal']
+            return state
+        
+        # Include a level that was stored in a temporary file
+        if self.saved and ('path' in self.saved):
+            state = self.__dict__.copy()
+            with open(self.saved['path'], 'rb') as file:
+                state['saved'] = {'name': self.name, 'data': file.read(), 'objects': self.saved['objects']}
+            return state
+
+        return self.__dict__
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
     def create_h_tunnel(self, x1, x2, y, img_set=None):
         """ Creates horizontal tunnel. min() and max() are used if x1 is greater than x2. """
         
@@ -1147,6 +1484,7 @@ class Environment:
             if tile.ent:
                 self.ents.remove(tile.ent)
                 tile.ent = None
+            self.chunks.mark(tile)
 
     def create_v_tunnel(self, y1, y2, x, img_set=None):
         """ Creates vertical tunnel. min() and max() are used if y1 is greater than y2. """
@@ -1166,82 +1504,29 @@ class Environment:
             if tile.ent:
                 self.ents.remove(tile.ent)
                 tile.ent = None
+            self.chunks.mark(tile)
 
     def build_room(self, obj):
-        """ Checks if a placed tile has other placed tiles around it.
-            If so, it creates a room if these placed tiles form a closed shape.
+        """ Creates a room if a wall placed by the player closes a new shape with other placed walls.
             Called by place_object when a wall is placed by the player.
         """
         
-        from mechanics import get_vicinity
+        pyg = session.pyg
 
-        # List of placed tile and its immediate neighbors
-        first_neighbors = [obj]
-        for first_neighbor in get_vicinity(obj).values():
-            if first_neighbor.placed:
-                first_neighbors.append(first_neighbor)
+        # Find the placed walls connected to the new wall if it closes a shape
+        walls = self.placed_walls.add((obj.X // pyg.tile_width, obj.Y // pyg.tile_height))
         
-        # Chains of adjacent-placed tiles
-        connected = dict()                # final dictionary of connected tiles
-        queue     = list(first_neighbors) # all tiles to check
-        visited   = set()                 # avoids revisiting tiles
-        while queue:
-
-            # Create dictionary entry for placed tile
-            tile = queue.pop(0)
-            if tile in visited: continue
-            visited.add(tile)
-            connected[tile] = []
-            
-            # Look at all neighbors of placed tile
-            for neighbor in get_vicinity(tile).values():
-
-                # Add neighboring placed tiles to chain
-                if neighbor.placed:
-                    connected[tile].append(neighbor)
-
-                    # Queue to check for neighboring placed tiles
-                    if (neighbor not in visited) and (neighbor not in queue):
-                        queue.append(neighbor)
-        
-        # Check if the chain forms a closed boundary
-        def has_closed_boundary(graph):
-            """ This is a ChatGPT algorithm; don't ask. """
-
-            visited = set()
-
-            def dfs(node, parent, path):
-                visited.add(node)
-                path.append(node)
-                for neighbor in graph[node]:
-                    if neighbor not in visited:
-                        if dfs(neighbor, node, path):
-                            return True
-                    elif neighbor != parent:
-                        cycle_start_index = path.index(neighbor)
-                        cycle_length = len(path) - cycle_start_index
-                        if cycle_length >= 4:
-                            return True
-                path.pop()
-                return False
-
-            for node in graph:
-                if node not in visited:
-                    if dfs(node, None, []):
-                        return True
-            return False
-        
-        if has_closed_boundary(connected):
+        if walls:
             
             # Get bounds of the area to check
-            boundary_coords = set((tile.X//32, tile.Y//32) for tile in connected.keys())
-            xs = [tile.X//32 for tile in connected.keys()]
-            ys = [tile.Y//32 for tile in connected.keys()]
+            boundary_coords = set(walls)
+            xs = [x for (x, y) in walls]
+            ys = [y for (x, y) in walls]
             min_x, max_x = min(xs), max(xs)
             min_y, max_y = min(ys), max(ys)
         
             boundary = {
-                'boundary tiles':       list(connected.keys()),
+                'boundary tiles':       [self.map[x][y] for (x, y) in walls],
                 'boundary coordinates': boundary_coords,
                 'min x':                min_x,
                 'max x':                max_x,
@@ -1264,65 +1549,104 @@ class Environment:
                 boundary = boundary)
 
     def combine_rooms(self):
-        """ Removes wall_img_IDs of intersecting rooms, then recombines them into a single room. """
+        """ Removes wall_img_IDs of intersecting rooms, then recombines them into a single room.
+            Rooms are sorted into square buckets of the map, so only rooms that share a bucket are compared. """
     
-        # Sort through each room
-        cache = []
-        rooms_copy = list(self.rooms)
-        for i in range(len(rooms_copy)):
-            for j in range(len(rooms_copy)):
-                if rooms_copy[i] != rooms_copy[j]:
+        rooms = list(self.rooms)
+
+        # Hold walls and corners by position while merging
+        walls      = [{(tile.X // 32, tile.Y // 32): tile for tile in room.walls_list}      for room in rooms]
+        corners    = [{(tile.X // 32, tile.Y // 32): tile for tile in room.corners_list}    for room in rooms]
+        noncorners = [{(tile.X // 32, tile.Y // 32): tile for tile in room.noncorners_list} for room in rooms]
+
+        # Sort rooms into buckets
+        size    = 16
+        buckets = {}
+        for (i, room) in enumerate(rooms):
+            for x in range(room.x1 // size, room.x2 // size + 1):
+                for y in range(room.y1 // size, room.y2 // size + 1):
+                    buckets.setdefault((x, y), []).append(i)
+
+        def intersect(a, b):
+            """ Returns walls of room a that lie within room b, excluding walls shared with room b. """
+
+            room = rooms[b]
+            return [(loc, tile) for (loc, tile) in walls[a].items()
+                    if (room.x1 <= loc[0] <= room.x2) and (room.y1 <= loc[1] <= room.y2) and (loc not in walls[b])]
+
+        # Sort through each pair of rooms in a shared bucket
+        cache = set()
+        for (i, room_1) in enumerate(rooms):
+            neighbors = set()
+            for x in range(room_1.x1 // size, room_1.x2 // size + 1):
+                for y in range(room_1.y1 // size, room_1.y2 // size + 1):
+                    neighbors.update(buckets[(x, y)])
+            
+            for j in sorted(neighbors):
+                room_2 = rooms[j]
+                if (j <= i) or (room_1 == room_2): continue
+                
+                # Prevent double counting of rooms with the same endpoints
+                if frozenset([room_1, room_2]) in cache: continue
+                cache.add(frozenset([room_1, room_2]))
+
+                # Find region of overlap
+                if not (room_1.x1 <= room_2.x2 and room_1.x2 >= room_2.x1 and room_1.y1 <= room_2.y2 and room_1.y2 >= room_2.y1): continue
+                intersections_1 = intersect(i, j)
+                intersections_2 = intersect(j, i)
+                
+                # True if intersections are found
+                if intersections_1 and intersections_2:
+                    room_1.delete = True
                     
-                    # Prevent double counting
-                    if {rooms_copy[i], rooms_copy[j]} not in cache:
-                        cache.append({rooms_copy[i], rooms_copy[j]})
-                        
-                        # Find region of overlap
-                        intersections_1 = self.rooms[i].intersect(self.rooms[j])
-                        intersections_2 = self.rooms[j].intersect(self.rooms[i])
-                        
-                        # True if intersections are found
-                        if intersections_1 and intersections_2:
-                            self.rooms[i].delete = True
+                    ## Convert internal wall into floor and add to the other room
+                    for (loc, tile) in intersections_1:
+
+                        # Keep shared wall_img_IDs
+                        if loc not in walls[j]:
+                            tile.blocked = False
+                            tile.item    = None
+                            tile.img_IDs = tile.room.floor_img_IDs  
                             
-                            ## Convert internal wall into floor and remove from lists
-                            for tile in intersections_1:
-
-                                # Keep shared wall_img_IDs
-                                if tile not in rooms_copy[j].walls_list:
-                                    tile.blocked   = False
-                                    tile.item      = None
-                                    tile.img_IDs = tile.room.floor_img_IDs  
-                                    
-                                    if tile in rooms_copy[i].walls_list:      self.rooms[j].walls_list.append(tile)
-                                    if tile in rooms_copy[i].corners_list:    self.rooms[j].corners_list.append(tile)
-                                    if tile in rooms_copy[i].noncorners_list: self.rooms[j].noncorners_list.append(tile)
-
-                                if tile.roof_img_IDs and tile.room.roof_img_IDs:
-                                    tile.roof_img_IDs = tile.room.roof_img_IDs
-                                    tile.img_IDs = tile.room.roof_img_IDs                            
-                            
-                            for tile in intersections_2:
+                            if loc in walls[i]:      walls[j][loc]      = tile
+                            if loc in corners[i]:    corners[j][loc]    = tile
+                            if loc in noncorners[i]: noncorners[j][loc] = tile
+
+                        if tile.roof_img_IDs and tile.room.roof_img_IDs:
+                            tile.roof_img_IDs = tile.room.roof_img_IDs
+                            tile.img_IDs      = tile.room.roof_img_IDs                            
+                        self.chunks.mark(tile)
+                    
+                    for (loc, tile) in intersections_2:
 
-                                # Keep shared wall_img_IDs
-                                if tile not in rooms_copy[i].walls_list:
-                                    tile.blocked   = False
-                                    tile.item      = None
-                                    tile.img_IDs = tile.room.floor_img_IDs  
-                                    
-                                    # Remove from lists
-                                    if tile in self.rooms[j].walls_list:      self.rooms[j].walls_list.remove(tile)
-                                    if tile in self.rooms[j].corners_list:    self.rooms[j].corners_list.remove(tile)
-                                    if tile in self.rooms[j].noncorners_list: self.rooms[j].noncorners_list.remove(tile)
-
-                                if tile.roof_img_IDs and tile.room.roof_img_IDs:
-                                    tile.roof_img_IDs = tile.room.roof_img_IDs
-                                    tile.img_IDs = tile.room.roof_img_IDs  
+                        # Keep shared wall_img_IDs
+                        if loc not in walls[i]:
+                            tile.blocked = False
+                            tile.item    = None
+                            tile.img_IDs = tile.room.floor_img_IDs  
                             
-                            for tile in self.rooms[i].tiles_list:
-                                tile.room = self.rooms[j]
-                                self.rooms[j].tiles_list.append(tile)
-                                self.rooms[i].tiles_list.remove(tile)
+                            # Remove from the other room
+                            walls[j].pop(loc, None)
+                            corners[j].pop(loc, None)
+                            noncorners[j].pop(loc, None)
+
+                        if tile.roof_img_IDs and tile.room.roof_img_IDs:
+                            tile.roof_img_IDs = tile.room.roof_img_IDs
+                            tile.img_IDs      = tile.room.roof_img_IDs  
+                        self.chunks.mark(tile)
+                    
+                    ## Move floor to the other room
+                    for tile in room_1.tiles_list:
+                        tile.room = room_2
+                        self.chunks.mark(tile)
+                    room_2.tiles_list += room_1.tiles_list
+                    room_1.tiles_list  = []
+        
+        # Return walls and corners to lists
+        for (i, room) in enumerate(rooms):
+            room.walls_list      = list(walls[i].values())
+            room.corners_list    = list(corners[i].values())
+            room.noncorners_list = list(noncorners[i].values())
         
         for room in self.rooms[:]:
             if room.delete:
@@ -1420,6 +1744,7 @@ class Room:
         if self.plan:       self.from_plan()
         elif self.boundary: self.from_boundary()
         else:               self.from_size()
+        self.env.chunks.mark_all(self.tiles_list)
 
     def from_size(self):
         
@@ -1551,7 +1876,7 @@ class Room:
         min_y, max_y    = self.boundary['min y'], self.boundary['max y']
         
         visited = set()
-        queue   = []
+        queue   = deque()
         
         # Add all boundary-adjacent tiles from the outer edge of the bounding box
         for x in range(min_x, max_x + 1):
@@ -1567,7 +1892,7 @@ class Room:
         
         # Flood-fill all reachable, unplaced tiles from outside
         while queue:
-            x, y = queue.pop(0)  # pop from front of list = BFS
+            x, y = queue.popleft()  # pop from front of queue = BFS
             if (x, y) in visited:
                 continue
             if not (0 <= x < len(self.env.map) and 0 <= y < len(self.env.map[0])):
@@ -1621,6 +1946,7 @@ class Room:
         
         # Check if the rooms intersect
         intersecting_wall = []
+        other_walls       = set(other.walls_list)
         if (self.x1 <= other.x2 and self.x2 >= other.x1 and
                 self.y1 <= other.y2 and self.y2 >= other.y1):
             
@@ -1630,7 +1956,7 @@ class Room:
                     if (wall_1.Y >= other.y1*32) and (wall_1.Y <= other.y2*32):
                         
                         # Filter out corners
-                        if wall_1 not in other.walls_list:
+                        if wall_1 not in other_walls:
                             intersecting_wall.append(wall_1)
 
         return intersecting_wall
@@ -1645,9 +1971,10 @@ class Room:
 class TextRoom:
     """ Generates a text-based room layout with walls, floors, doors, and furniture. """
 
-    def __init__(self, width=5, height=5, doors=True):
-        self.width  = width if width else random.randint(5, 7)
-        self.height = height if height else random.randint(5, 7)
+    def __init__(self, width=5, height=5, doors=True, rng=random):
+        self.rng    = rng
+        self.width  = width if width else rng.randint(5, 7)
+        self.height = height if height else rng.randint(5, 7)
         self.doors  = doors
         self.plan   = [['' for x in range(self.width)] for y in range(self.height)]
 
@@ -1668,14 +1995,14 @@ class TextRoom:
         for i in range(self.height):
 
             # Randomly decide if row matches last row or new offsets
-            if not random.choice([0, 1]):
+            if not self.rng.choice([0, 1]):
                 for j in range(self.width):
                     if last_left <= j <= last_right: self.plan[i][j] = '.'
                     else:                            self.plan[i][j] = ' '
 
             # Generate new left and right bounds
-            left  = random.randint(1, self.width//2-1)
-            right = random.randint(self.width//2+1, self.width-1)
+            left  = self.rng.randint(1, self.width//2-1)
+            right = self.rng.randint(self.width//2+1, self.width-1)
 
             # If bounds are too close to previous, use them to fill row
             if (abs(left - last_left) < 2) or (abs(right - last_right) < 2):
@@ -1684,9 +2011,9 @@ class TextRoom:
                     else:                  self.plan[i][j] = ' '
 
             # Randomly choose previous bounds
-            elif random.choice([0, 1]):
-                left  = random.choice([left,  last_left])
-                right = random.choice([right, last_right])
+            elif self.rng.choice([0, 1]):
+                left  = self.rng.choice([left,  last_left])
+                right = self.rng.choice([right, last_right])
                 for j in range(self.width):
                     if left <= j <= right: self.plan[i][j] = '.'
                     else:                  self.plan[i][j] = ' '
@@ -1743,9 +2070,9 @@ class TextRoom:
                         if ('-' in vertical) and ('-' in horizontal): placed = False
                         elif (' ' not in vertical) and (' ' not in horizontal): placed = False
                         else:
-                            if not random.randint(0, 10):
+                            if not self.rng.randint(0, 10):
                                 self.plan[i][j] = '|'
-                                if random.randint(0, 1): placed = True
+                                if self.rng.randint(0, 1): placed = True
                     else: placed = False
 
         # Second pass if no doors placed
@@ -1758,7 +2085,7 @@ class TextRoom:
                         if ('-' in vertical) and ('-' in horizontal):           placed = False
                         elif (' ' not in vertical) and (' ' not in horizontal): placed = False
                         else:
-                            if not random.randint(0, 10):
+                            if not self.rng.randint(0, 10):
                                 self.plan[i][j] = '|'
                                 placed = True
                     else: placed = False
@@ -1771,7 +2098,7 @@ class TextRoom:
 
         for i in range(len(self.plan)):
             for j in range(len(self.plan[0])):
-                if random.randint(0, 1):
+                if self.rng.randint(0, 1):
 
                     # Check for indoor floor tiles for furniture
                     if (self.plan[i][j] == '.') and ('|' not in self.neighbors(i, j)):
@@ -1781,7 +2108,7 @@ class TextRoom:
                             if (self.plan[i][j+2] == '.') and ('|' not in self.neighbors(i, j+2)):
 
                                 # Place table and chairs
-                                if not dining and not random.randint(0, 5):
+                                if not dining and not self.rng.randint(0, 5):
                                     self.plan[i][j]   = 'b'
                                     self.plan[i][j+1] = 'T'
                                     self.plan[i][j+2] = 'd'
@@ -1789,9 +2116,9 @@ class TextRoom:
                             else:
 
                                 # Place bed if 2 open spaces
-                                if not bed and not random.randint(0, 3):
+                                if not bed and not self.rng.randint(0, 3):
                                     self.plan[i][j] = '='
-                                    if not random.randint(0, 2): bed = True
+                                    if not self.rng.randint(0, 2): bed = True
                                 else:
 
                                     # Place shelf near wall
@@ -1804,7 +2131,7 @@ class TextRoom:
                     elif self.plan[i][j] == ' ':
                         try:
                             if '|' not in self.neighbors(i, j):
-                                if not lights and not random.randint(0, 3):
+                                if not lights and not self.rng.randint(0, 3):
                                     self.plan[i][j] = 'L'
                                     lights = True
                         except:
@@ -1823,12 +2150,346 @@ class TextRoom:
         self.place_furniture()
         return self.export()
 
+class TileGrid:
+    """ Holds the tiles of an environment in parallel arrays, one entry per tile, ordered by column.
+        Indexing as grid[x][y] returns a Tile that reads and writes these arrays, so it can be used like a list of lists.
+
+        Strings and image names are interned, flags share a byte, and rooms, entities, items, and effects are only
+        stored for the tiles that have them. """
+
+    # Flag bits
+    flag_bits = {'blocked': 1, 'hidden': 2, 'unbreakable': 4, 'placed': 8}
+
+    # Fields stored in arrays of interned values and of small integers
+    interned_fields = ('tile_id', 'name', 'biome', 'img_IDs', 'wall_img_IDs', 'floor_img_IDs', 'roof_img_IDs')
+    number_fields   = ('img_ID_timer', 'rand_X', 'rand_Y')
+    object_fields   = ('room', 'ent', 'item', 'active_effects')
+
+    def __init__(self, env, width, height, tile):
+        """ Fills the grid with copies of a tile. Each copy after the first gets its own animation timer and offsets.
+
+            Parameters
+            ----------
+            env     : Environment object; owner
+            width   : int; number of columns
+            height  : int; number of tiles in each column
+            tile    : Tile object; values for every tile
+
+            values  : list; interned values, referenced by index from the arrays
+            ids     : dict; key of each interned value -> index in values
+            arrays  : dict; field name -> array of indices into values, or of small integers
+            flags   : array of bytes; blocked, hidden, unbreakable, and placed bits
+            objects : dict; field name -> dict of tile index -> value, for fields that are usually None
+            extras  : dict; tile index -> dict of any other attributes set on the tile
+            changed : dict or None; tile index -> set of names of fields changed since the environment's journal started
+        """
+
+        pyg = session.pyg
+
+        self.env         = env
+        self.width       = width
+        self.height      = height
+        self.tile_width  = pyg.tile_width
+        self.tile_height = pyg.tile_height
+        
+        # Shared values
+        size        = width * height
+        self.values = [None]
+        self.ids    = {(type(None), None): 0}
+        self.arrays = {}
+        for field in self.interned_fields:
+            self.arrays[field] = array('H', [self.intern(getattr(tile, field))]) * size
+
+        # Flags
+        flags = 0
+        for (field, bit) in self.flag_bits.items():
+            if getattr(tile, field): flags |= bit
+        self.flags = array('B', [flags]) * size
+
+        # Seed individual adjustments, as in Tile.__init__; the first tile keeps the given tile's values
+        rng    = env.rng
+        timers = array('b', [tile.img_ID_timer])
+        rand_X = array('b', [tile.rand_X])
+        rand_Y = array('b', [tile.rand_Y])
+        for _ in range(size - 1):
+            timers.append(rng.randint(0, 3) * 2)
+            rand_X.append(rng.randint(-pyg.tile_width, pyg.tile_width))
+            rand_Y.append(rng.randint(-pyg.tile_height, pyg.tile_height))
+        self.arrays['img_ID_timer'] = timers
+        self.arrays['rand_X']       = rand_X
+        self.arrays['rand_Y']       = rand_Y
+
+        # Sparse values
+        self.objects = {field: {} for field in self.object_fields}
+        self.extras  = {}
+        self.changed = None
+        
+        self.columns = [TileColumn(self, x) for x in range(width)]
+
+    def intern(self, value):
+        """ Returns the index of a value in the shared table, adding it if needed. Lists are stored as copies. """
+
+        if type(value) == list: key = (list, tuple(value))
+        else:                   key = (type(value), value)
+        
+        index = self.ids.get(key)
+        if index is None:
+            index = len(self.values)
+            self.values.append(list(value) if type(value) == list else value)
+            self.ids[key] = index
+        
+        return index
+
+    def view(self, index):
+        """ Returns a Tile that reads and writes the given entry. """
+
+        tile = object.__new__(Tile)
+        object.__setattr__(tile, 'grid',  self)
+        object.__setattr__(tile, 'index', index)
+        object.__setattr__(tile, 'data',  None)
+        object.__setattr__(tile, 'proto', {})
+        return tile
+
+    def store(self, index, tile):
+        """ Copies a tile into the given entry. A tile made by create_tile becomes a view of the entry,
+            so that later changes to it are seen in the grid. """
+
+        # Clear sparse values of the previous tile
+        items = tile.items()
+        for objects in self.objects.values():
+            objects.pop(index, None)
+        self.extras.pop(index, None)
+
+        # Copy values; position and owner come from the grid
+        view = self.view(index)
+        for (key, value) in items:
+            if key not in ['X', 'Y', 'env']:
+                setattr(view, key, value)
+        
+        # Attach the tile to the grid
+        if tile.grid is None:
+            object.__setattr__(tile, 'grid',  self)
+            object.__setattr__(tile, 'index', index)
+            object.__setattr__(tile, 'data',  None)
+            object.__setattr__(tile, 'proto', {})
+
+    def paint(self, field, labels, values):
+        """ Sets a shared field of every tile at once.
+
+            Parameters
+            ----------
+            field  : str; one of TileGrid.interned_fields
+            labels : list of int; index into values for each tile, in grid order
+            values : list; value for each label
+        """
+
+        ids                = [self.intern(value) for value in values]
+        self.arrays[field] = array('H', [ids[label] for label in labels])
+
+    def record(self, index, field):
+        """ Notes a changed field of a tile if the environment keeps a journal. Flags are noted together as 'flags'. """
+
+        if self.changed is not None:
+            self.changed.setdefault(index, set()).add(field)
+
+    def occupied(self, x_range, y_range):
+        """ Yields the visible tiles within the ranges that hold an item, entity, or effect, row by row.
+            Skips the other tiles without creating views, which keeps rendering fast on large maps.
+
+            Parameters
+            ----------
+            x_range : range of int; columns, which may extend past the grid
+            y_range : range of int; rows, which may extend past the grid
+        """
+
+        items   = self.objects['item']
+        ents    = self.objects['ent']
+        effects = self.objects['active_effects']
+        hidden  = self.flag_bits['hidden']
+        
+        x_range = range(max(x_range.start, 0), min(x_range.stop, self.width))
+        for y in range(max(y_range.start, 0), min(y_range.stop, self.height)):
+            for x in x_range:
+                index = x * self.height + y
+                if ((index in items) or (index in ents) or (index in effects)) and not (self.flags[index] & hidden):
+                    yield self.view(index)
+
+    def __len__(self):
+        return self.width
+
+    def __getitem__(self, x):
+        return self.columns[x]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __getstate__(self):
+        
+        # Keep only the size if the environment is saved as its seed and changes
+        if self.env.saved_by_seed():
+            return {key: self.__dict__[key] for key in ['env', 'width', 'height', 'tile_width', 'tile_height']}
+        
+        state = self.__dict__.copy()
+
+        state.pop('columns', None)
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        
+        self.columns = [TileColumn(self, x) for x in range(self.width)]
+
+    def release(self):
+        """ Drops everything but the size, for a level that is released from memory.
+            Views of the grid are kept by entities and items, and work again once the level is restored into it. """
+
+        state = {key: self.__dict__[key] for key in ['env', 'width', 'height', 'tile_width', 'tile_height']}
+        self.__dict__.clear()
+        self.__setstate__(state)
+
+    # Tile attributes
+    @staticmethod
+    def interned_field(field):
+        """ Returns a Tile property for a value kept in the shared table. """
+
+        def get(tile):
+            grid = tile.grid
+            if grid is None: return tile.local(field)
+            return grid.values[grid.arrays[field][tile.index]]
+        
+        def set(tile, value):
+            grid = tile.grid
+            if grid is None: tile.data[field] = value
+            else:            grid.arrays[field][tile.index] = grid.intern(value)
+            if grid is not None: grid.record(tile.index, field)
+        
+        return property(get, set)
+
+    @staticmethod
+    def number_field(field):
+        """ Returns a Tile property for a small integer. """
+
+        def get(tile):
+            grid = tile.grid
+            if grid is None: return tile.local(field)
+            return grid.arrays[field][tile.index]
+        
+        def set(tile, value):
+            grid = tile.grid
+            if grid is None: tile.data[field] = value
+            else:            grid.arrays[field][tile.index] = value
+            if grid is not None: grid.record(tile.index, field)
+        
+        return property(get, set)
+
+    @staticmethod
+    def flag_field(field, bit):
+        """ Returns a Tile property for one bit of the flags. """
+
+        def get(tile):
+            grid = tile.grid
+            if grid is None: return tile.local(field)
+            return bool(grid.flags[tile.index] & bit)
+        
+        def set(tile, value):
+            grid = tile.grid
+            if grid is None: tile.data[field] = value
+            elif value:      grid.flags[tile.index] |= bit
+            else:            grid.flags[tile.index] &= ~bit
+            if grid is not None: grid.record(tile.index, 'flags')
+        
+        return property(get, set)
+
+    @staticmethod
+    def object_field(field, default=None):
+        """ Returns a Tile property for a value that most tiles do not have.
+
+            Parameters
+            ----------
+            field   : str
+            default : type, optional; returns a new empty value for tiles without one, without storing it
+                      Reading a tile should not add it to the objects, so changes to a new value must be assigned back
+        """
+
+        def get(tile):
+            grid = tile.grid
+            if grid is None: return tile.local(field)
+            value = grid.objects[field].get(tile.index)
+            if (value is None) and default: return default()
+            return value
+        
+        def set(tile, value):
+            grid = tile.grid
+            if grid is None:                                       tile.data[field] = value
+            elif (value is None) or (type(value) == dict and not value): grid.objects[field].pop(tile.index, None)
+            else:                                                  grid.objects[field][tile.index] = value
+        
+        return property(get, set)
+
+    @staticmethod
+    def position_field(field):
+        """ Returns a Tile property for a value set by the tile's place in the grid. """
+
+        def get(tile):
+            grid = tile.grid
+            if grid is None:  return tile.local(field)
+            if field == 'X':  return (tile.index // grid.height) * grid.tile_width
+            if field == 'Y':  return (tile.index % grid.height) * grid.tile_height
+            return grid.env
+        
+        def set(tile, value):
+            if tile.grid is None:
+                tile.data[field] = value
+            elif get(tile) != value:
+                raise AttributeError(f"{field} is set by the tile's place in its environment")
+        
+        return property(get, set)
+
+class TileColumn:
+    """ One column of a TileGrid, indexed by y. """
+
+    __slots__ = ('grid', 'x', 'offset')
+
+    def __init__(self, grid, x):
+        self.grid   = grid
+        self.x      = x
+        self.offset = x * grid.height
+
+    def __len__(self):
+        return self.grid.height
+
+    def __getitem__(self, y):
+        height = self.grid.height
+        if y < 0: y += height
+        if not (0 <= y < height): raise IndexError('tile index out of range')
+        return self.grid.view(self.offset + y)
+
+    def __setitem__(self, y, tile):
+        height = self.grid.height
+        if y < 0: y += height
+        if not (0 <= y < height): raise IndexError('tile index out of range')
+        self.grid.store(self.offset + y, tile)
+
+    def __iter__(self):
+        for y in range(self.grid.height):
+            yield self.grid.view(self.offset + y)
+
 class Tile:
-    """ Defines a tile of the map and its parameters. Sight is blocked if a tile is blocked. """
+    """ Defines a tile of the map and its parameters. Sight is blocked if a tile is blocked.
+        Tiles in an environment are views of its TileGrid. Tiles from create_tile keep their own values until placed,
+        and read any value they have not changed from a prototype shared by all tiles of the same type. """
     
-    def __init__(self, tile_id, **kwargs):
+    __slots__ = ('grid', 'index', 'data', 'proto')
+
+    # Shared values for each tile type; see Tile.prototype
+    prototypes = {}
+
+    def __init__(self, tile_id, prototype=None, **kwargs):
         """ Parameters
             ----------
+            prototype     : mapping, optional; values shared with other tiles of this type, as made by Tile.prototype
+
             env           : environment object; owner of this tile
 
             room          : room instance
@@ -1854,6 +2515,11 @@ class Tile:
         
         pyg = session.pyg
 
+        object.__setattr__(self, 'grid',  None)
+        object.__setattr__(self, 'index', None)
+        object.__setattr__(self, 'data',  {})
+        object.__setattr__(self, 'proto', prototype or {})
+
         # Import parameters
         for key, value in kwargs.items():
             setattr(self, key, value)
@@ -1865,6 +2531,31 @@ class Tile:
         self.rand_X       = random.randint(-pyg.tile_width, pyg.tile_width)
         self.rand_Y       = random.randint(-pyg.tile_height, pyg.tile_height)
 
+    # Attributes
+    tile_id        = TileGrid.interned_field('tile_id')
+    name           = TileGrid.interned_field('name')
+    biome          = TileGrid.interned_field('biome')
+    img_IDs        = TileGrid.interned_field('img_IDs')
+    wall_img_IDs   = TileGrid.interned_field('wall_img_IDs')
+    floor_img_IDs  = TileGrid.interned_field('floor_img_IDs')
+    roof_img_IDs   = TileGrid.interned_field('roof_img_IDs')
+    img_ID_timer   = TileGrid.number_field('img_ID_timer')
+    rand_X         = TileGrid.number_field('rand_X')
+    rand_Y         = TileGrid.number_field('rand_Y')
+    blocked        = TileGrid.flag_field('blocked',     1)
+    hidden         = TileGrid.flag_field('hidden',      2)
+    unbreakable    = TileGrid.flag_field('unbreakable', 4)
+    placed         = TileGrid.flag_field('placed',      8)
+    room           = TileGrid.object_field('room')
+    ent            = TileGrid.object_field('ent')
+    item           = TileGrid.object_field('item')
+    active_effects = TileGrid.object_field('active_effects', dict)
+    X              = TileGrid.position_field('X')
+    Y              = TileGrid.position_field('Y')
+    env            = TileGrid.position_field('env')
+
+    fields = frozenset(TileGrid.interned_fields + TileGrid.number_fields + TileGrid.object_fields + tuple(TileGrid.flag_bits) + ('X', 'Y', 'env'))
+
     def draw(self):
         
         # Set location
@@ -1872,40 +2563,331 @@ class Tile:
         Y = self.Y - self.env.camera.Y
         
         # Load tile
-        if self.img_ID_timer:
-            if (time.time() // self.img_ID_timer) % self.img_ID_timer == 0: image = session.img.other_alt[self.img_IDs[0]][self.img_IDs[1]]
-            else:                                             image = session.img.other[self.img_IDs[0]][self.img_IDs[1]]
-        else:                                                 image = session.img.other[self.img_IDs[0]][self.img_IDs[1]]
-
-        ## (Optional) Add shift effect
-        if self.img_IDs[0] != 'roofs':
-            if self.img_IDs[1] != 'wood':                   image = session.img.shift(image, [abs(self.rand_X), abs(self.rand_Y)])
+        image = self.select_image()
                 
         ## (Optional) Apply static effect
-        if self.biome in session.img.biomes['sea']:           image = session.img.static(image, offset=20, rate=100)
+        if self.biome in session.img.biomes['sea']:
+            image = session.img.static(image, offset=20, rate=100, phase=self.rand_X * 37 + self.rand_Y)
         
         # Return result for rendering
         return image, (X, Y)
 
+    def select_image(self):
+        """ Returns the tile's surface for the current animation frame, without position or static effects. """
+
+        # Select animation frame
+        alt = session.clock.find_alt(self.img_ID_timer)
+
+        # Load tile
+        ## (Optional) Add shift effect from cache
+        if (self.img_IDs[0] != 'roofs') and (self.img_IDs[1] != 'wood'):
+            return session.img.shifted(self.img_IDs, [abs(self.rand_X), abs(self.rand_Y)], alt)
+        elif alt: return session.img.other_alt[self.img_IDs[0]][self.img_IDs[1]]
+        else:     return session.img.other[self.img_IDs[0]][self.img_IDs[1]]
+
+    @staticmethod
+    def prototype(tile_id):
+        """ Returns the read-only values shared by every tile of a type, loading them on first use. """
+
+        prototype = Tile.prototypes.get(tile_id)
+        if prototype is None:
+            prototype = Tile.prototypes[tile_id] = MappingProxyType(copy.deepcopy(tile_dicts[tile_id]))
+        return prototype
+
+    def local(self, key):
+        """ Returns a value of a tile that is not in a grid. Lists and dictionaries from the prototype are copied
+            into the tile before they are returned, so that changing them in place does not affect other tiles. """
+
+        data = self.data
+        if key in data: return data[key]
+
+        value = self.proto.get(key)
+        if type(value) in [list, dict]:
+            value = data[key] = copy.copy(value)
+        return value
+
+    def items(self):
+        """ Returns (name, value) for every attribute of the tile. """
+
+        if self.grid is None: return [(key, self.local(key)) for key in {**self.proto, **self.data}]
+
+        items = [(field, getattr(self, field)) for field in Tile.fields]
+        items += self.grid.extras.get(self.index, {}).items()
+        return items
+
+    def __getattr__(self, key):
+        """ Finds attributes that are not part of the standard set. """
+
+        grid = object.__getattribute__(self, 'grid')
+        if grid is None: extras = {**object.__getattribute__(self, 'proto'), **object.__getattribute__(self, 'data')}
+        else:            extras = grid.extras.get(object.__getattribute__(self, 'index'), {})
+        
+        if key in extras:
+            if grid is None: return self.local(key)
+            return extras[key]
+        raise AttributeError(f"'Tile' object has no attribute '{key}'")
+
+    def __setattr__(self, key, value):
+        if key in Tile.fields:  object.__setattr__(self, key, value)
+        elif self.grid is None: self.data[key] = value
+        else:                   self.grid.extras.setdefault(self.index, {})[key] = value
+
     def __eq__(self, other):
         return (self.X == other.X) and (self.Y == other.Y)
 
     def __hash__(self):
         return hash((self.X, self.Y))
 
-class Weather:
+    def __getstate__(self):
+        return (self.grid, self.index, self.data)
 
-    def __init__(self, env, light_set=None, clouds=True):
+    def __setstate__(self, state):
+        for (key, value) in zip(('grid', 'index', 'data'), state):
+            object.__setattr__(self, key, value)
+
+        # Reattach the shared values, which are not saved
+        if (self.grid is None) and (self.data.get('tile_id') in tile_dicts):
+            object.__setattr__(self, 'proto', Tile.prototype(self.data['tile_id']))
+        else:
+            object.__setattr__(self, 'proto', {})
+
+class Chunks:
+    """ Pre-composites the static layers of an environment into square blocks of tiles, drawn at the camera's zoom level.
+        Each chunk is recomposed only when it is marked, or when the animation frame or zoom level changes. """
+
+    def __init__(self, env, size=16, cache_size=36):
+        """ Parameters
+            ----------
+            env        : Environment object; owner
+            size       : int; width and height of each chunk in tile coordinates
+            cache_size : int; maximum number of composed chunks to keep at a zoom of 1, and fewer when zoomed in
+
+            cache      : OrderedDict; (i, j) -> [(zoom, frame), floor surface, roof surface or None, tiles drawn every frame]
+        """
+
+        self.env        = env
+        self.size       = size
+        self.cache_size = cache_size
+        self.cache      = OrderedDict()
+
+    def mark(self, tile):
+        """ Discards the chunk containing the tile so that it is recomposed when next drawn. """
         
         pyg = session.pyg
 
+        key = (tile.X // (pyg.tile_width * self.size), tile.Y // (pyg.tile_height * self.size))
+        self.cache.pop(key, None)
+
+    def mark_all(self, tiles):
+        """ Discards the chunks containing any of the given tiles. """
+
+        for tile in tiles:
+            self.mark(tile)
+
+    def draw(self, camera):
+        """ Constructs (but does not render) floor and roof surfaces for visible chunks.
+
+            Returns
+            -------
+            floors  : list; (surface, (X, Y)) for floors and walls
+            roofs   : list; (surface, (X, Y)) for roofs
+            dynamic : list of Tile objects; tiles that must be drawn every frame
+        """
+
+        pyg = session.pyg
+
+        # Select animation frame for all timers in use
+        clock = session.clock
+        frame = (camera.zoom, tuple(clock.find_alt(timer) for timer in clock.timers))
+
+        # Find visible chunks
+        width    = pyg.tile_width * self.size
+        height   = pyg.tile_height * self.size
+        i_range  = range(max(0, int(camera.X // width)),  min(int(camera.right // width) + 1,  (len(self.env.map) - 1) // self.size + 1))
+        j_range  = range(max(0, int(camera.Y // height)), min(int(camera.bottom // height) + 1, (len(self.env.map[0]) - 1) // self.size + 1))
+        
+        floors, roofs, dynamic = [], [], []
+        for i in i_range:
+            for j in j_range:
+                
+                # Compose or reuse chunk
+                chunk = self.cache.get((i, j))
+                if (not chunk) or (chunk[0] != frame):
+                    chunk = self.compose(i, j, frame)
+                else:
+                    self.cache.move_to_end((i, j))
+                
+                # Set position
+                pos = (i * width - camera.X, j * height - camera.Y)
+                floors.append((chunk[1], pos))
+                if chunk[2]: roofs.append((chunk[2], pos))
+                dynamic += chunk[3]
+
+        return floors, roofs, dynamic
+
+    def compose(self, i, j, frame):
+        """ Blits every static tile of a chunk onto its surfaces at the zoom level of the frame and caches the result.
+            Tiles are taken from the atlas of that zoom level, so the chunk is drawn at its final size. """
+
+        pyg  = session.pyg
+        img  = session.img
+        zoom = frame[0]
+
+        # Use new surfaces so that changes are seen by dirty rectangle tracking
+        self.cache.pop((i, j), None)
+        floor = pygame.Surface((img.zoom_size(pyg.tile_width * self.size, zoom), img.zoom_size(pyg.tile_height * self.size, zoom)))
+        roof  = None
+        floor.fill(pyg.black)
+        img.native.add(floor)
+        
+        # Sort through tiles
+        dynamic = []
+        for x in range(i * self.size, min((i+1) * self.size, len(self.env.map))):
+            for y in range(j * self.size, min((j+1) * self.size, len(self.env.map[0]))):
+                tile = self.env.map[x][y]
+                if not tile.hidden:
+                    pos = (
+                        img.zoom_position((x - i * self.size) * pyg.tile_width,  zoom),
+                        img.zoom_position((y - j * self.size) * pyg.tile_height, zoom))
+                    
+                    # Roofs are drawn above entities
+                    if tile.room and (tile.room.roof_img_IDs == tile.img_IDs):
+                        if not roof:
+                            roof = pygame.Surface(floor.get_size(), pygame.SRCALPHA)
+                            img.native.add(roof)
+                        roof.blit(img.zoomed(tile.select_image(), zoom), pos)
+                    
+                    # Static effects change every frame
+                    elif tile.biome in img.biomes['sea']:
+                        dynamic.append(tile)
+                    
+                    else:
+                        floor.blit(img.zoomed(tile.select_image(), zoom), pos)
+        
+        # Cache result and remove the least recently used chunk; larger chunks are kept in smaller numbers
+        chunk = [frame, floor, roof, dynamic]
+        self.cache[(i, j)] = chunk
+        while len(self.cache) > self.cache_size / max(zoom, 1) ** 2:
+            self.cache.popitem(last=False)
+        
+        return chunk
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+
+        del state['cache']
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        
+        self.cache = OrderedDict()
+
+class PlacedWalls:
+    """ Sorts walls placed by the player into sets of touching walls, so that a new wall can be checked for closing a shape
+        without walking through the other walls. Built from the placed flags of the map when first used. """
+
+    def __init__(self, env):
+        """ Parameters
+            ----------
+            env     : Environment object; owner
+
+            parent  : dict or None; (x, y) -> (x, y) of a wall in the same set, which leads to the root of the set
+            members : dict; (x, y) of each root -> list of (x, y) in its set
+        """
+
+        self.env     = env
+        self.parent  = None
+        self.members = {}
+
+    def reset(self):
+        """ Rebuilds the sets when next used, such as after a placed wall is replaced. """
+
+        self.parent  = None
+        self.members = {}
+
+    def load(self, skip=None):
+        """ Adds every placed wall of the map, except the given position. """
+
+        grid         = self.env.map
+        self.parent  = {}
+        self.members = {}
+        for index in range(len(grid.flags)):
+            if grid.flags[index] & TileGrid.flag_bits['placed']:
+                loc = (index // grid.height, index % grid.height)
+                if loc != skip: self.join(loc)
+
+    def find(self, loc):
+        """ Returns the root of the set containing the given wall. """
+
+        parent = self.parent
+        while parent[loc] != loc:
+            parent[loc] = parent[parent[loc]]
+            loc         = parent[loc]
+        return loc
+
+    def join(self, loc):
+        """ Adds a wall and merges its set with the sets of the walls around it. """
+
+        self.parent[loc]  = loc
+        self.members[loc] = [loc]
+        (x, y) = loc
+        for neighbor in [(x, y-1), (x+1, y-1), (x+1, y), (x+1, y+1), (x, y+1), (x-1, y+1), (x-1, y), (x-1, y-1)]:
+            if neighbor in self.parent:
+                root_1, root_2 = self.find(loc), self.find(neighbor)
+                if root_1 != root_2:
+
+                    # Merge the smaller set into the larger one
+                    if len(self.members[root_1]) < len(self.members[root_2]): root_1, root_2 = root_2, root_1
+                    self.parent[root_2] = root_1
+                    self.members[root_1] += self.members.pop(root_2)
+
+    def closes(self, loc):
+        """ Returns True if a wall at the given position would close a shape with the walls already placed.
+
+            The four sides of the position are split into groups of open tiles that touch around it. Between each pair of groups lies
+            a run of walls. The open tiles are cut apart, and so a shape is closed, only if two of these runs already belong to the same set.
+        """
+
+        (x, y) = loc
+        ring   = [(x, y-1), (x+1, y-1), (x+1, y), (x+1, y+1), (x, y+1), (x-1, y+1), (x-1, y), (x-1, y-1)]
+        walls  = [neighbor in self.parent for neighbor in ring]
+        sides  = [i for i in range(0, 8, 2) if not walls[i]]
+
+        # Find the sets between each pair of neighboring open sides
+        roots = []
+        for (i, side) in enumerate(sides):
+            next_side = sides[(i+1) % len(sides)]
+            between   = [(side + k) % 8 for k in range(1, (next_side - side) % 8 or 8)]
+            runs      = [ring[k] for k in between if walls[k]]
+            if runs: roots.append(self.find(runs[0]))
+        
+        return len(roots) > len(set(roots))
+
+    def add(self, loc):
+        """ Adds a placed wall. Returns the positions of all walls in its set if it closes a shape, or None otherwise. """
+
+        if self.parent is None: self.load(skip=loc)
+        if loc in self.parent:  return None
+
+        closed = self.closes(loc)
+        self.join(loc)
+        if closed: return self.members[self.find(loc)]
+
+class Weather:
+
+    # Sky and cloud surfaces shared by every environment, drawn at the size of the screen; only one pair is rendered at a time
+    buffers = {}
+
+    # Falloff sprites for each light size
+    light_sprites = {}
+
+    def __init__(self, env, light_set=None, clouds=True):
+        
         # Global mechanisms
         self.env = env
 
-        # Surfaces
-        self.sky_surface   = pygame.Surface((pyg.screen_width*10, pyg.screen_height*10), pygame.SRCALPHA)
-        self.cloud_surface = pygame.Surface((pyg.screen_width*10, pyg.screen_height*10), pygame.SRCALPHA)
-
         self.last_hour = time.localtime().tm_hour + 1
         self.last_min  = time.localtime().tm_min  + 1
 
@@ -1924,6 +2906,34 @@ class Weather:
         self.light_set = light_set
         self.cloudy    = clouds
         self.clouds    = []
+        
+        self.last_state = None
+
+    @classmethod
+    def get_buffers(cls):
+        """ Returns the shared sky and cloud surfaces, sized to the display.
+            The display keeps the size of the screen at every zoom level, so the surfaces are only rebuilt if the screen changes.
+            Clouds and lights are drawn at the zoom level, so the surfaces are not scaled again; see Pygame.zoom_queue. """
+        
+        size = session.pyg.display.get_size()
+        if size not in cls.buffers:
+            sky_surface   = pygame.Surface(size, pygame.SRCALPHA)
+            cloud_surface = pygame.Surface(size, pygame.SRCALPHA)
+            sky_surface.fill((0, 0, 0, 255))
+            session.img.native.update([sky_surface, cloud_surface])
+            
+            cls.buffers.clear()
+            cls.buffers[size] = [sky_surface, cloud_surface]
+        
+        return cls.buffers[size]
+
+    @property
+    def sky_surface(self):
+        return self.get_buffers()[0]
+
+    @property
+    def cloud_surface(self):
+        return self.get_buffers()[1]
 
     def run(self):
 
@@ -1985,7 +2995,7 @@ class Weather:
         
         # Set delay and time
         delay     = random.randint(1, 10)
-        last_time = time.time()
+        last_time = session.clock.now
         
         # Create shape
         width  = random.randint(5, 20)
@@ -1998,15 +3008,48 @@ class Weather:
             'shape':     shape,
             'delay':     delay,
             'direction': direction,
-            'time':      last_time})
+            'time':      last_time,
+            'sprite':    self.render_cloud(shape)})
+
+    def render_cloud(self, shape):
+        """ Rasterizes a cloud shape once. Moving the cloud only changes where the sprite is blitted.
+
+            Parameters
+            ----------
+            shape : list of str; text room from create_text_room
+
+            Returns
+            -------
+            sprite : pygame Surface; the whole cloud in tile coordinates
+        """
+
+        pyg = session.pyg
+
+        sprite = pygame.Surface((len(shape) * pyg.tile_width, len(shape[0]) * pyg.tile_height), pygame.SRCALPHA)
+        for x_char in range(len(shape)):
+            for y_char in range(len(shape[x_char])):
+                char = shape[x_char][y_char]
+                if char != ' ':
+                    
+                    # Set image and pixel shift
+                    image = session.img.shift(session.img.dict['floors']['gray_floor'], [int((x_char+y_char)*13)%32, int(abs(x_char-y_char)*10)%32])
+                    
+                    # Set transparency
+                    if char == '-':   image.set_alpha(220)
+                    elif char == '.': image.set_alpha(255)
+                    else:             image.set_alpha(190)
+                    
+                    sprite.blit(image, (x_char * pyg.tile_width, y_char * pyg.tile_height))
+        
+        return sprite
 
     def move_clouds(self):
         # check time and speed; move if sufficient
         # remove if out of map
         for cloud in self.clouds:
             if cloud:
-                if time.time()-cloud['time'] > cloud['delay']:
-                    cloud['time'] = time.time()
+                if session.clock.now - cloud['time'] > cloud['delay']:
+                    cloud['time'] = session.clock.now
                     
                     if cloud['direction'] == 'up':      cloud['position'][1] -= 1
                     elif cloud['direction'] == 'down':  cloud['position'][1] += 1
@@ -2018,59 +3061,45 @@ class Weather:
                 self.clouds.remove(cloud)
 
     def update_clouds(self):
+        """ Blits every cloud sprite that overlaps the camera onto the cloud surface. """
+
         pyg    = session.pyg
+        img    = session.img
         camera = self.env.camera
+
+        cloud_surface = self.cloud_surface
+        viewport      = cloud_surface.get_rect()
         
-        # Draw visible tiles
-        for y in range(int(camera.Y/32), int(camera.bottom/pyg.tile_height + 1)):
-            for x in range(int(camera.X/32), int(camera.right/pyg.tile_width + 1)):
-                try:    tile = self.env.map[x][y]
-                except: continue
+        blit_list = []
+        for cloud in self.clouds:
+            if cloud:
                 
-                if not tile.hidden:
-                    for cloud in self.clouds:
-                        if cloud:
-                            
-                            # Check if the tile is in the cloud
-                            if x in range(cloud['position'][0], cloud['position'][0]+len(cloud['shape'])):
-                                if y in range(cloud['position'][1], cloud['position'][1]+len(cloud['shape'][0])):
-                                    x_char, y_char = x-cloud['position'][0], y-cloud['position'][1]
-                                    char = cloud['shape'][x_char][y_char]
-                                    if char != ' ':
-                                        
-                                        # Set image and pixel shift
-                                        image = session.img.shift(session.img.dict['floors']['gray_floor'], [int((x_char+y_char)*13)%32, int(abs(x_char-y_char)*10)%32])
-                                        
-                                        # Set transparency
-                                        if char == '-':   image.set_alpha(220)
-                                        elif char == '.': image.set_alpha(255)
-                                        else:             image.set_alpha(190)
-                                        
-                                        # Set the corresponding map tile
-                                        X = x * pyg.tile_width - self.env.camera.X
-                                        Y = y * pyg.tile_height - self.env.camera.Y
-                                        
-                                        self.cloud_surface.blit(image, (X, Y))
-
-        return
+                # Rasterize clouds restored from a save
+                if 'sprite' not in cloud:
+                    cloud['sprite'] = self.render_cloud(cloud['shape'])
+                
+                # Set the corresponding screen position
+                X = img.zoom_position(cloud['position'][0] * pyg.tile_width - camera.X,  camera.zoom)
+                Y = img.zoom_position(cloud['position'][1] * pyg.tile_height - camera.Y, camera.zoom)
+                sprite = img.zoomed(cloud['sprite'], camera.zoom)
+                
+                if viewport.colliderect(sprite.get_rect(topleft=(X, Y))):
+                    blit_list.append((sprite, (X, Y)))
+        
+        if blit_list:
+            cloud_surface.blits(blit_list, doreturn=False)
+
+    @classmethod
+    def get_light_sprite(cls, size):
+        """ Returns a pre-rendered falloff sprite for a light of the given size in tile coordinates. """
 
-    def update_lighting(self):
         pyg = session.pyg
 
-        for effect_obj in self.light_list:
-            
-            # Center light on entity
-            X = effect_obj.owner.X - self.env.camera.X
-            Y = effect_obj.owner.Y - self.env.camera.Y
-            
-            # Render
-            size   = effect_obj.size
+        if size not in cls.light_sprites:
             width  = pyg.tile_width * size
             height = pyg.tile_height * size
             alpha  = 255 // size
-            left   = X - size * pyg.tile_width//2 + pyg.tile_width//2
-            top    = Y - size * pyg.tile_height//2 + pyg.tile_width//2
-
+            
             light_surface = pygame.Surface((width, height), pygame.SRCALPHA)
             for i in range(size + 1):
                 a = max(0, alpha * i)
@@ -2082,8 +3111,39 @@ class Weather:
                 )
                 pygame.draw.rect(light_surface, (255, 255, 255, a), transparent_rect)
             
-            # Blend this light onto the main sky surface with "brightest wins"
-            self.sky_surface.blit(light_surface, (left, top), special_flags=pygame.BLEND_RGBA_SUB)
+            cls.light_sprites[size] = light_surface
+        
+        return cls.light_sprites[size]
+
+    def update_lighting(self):
+        """ Cuts every visible light out of the sky in a single pass. Lights outside of the camera are skipped. """
+
+        pyg    = session.pyg
+        img    = session.img
+        camera = self.env.camera
+
+        sky_surface = self.sky_surface
+        viewport    = sky_surface.get_rect()
+        
+        blit_list = []
+        for effect_obj in self.light_list:
+            
+            # Center light on entity
+            X = effect_obj.owner.X - camera.X
+            Y = effect_obj.owner.Y - camera.Y
+            
+            # Find bounds on the screen
+            size   = effect_obj.size
+            left   = img.zoom_position(X - size * pyg.tile_width//2 + pyg.tile_width//2,  camera.zoom)
+            top    = img.zoom_position(Y - size * pyg.tile_height//2 + pyg.tile_width//2, camera.zoom)
+            sprite = img.zoomed(self.get_light_sprite(size), camera.zoom)
+            
+            if viewport.colliderect(sprite.get_rect(topleft=(left, top))):
+                blit_list.append((sprite, (left, top), None, pygame.BLEND_RGBA_SUB))
+        
+        # Subtract all lights from the main sky surface
+        if blit_list:
+            sky_surface.blits(blit_list, doreturn=False)
 
     def render(self):
         """ Creates a black overlay and cuts out regions for lighting.
@@ -2097,23 +3157,34 @@ class Weather:
         # Check for lights
         self.update_lighting()
         
-        session.pyg.display_queue.append([self.cloud_surface, (0, 0)])
-        session.pyg.display_queue.append([self.sky_surface,   (0, 0)])
+        # Redraw the display if the sky changed
+        camera = self.env.camera
+        state  = (
+            self.sky_surface.get_alpha(),
+            self.cloud_surface.get_alpha(),
+            camera.X,
+            camera.Y,
+            tuple((cloud['position'][0], cloud['position'][1]) for cloud in self.clouds if cloud),
+            tuple((effect_obj.owner.X, effect_obj.owner.Y, effect_obj.size) for effect_obj in self.light_list))
+        if state != self.last_state:
+            self.last_state = state
+            session.pyg.mark_dirty('display')
+        
+        session.pyg.display_queue.append((self.cloud_surface, (0, 0)))
+        session.pyg.display_queue.append((self.sky_surface,   (0, 0)))
 
     def __getstate__(self):
         state = self.__dict__.copy()
 
-        del state['sky_surface']
-        del state['cloud_surface']
+        # Cloud sprites are rebuilt when next rendered
+        state['clouds'] = [{key: value for key, value in cloud.items() if key != 'sprite'} if cloud else cloud for cloud in self.clouds]
 
         return state
 
     def __setstate__(self, state):
         self.__dict__.update(state)
         
-        pyg = session.pyg
-        self.sky_surface   = pygame.Surface((pyg.screen_width*10, pyg.screen_height*10), pygame.SRCALPHA)
-        self.cloud_surface = pygame.Surface((pyg.screen_width*10, pyg.screen_height*10), pygame.SRCALPHA)
+        self.last_state = None
 
 class Camera:
     """ Defines a camera to follow the player. """
@@ -2231,20 +3302,18 @@ class Camera:
         pyg = session.pyg
 
         # Set to a specific value
-        if custom and (self.zoom != custom):
-            self.zoom = custom
+        if custom and (self.zoom != round(custom, 1)):
+            self.zoom = round(custom, 1)
             pyg.update_gui()
             self.width  = int(pyg.screen_width / self.zoom)
             self.height = int(pyg.screen_height / self.zoom)
-            pyg.display = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
             self._recalculate_bounds()
         
         elif (not custom) and (not self.fixed) and (self.zoom < self.min_zoom):
-            self.zoom += factor
+            self.zoom = round(self.zoom + factor, 1)
             pyg.update_gui()
             self.width  = int(pyg.screen_width / self.zoom)
             self.height = int(pyg.screen_height / self.zoom)
-            pyg.display = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
             self._recalculate_bounds()
 
     def zoom_out(self, factor=0.1, custom=None):
@@ -2255,13 +3324,12 @@ class Camera:
         if (not self.fixed) and (self.zoom > self.max_zoom):
             if round(self.zoom, 2) > factor:
 
-                if custom: self.zoom = custom
+                if custom: self.zoom = round(custom, 1)
                 else:      self.zoom = round(self.zoom - factor, 1)
                 
                 pyg.update_gui()
                 self.width  = int(pyg.screen_width / self.zoom)
                 self.height = int(pyg.screen_height / self.zoom)
-                pyg.display = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
                 self._recalculate_bounds()
 
     def _recalculate_bounds(self):
@@ -2283,51 +3351,105 @@ class Camera:
         self.y_range         = self.tile_map_y + self.tile_map_height
         self.fix_position()
 
+class LevelPickler(pickle.Pickler):
+    """ Writes a level that is released from memory. Objects outside of the level are written as references.
+
+        Parameters
+        ----------
+        file    : binary file object
+        env     : Environment object; level to write, along with its state from level_state
+        objects : list, optional; objects of the level that stay in memory, such as from level_objects
+    """
+
+    def __init__(self, file, env, objects=()):
+        super().__init__(file)
+
+        # Refer to the level itself, its map, the player, and the other levels
+        self.references = {id(env): 'env', id(env.map): 'map', id(env.envs): 'envs', id(env.envs.player_obj): 'player_obj', id(env.envs.player_obj.ent): 'player'}
+        for (area_name, area) in env.envs.areas.items():
+            self.references[id(area)] = ('area', area_name)
+            for (name, level) in area.levels.items():
+                if level is not env: self.references[id(level)] = ('level', area_name, name)
+        
+        # Refer to objects that are kept
+        for (i, obj) in enumerate(objects):
+            self.references[id(obj)] = ('object', i)
+
+    def persistent_id(self, obj):
+        return self.references.get(id(obj))
+
+class LevelUnpickler(pickle.Unpickler):
+    """ Reads a level written by LevelPickler, using the placeholder and its map in place of the level itself. """
+
+    def __init__(self, file, env, objects=()):
+        super().__init__(file)
+        self.env     = env
+        self.objects = objects
+
+    def persistent_load(self, pid):
+        envs = self.env.envs
+        if pid == 'env':          return self.env
+        elif pid == 'map':        return self.env.map
+        elif pid == 'envs':       return envs
+        elif pid == 'player_obj': return envs.player_obj
+        elif pid == 'player':     return envs.player_obj.ent
+        elif pid[0] == 'area':    return envs.areas[pid[1]]
+        elif pid[0] == 'level':   return envs.areas[pid[1]].levels[pid[2]]
+        elif pid[0] == 'object':  return self.objects[pid[1]]
+
 ########################################################################################################################################################
 # Tools
-def voronoi_biomes(env, biomes):
+def voronoi_biomes(env, biomes, rng=None):
     """ Partitions environment map into random regions. Not yet generalized for arbitrary applications.
+        Each tile joins the region with the shortest Manhattan distance to its center, divided by the region's weight.
     
         Parameters
         ----------
         biomes : list of dictionaries of objects
-                 [<wall/floor name>, [<item name 1>, ...]], {...}] """
+                 [<wall/floor name>, [<item name 1>, ...]], {...}]
+        rng    : random.Random or int, optional; generator or seed for the regions, or the environment's generator if None """
     
     pyg = session.pyg
 
+    # Select random number generator
+    if rng is None:        rng = env.rng
+    elif type(rng) == int: rng = random.Random(rng)
+
     # Generate region centers and sizes
     num_regions    = len(biomes)
-    region_centers = [[random.randint(0, len(env.map[0])), random.randint(0, len(env.map))] for _ in range(num_regions)]
-    region_weights = [random.uniform(1, 3) for _ in range(num_regions)]
-    seeds_with_ids = [[i, center, weight] for i, (center, weight) in enumerate(zip(region_centers, region_weights))]
+    region_centers = [[rng.randint(0, len(env.map[0])), rng.randint(0, len(env.map))] for _ in range(num_regions)]
+    region_weights = [rng.uniform(1, 3) for _ in range(num_regions)]
 
     # Assign each tile to the nearest weighted region
-    for y in range(len(env.map[0])):
-        for x in range(len(env.map)):
-            tile         = env.map[x][y]
-            min_distance = float('inf')
-            biome        = None
-            
-            # Look for the shortest path to a region center
-            for i in range(len(seeds_with_ids)):
-                region_center = [seeds_with_ids[i][1][0] * pyg.tile_width, seeds_with_ids[i][1][1] * pyg.tile_height]
-                weight        = seeds_with_ids[i][2]
-                distance      = (abs(region_center[0] - tile.X) + abs(region_center[1] - tile.Y)) / weight
-                if distance < min_distance:
-                    min_distance = distance
-                    biome        = biomes[i][0]
-                    img_IDs    = biomes[i][1]
-                    region_num   = i
-            
-            # Set tile image and properties
-            tile.biome = biome
-            
-            # Check for image variants
-            #if floor_name[-1].isdigit() and not random.randint(0, 1):
-            #    try:    floor_name = floor_name[:-1] + str((int(floor_name[-1])+1))
-            #    except: continue
-            
-            tile.img_IDs = img_IDs
+    grid   = env.map
+    labels = []
+    if num_regions == 1:
+        labels = [0] * (grid.width * grid.height)
+    
+    else:
+        
+        ## Vertical distances are the same for every column, so they are found once per region
+        centers = [(center[0] * pyg.tile_width, center[1] * pyg.tile_height) for center in region_centers]
+        rows    = [[abs(center_Y - y * pyg.tile_height) for y in range(grid.height)] for (_, center_Y) in centers]
+        
+        ## Keep the closest region for each tile of a column; the first region wins ties
+        for x in range(grid.width):
+            X = x * pyg.tile_width
+            for (i, (center_X, _)) in enumerate(centers):
+                distance_X = abs(center_X - X)
+                weight     = region_weights[i]
+                distances  = [(distance_X + distance_Y) / weight for distance_Y in rows[i]]
+                if not i:
+                    closest = distances
+                    column  = [0] * grid.height
+                else:
+                    column  = [i if new < old else label for (new, old, label) in zip(distances, closest, column)]
+                    closest = [min(new, old) for (new, old) in zip(distances, closest)]
+            labels += column
+    
+    # Set tile image and properties
+    grid.paint('biome',   labels, [biome[0] for biome in biomes])
+    grid.paint('img_IDs', labels, [biome[1] for biome in biomes])
 
 def create_tile(tile_id):
     """ Creates and returns an object.
@@ -2338,62 +3460,101 @@ def create_tile(tile_id):
         effect : bool or Effect object; True=default, False=None, effect=custom """
     
     # Create object
-    tile_id   = tile_id.replace(" ", "_")
-    json_data = copy.deepcopy(tile_dicts[tile_id])
-    tile      = Tile(tile_id, **json_data)
+    tile_id = tile_id.replace(" ", "_")
+    tile    = Tile(tile_id, prototype=Tile.prototype(tile_id))
 
     return tile
 
 def place_objects(env, items, entities):
     """ Places entities and items according to probability and biome.
+        Every open tile draws one item and one entity from the lists. A draw succeeds if the tile's biome is a habitat
+        of the selection and a roll beats its unlikelihood, so the chance is 1/(unlikelihood+1) as with random.randint.
+        All draws are made first, then only the successful ones are created.
 
         Parameters
         ----------
         env      : Environment object; location to be placed
         items    : list of lists; [[<biome str>, <object str>, <unlikelihood int>], ...]
-        entities :  """
+        entities : list of lists; [[<biome str>, <entity str>, <unlikelihood int>, [<item str or None>, ...]], ...] """
     
-    from mechanics import is_blocked
-
-    # Sort through each tile
-    for y in range(len(env.map[0])):
-        for x in range(len(env.map)):
-            
-            # Check that the space is not already occupied
-            if not is_blocked(env.map[x][y]):
+    grid   = env.map
+    height = grid.height
+    
+    # Find open tiles, row by row
+    flags   = grid.flags
+    blocked = TileGrid.flag_bits['blocked']
+    ents    = grid.objects['ent']
+    indices = [x * height + y for y in range(height) for x in range(grid.width)]
+    indices = [index for index in indices if not (flags[index] & blocked) and (index not in ents)]
+    
+    # Precompile the chance of each selection for each biome on the map
+    biome_IDs   = grid.arrays['biome']
+    item_table  = compile_spawn_table(grid, items,    set(biome_IDs))
+    ent_table   = compile_spawn_table(grid, entities, set(biome_IDs))
+    
+    # Draw every selection and roll for the map at once
+    rng         = env.rng
+    count       = len(indices)
+    item_picks  = rng.choices(range(len(items)),    k=count)
+    item_rolls  = [rng.random() for _ in range(count)]
+    ent_picks   = rng.choices(range(len(entities)), k=count)
+    ent_rolls   = [rng.random() for _ in range(count)]
+    
+    # Keep the successful draws; an entity is not placed where there is an item
+    tile_items  = grid.objects['item']
+    item_spawns = []
+    ent_spawns  = []
+    for (i, index) in enumerate(indices):
+        biome_ID = biome_IDs[index]
+        occupied = index in tile_items
+        
+        if (item_rolls[i] < item_table[biome_ID][item_picks[i]]) and not occupied:
+            item_spawns.append((index, items[item_picks[i]]))
+            occupied = True
+        
+        if (ent_rolls[i] < ent_table[biome_ID][ent_picks[i]]) and not occupied:
+            ent_spawns.append((index, entities[ent_picks[i]]))
+    
+    # Create and place items
+    for (index, item_selection) in item_spawns:
+        item = create_item(item_selection[1])
+        place_object(item, [index // height, index % height], env)
+    
+    # Create and place entities
+    for (index, ent_selection) in ent_spawns:
+        (x, y) = (index // height, index % height)
+        entity = create_entity(ent_selection[1])
+        for item in ent_selection[3]:
+            if item:
+                obj = create_item(item)
+                session.items.pick_up(entity, obj)
+                if obj.equippable:
+                    session.items.toggle_equip(obj)
+                    if obj.effect:
+                        obj.effect.trigger = 'passive'
+        
+        entity.biome = env.map[x][y].biome
+        env.ents.append(entity)
+        place_object(entity, [x, y], env)
+
+def compile_spawn_table(grid, selections, biome_IDs):
+    """ Returns the chance of each selection for each biome, as {<biome ID>: [<chance>, ...]}.
+        The chance is zero if the biome is not a habitat of the selection.
 
-                ## Randomly select and place an item
-                item_selection = random.choice(items)
-                
-                # Check that the object matches the biome
-                if env.map[x][y].biome in session.img.biomes[item_selection[0]]:
-                    if not random.randint(0, item_selection[2]) and not env.map[x][y].item:
-                        
-                        ## Place object
-                        item = create_item(item_selection[1])
-                        place_object(item, [x, y], env)
-                
-                ## Randomly select and place an entity
-                ent_selection = random.choice(entities)
-                
-                # Check that the entity matches the biome
-                if env.map[x][y].biome in session.img.biomes[ent_selection[0]]:
-                    if not random.randint(0, ent_selection[2]) and not env.map[x][y].item:
-                        
-                        ## Create and place entity
-                        entity = create_entity(ent_selection[1])
-                        for item in ent_selection[3]:
-                            if item:
-                                obj = create_item(item)
-                                session.items.pick_up(entity, obj)
-                                if obj.equippable:
-                                    session.items.toggle_equip(obj)
-                                    if obj.effect:
-                                        obj.effect.trigger = 'passive'
-                        
-                        entity.biome = env.map[x][y].biome
-                        env.ents.append(entity)
-                        place_object(entity, [x, y], env)
+        Parameters
+        ----------
+        grid       : TileGrid object; holds the biome names referenced by biome_IDs
+        selections : list of lists; [[<biome str>, <object str>, <unlikelihood int>, ...], ...]
+        biome_IDs  : set of int; interned biome names to include """
+    
+    habitats = session.img.biomes
+    
+    table = {}
+    for biome_ID in biome_IDs:
+        biome = grid.values[biome_ID]
+        table[biome_ID] = [1 / (selection[2] + 1) if biome in habitats[selection[0]] else 0 for selection in selections]
+    
+    return table
 
 def place_object(obj, loc, env, names=None):
     """ Places a single object in the given location.
@@ -2421,7 +3582,9 @@ def place_object(obj, loc, env, names=None):
         obj.ent    = env.map[loc[0]][loc[1]].ent
         
         # Update environment
+        if env.map[loc[0]][loc[1]].placed and not obj.placed: env.placed_walls.reset()
         env.map[loc[0]][loc[1]] = obj
+        env.chunks.mark(obj)
 
         ## Check structures
         if obj.img_IDs[0] == 'walls':
@@ -2467,13 +3630,13 @@ def add_doors(room):
     """ Add one or two doors to a room, and adds a entryway. """
     
     # Add two doors
-    if not random.randint(0, 10): num_doors = 2
+    if not room.env.rng.randint(0, 10): num_doors = 2
     else:                         num_doors = 1
     
     for _ in range(num_doors):
     
         ## Avoid corners
-        selected_tile = random.choice(room.noncorners_list)
+        selected_tile = room.env.rng.choice(room.noncorners_list)
         loc = [selected_tile.X // 32, selected_tile.Y // 32]
         
         # Add to map
@@ -2484,7 +3647,7 @@ def add_doors(room):
         except: pass
         
         ## Create wide entryway and clear items
-        if not random.randint(0, 1):
+        if not room.env.rng.randint(0, 1):
             for i in range(3):
                 for j in range(3):
                     try:
@@ -2537,8 +3700,71 @@ def add_doors(room):
                         except:
                             continue
 
-def create_text_room(width=5, height=5, doors=True):
-    generator = TextRoom(width, height, doors)
+## Temporary folder for levels released from memory
+store_folder = None
+
+def store_path():
+    """ Returns a new file path in a temporary folder that is removed when the game closes. """
+
+    global store_folder
+
+    if not store_folder: store_folder = tempfile.TemporaryDirectory(prefix='mors_somnia_')
+    file, path = tempfile.mkstemp(suffix='.level', dir=store_folder.name)
+    os.close(file)
+    return path
+
+def level_state(env):
+    """ Returns the attributes of a level and of its map, as written by LevelPickler. """
+
+    grid_state = env.map.__dict__.copy()
+    del grid_state['columns']
+    return env.__dict__, grid_state
+
+def level_objects(env):
+    """ Returns the entities and items of a level, including those in its journal, without repeats.
+        These stay in memory while the rest of the level is stored. """
+
+    objects = {}
+    journal = list(env.journal['ents'].values()) + list(env.journal['items'].values()) if env.journal else []
+    for obj in env.ents + list(env.map.objects['ent'].values()) + list(env.map.objects['item'].values()) + journal:
+        objects[id(obj)] = obj
+    return list(objects.values())
+
+def load_level(env, saved):
+    """ Fills in a placeholder and its map from a level written by Area.store_level. The temporary file is removed. """
+
+    if 'path' in saved:
+        with open(saved['path'], 'rb') as file:
+            state = LevelUnpickler(file, env, saved['objects']).load()
+        os.remove(saved['path'])
+    else:
+        state = LevelUnpickler(io.BytesIO(saved['data']), env, saved['objects']).load()
+    
+    fill_level(env, *state)
+
+def move_level(level, env):
+    """ Moves a newly built level into a placeholder and its map, so that references to them stay valid. """
+
+    file = io.BytesIO()
+    LevelPickler(file, level).dump(level_state(level))
+    file.seek(0)
+    fill_level(env, *LevelUnpickler(file, env).load())
+
+def fill_level(env, env_state, grid_state):
+    """ Replaces the attributes of a placeholder and its map with those of a level. """
+
+    grid      = env.map
+    last_used = env.last_used
+
+    grid.__dict__.clear()
+    grid.__setstate__(grid_state)
+    
+    env.__dict__.clear()
+    env.__dict__.update(env_state)
+    env.last_used = last_used
+
+def create_text_room(width=5, height=5, doors=True, rng=random):
+    generator = TextRoom(width, height, doors, rng)
     return generator.create()
 
 def find_outside(plan):
@@ -278,6 +278,7 @@ class ItemSystem:
             session.abilities.toggle_ability(ent, item.ability)
 
         item.equipped = True
+        ent.refresh_sprite()
 
         if ent.role == 'player':
             if not item.hidden and not silent:
@@ -307,6 +308,7 @@ class ItemSystem:
         #########################################################
         # Notify change of status
         item.equipped = False
+        ent.refresh_sprite()
         if ent.role == 'player':
             if not item.hidden and not silent:
                 pyg.update_gui("Dequipped " + item.name + " from " + item.slot + ".", pyg.dark_gray)
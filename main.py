@@ -91,7 +91,7 @@ from pypresence import Presence
 
 ## Local
 import session
-from pygame_utilities import Pygame, Images, Audio, EventBus
+from pygame_utilities import Pygame, Images, Audio, EventBus, FrameClock
 from entities import PlayerData, Dialogue
 from abilities import _abilities
 from effects import _effects
@@ -120,6 +120,7 @@ def init():
     ## Pygame
     session.bus              = EventBus()
     session.pyg              = Pygame()
+    session.clock            = FrameClock()
     session.aud              = Audio()
     
     ## Images (sorted dictionary and cache)
@@ -172,19 +173,42 @@ def game_states():
     pyg.running = True
     while pyg.running:
 
+        #########################################################
+        # Only animate the fade while the screen is black and fade functions change the game
+        if pyg.fade_state == 'on':
+            pygame.event.pump()
+            rendering()
+            continue
+
+        #########################################################
+        # Handle input once per frame
+        if pygame.event.peek(): pyg.wake()
+        
+        if pyg.game_state == 'play_garden':
+            session.garden_obj.handle_input()
+        
+        elif pyg.game_state == 'play_game':
+            session.play_game_obj.handle_input()
+
+        #########################################################
+        # Advance game logic in fixed steps
+        for _ in range(pyg.find_ticks()):
+            simulate()
+
+        ## Build the next level a step at a time
+        if pyg.game_state == 'play_game':
+            session.player_obj.ent.env.area.continue_level()
+
         #########################################################
         # Play game
         if pyg.game_state == 'startup':
             session.new_game_obj.run()
         
         elif pyg.game_state == 'play_garden':
-            session.garden_obj.run()
             session.garden_obj.render()
         
         elif pyg.game_state == 'play_game':
-            session.play_game_obj.run()
             session.play_game_obj.render()
-            session.player_obj.ent.env.weather.run()
         
         #########################################################
         # Add big overlay
@@ -239,57 +263,62 @@ def game_states():
         rendering()
         API_updating()
 
+def simulate():
+    """ Runs one fixed step of game logic: AI, effects, and weather. """
+    
+    pyg = session.pyg
+
+    if pyg.game_state == 'play_garden':
+        session.garden_obj.run()
+    
+    elif pyg.game_state == 'play_game':
+        session.play_game_obj.run()
+        session.player_obj.ent.env.weather.run()
+    
+    pyg.sim_time += pyg.tick_time
+
 def rendering():
     pyg = session.pyg
 
-    #########################################################
-    # Render display (tiles, items, entities, weather)
-    render_display()
-    session.img.render()
-    for (surface, pos) in pyg.display_queue:
-        pyg.display.blit(surface, pos)
-    pyg.blit_to_screen(
-        surface  = pyg.display,
-        apply_fx = session.player_obj.ent.env.area.display_fx)
+    ## Keep the last frame of the lower layers while the screen is black
+    if pyg.fade_state != 'on':
 
-    #########################################################
-    # Render HUD (messages, time, health, stamina)
-    ## Toggle with pyg.hud_state in ['on', 'off']
-    render_hud()
-    for (surface, pos) in pyg.hud_queue:
-        pyg.hud.blit(surface, pos)
-    pyg.blit_to_screen(pyg.hud)
+        #########################################################
+        # Render display (tiles, items, entities, weather)
+        render_display()
+        session.img.render()
+        pyg.zoom_queue(pyg.display_queue)
+        pyg.render_layer(
+            layer    = 'display',
+            queue    = pyg.display_queue,
+            apply_fx = session.player_obj.ent.env.area.display_fx)
 
-    #########################################################
-    # Render overlays (menus)
-    ## Toggle with pyg.overlay_state
-    for (surface, pos) in pyg.overlay_queue:
-        pyg.overlays.blit(surface, pos)
-    pyg.blit_to_screen(pyg.overlays)
+        #########################################################
+        # Render HUD (messages, time, health, stamina)
+        ## Toggle with pyg.hud_state in ['on', 'off']
+        render_hud()
+        pyg.render_layer('hud', pyg.hud_queue)
+
+        #########################################################
+        # Render overlays (menus)
+        ## Toggle with pyg.overlay_state
+        pyg.render_layer('overlays', pyg.overlay_queue)
 
     #########################################################
-    # Render fade and intertitles; run background functions
+    # Render fade and intertitles; start background functions
     ## Toggle with pyg.fade_state in ['in', 'out', 'off']
     pyg.update_fade()
-    for (surface, pos) in pyg.fade_queue:
-        pyg.fade.blit(surface, pos)
-    pyg.blit_to_screen(pyg.fade)
+    pyg.render_layer('fade', pyg.fade_queue)
 
     #########################################################
     # Prepare for next frame
-    pygame.display.flip()
-    pyg.clock.tick(30)
-    
-    pyg.display.fill(pyg.black)
-    pyg.hud.fill((0, 0, 0, 0))
-    pyg.overlays.fill((0, 0, 0, 0))
-    pyg.fade.fill((0, 0, 0, 0))
-    pyg.screen.fill((0, 0, 0, 0))
-
-    pyg.display_queue = []
-    pyg.hud_queue     = []
-    pyg.overlay_queue = []
-    pyg.fade_queue    = []
+    ## Only send changed regions to the window
+    pyg.present()
+    pyg.wait_for_frame()
+    session.clock.tick()
+    session.img.update_cache_stats()
+
+    pyg.reset_queues()
 
 ########################################################################################################################################################
 # Other
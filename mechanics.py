@@ -33,6 +33,8 @@ class PlayGame:
         self.death_checked = False
 
     def run(self):
+        """ Runs one fixed step of the world. Input is handled separately, once per frame. """
+        
         pyg = session.pyg
         ent = session.player_obj.ent
 
@@ -46,9 +48,24 @@ class PlayGame:
 
         ## Set navigation speed
         session.effects.movement_speed(toggle=False)
+
+        #########################################################
+        # Move AI controlled entities
+        if not pyg.pause:
+            for ent in ent.env.ents:
+                session.movement.ai(ent)
+        
+        pyg.game_state = 'play_game'
+        return
+
+    def handle_input(self):
+        """ Handles keys pressed since the last frame. """
+        
+        pyg = session.pyg
+        ent = session.player_obj.ent
         
         ## Wait for input
-        if (not pyg.pause) and (pyg.overlay_state is None):
+        if (not pyg.pause) and (pyg.overlay_state is None) and (session.clock.now >= pyg.hold_until):
             
             #########################################################
             # Play game if alive
@@ -142,15 +159,6 @@ class PlayGame:
             if ent.dead:
                 self.handle_death()
 
-        #########################################################
-        # Move AI controlled entities
-        if not pyg.pause:
-            for ent in ent.env.ents:
-                session.movement.ai(ent)
-        
-        pyg.game_state = 'play_game'
-        return
-
     def render(self):
         pyg = session.pyg
 
@@ -387,6 +395,24 @@ class PlayGarden:
         
         ## Set navigation speed
         session.effects.movement_speed(toggle=False, custom=2)
+
+        #########################################################
+        # Move AI controlled entities
+        if not pyg.pause:
+
+            for ent in ent.env.ents:
+                session.movement.ai(ent)
+
+            session.movement.ai(session.player_obj.ent)
+        
+        pyg.game_state = 'play_garden'
+        return
+
+    def handle_input(self):
+        """ Handles keys pressed since the last frame. """
+        
+        pyg = session.pyg
+        ent = session.player_obj.ent
         
         ## Wait for input
         if pyg.overlay_state is None:
@@ -458,18 +484,6 @@ class PlayGarden:
                     pygame.quit()
                     sys.exit()
 
-        #########################################################
-        # Move AI controlled entities
-        if not pyg.pause:
-
-            for ent in ent.env.ents:
-                session.movement.ai(ent)
-
-            session.movement.ai(session.player_obj.ent)
-        
-        pyg.game_state = 'play_garden'
-        return
-
     def render(self):
         pass
 
@@ -533,6 +547,7 @@ class MovementSystem:
             - digging """
         
         pyg = session.pyg
+        if ent.role == 'player': pyg.wake()
 
         # Orientation
         if   dY > 0: ent.direction = 'front'
@@ -559,6 +574,7 @@ class MovementSystem:
         ## Change orientation before moving
         if ent.img_IDs[1] != ent.direction:
             ent.img_IDs[1] = ent.direction
+            ent.refresh_sprite()
             success = False
 
         ## Check for the edge of the map
@@ -619,8 +635,8 @@ class MovementSystem:
         # Move if alive
         moved = False
         if not ent.dead:
-            if time.time() - ent.last_press > ent.cooldown:
-                ent.last_press = float(time.time())
+            if session.pyg.sim_time - ent.last_press > ent.cooldown:
+                ent.last_press = session.pyg.sim_time
                 
                 # Move or follow
                 if not ent.motions_log:
@@ -1039,6 +1055,7 @@ class InteractionSystem:
             session.player_obj.ent.dead        = True
             session.player_obj.ent.tile.ent = None
             session.player_obj.ent.img_IDs   = session.player_obj.ent.img_names_backup
+            session.player_obj.ent.refresh_sprite()
             
             item = create_item('skeleton')
             item.name = f"the corpse of {ent.name}"
@@ -1133,6 +1150,7 @@ class PetsSystem:
         for pet in ent.env.ents:
             if pet is not ent:
                 pet.img_IDs[0] = target_img
+                pet.refresh_sprite()
 
     def _stat_limiter(self, dic):
         for key, value in dic.items():
@@ -1157,6 +1175,12 @@ def place_player(ent, env, loc):
         pygame.event.clear()
         session.img.render_log = []
         
+        # Stop building levels for an area that is being left
+        if ent.env and (ent.env.area != env.area): ent.env.area.discard_level()
+
+        # Bring the level back into memory if needed
+        if env.saved: env = env.area.restore_level(env)
+
         # Remove from current location
         if ent.env:
             ent.env.player_coordinates = [ent.X//32, ent.Y//32]
@@ -1185,6 +1209,9 @@ def place_player(ent, env, loc):
         ent.env.ents.append(ent)
         ent.tile.ent = ent
         check_tile(loc[0], loc[1], ent=ent, startup=True)
+
+        # Release levels that have not been used recently
+        env.envs.touch(env)
         
         # Update camera
         if not env.camera.fixed:
@@ -1193,7 +1220,7 @@ def place_player(ent, env, loc):
             ent.env.camera.zoom_out()
         
         # Render
-        time.sleep(0.5)
+        pyg.hold(0.5)
         pyg.update_gui(ent=ent)
         
         # Change song
@@ -1234,7 +1261,9 @@ def check_tile(x, y, ent=None, startup=False):
     # Reveal a square around the player
     for u in range(x-1, x+2):
         for v in range(y-1, y+2):
-            ent.env.map[u][v].hidden = False
+            if ent.env.map[u][v].hidden:
+                ent.env.map[u][v].hidden = False
+                ent.env.chunks.mark(ent.env.map[u][v])
     
     # Reveal a hidden room
     if tile.room:
@@ -1243,6 +1272,7 @@ def check_tile(x, y, ent=None, startup=False):
             tile.room.hidden = False
             for room_tile in tile.room.tiles_list:
                 room_tile.hidden = False
+            ent.env.chunks.mark_all(tile.room.tiles_list)
         
         # Check if the player enters or leaves a room
         if ent.prev_tile:
@@ -1253,6 +1283,7 @@ def check_tile(x, y, ent=None, startup=False):
                     for spot in tile.room.tiles_list:
                         if spot not in tile.room.walls_list:
                             spot.img_IDs = tile.room.floor_img_IDs
+                    ent.env.chunks.mark_all(tile.room.tiles_list)
     
     # Reveal the roof if the player leaves the room
     if ent.prev_tile:
@@ -1262,6 +1293,7 @@ def check_tile(x, y, ent=None, startup=False):
                 for spot in prev_tile.room.tiles_list:
                     if spot not in prev_tile.room.walls_list:
                         spot.img_IDs = prev_tile.room.roof_img_IDs
+                ent.env.chunks.mark_all(prev_tile.room.tiles_list)
 
 def is_blocked(tile):
     """ Checks for barriers. """
@@ -9,6 +9,9 @@
 import random
 import time
 import copy
+import math
+import weakref
+from collections import OrderedDict
 
 ## Specific
 import pygame
@@ -52,6 +55,11 @@ class Pygame:
         self.init_hud()
         self.init_overlay()
         self.init_fade()
+        self.init_presentation()
+
+        #########################################################
+        # Simulation and frame timing
+        self.init_timing()
 
         #########################################################
         # Utility
@@ -71,11 +79,15 @@ class Pygame:
         self.font     = pygame.font.SysFont('segoeuisymbol', 16, bold=True)
         self.minifont = pygame.font.SysFont('segoeuisymbol', 14, bold=True)
         self.clock    = pygame.time.Clock()
+        
+        self.surface_pool      = OrderedDict() # (role, size, flags, depth) -> reusable surface
+        self.surface_pool_size = 8
 
     def init_display(self):
         """ World pieces, like environment tiles and entities. """
         
-        self.display       = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
+        self.display       = self.get_surface('display', (self.screen_width, self.screen_height))
+        self.zoom          = 1 # zoom level of the camera being drawn; see zoom_queue
         self.game_state    = 'startup'
         self.display_queue = []
 
@@ -96,6 +108,9 @@ class Pygame:
         self.gui_toggle  = True  # bool; shows or hides GUI
         self.msg_height  = 4     # number of lines shown
         self.msg_width   = int(self.screen_width / 6)
+
+        self.text_cache      = OrderedDict() # (font, text, color) -> rendered surface
+        self.text_cache_size = 512
         self.msg_history = {}
 
     def init_overlay(self):
@@ -121,6 +136,105 @@ class Pygame:
         self.min_alpha     = 0
         self.fade_alpha    = 255
 
+        self.fade_hold     = 4    # minimum time in seconds to hold a black screen, including run time
+        self.fade_start    = 0    # clock time when the black screen was reached
+        self.hold_until    = 0    # clock time until which gameplay input is ignored
+
+    def init_presentation(self):
+        """ Tracks changes between frames so that only dirty regions are redrawn and sent to the window.
+
+            Parameters
+            ----------
+            layers       : list of str; names of layer surfaces, from bottom to top
+            queue_names  : dict; layer name -> name of the queue attribute
+            last_queues  : dict; layer name -> queue rendered in the previous frame
+            spare_queues : dict; layer name -> emptied list to use as the next queue
+            last_layers  : dict; layer name -> layer surface rendered in the previous frame
+            sources      : dict; layer name -> layer surface after effects
+            changed      : dict; layer name -> list of Rects redrawn this frame, or None if redrawn in full
+            groups       : list of tuples; (size, layer names) for consecutive layers stacked at one resolution
+            stacks       : dict; layer names -> surface holding the stacked layers
+            scaled       : dict; layer names -> [scaled surface, (x, y) offset]
+            fits         : dict; (layer size, screen size) -> [scale, (width, height), (x, y) offset]
+            dirty_layers : set of str; layers to redraw in full on the next frame
+            dirty_rects  : list of pygame Rects; regions of the screen to update
+            full_redraw  : bool; flips the whole screen on the next frame
+        """
+
+        self.layers       = ['display', 'hud', 'overlays', 'fade']
+        self.queue_names  = {'display': 'display_queue', 'hud': 'hud_queue', 'overlays': 'overlay_queue', 'fade': 'fade_queue'}
+        self.last_queues  = {layer: [] for layer in self.layers}
+        self.spare_queues = {layer: [] for layer in self.layers}
+        self.last_layers  = {}
+        self.sources      = {}
+        self.changed      = {}
+        self.groups       = []
+        self.stacks       = {}
+        self.scaled       = {}
+        self.fits         = {}
+        self.dirty_layers = set()
+        self.dirty_rects  = []
+        self.full_redraw  = True
+
+    def init_timing(self):
+        """ Runs game logic in fixed steps, separately from rendering, and lowers the frame rate when idle.
+
+            Parameters
+            ----------
+            tick_rate     : int; simulation steps per second
+            tick_time     : float; seconds per simulation step
+            max_ticks     : int; simulation steps per frame before the remaining time is dropped
+            frame_rate    : int; frames per second while active
+            idle_rate     : int; frames per second while idle
+            idle_delay    : float; seconds without activity before idling
+            sim_time      : float; simulated time; starts at the wall time so that saved cooldowns stay valid
+            accumulator   : float; real time that has not been simulated yet
+            last_activity : float; time of the last input, player movement, or fade
+        """
+
+        self.tick_rate     = 30
+        self.tick_time     = 1 / self.tick_rate
+        self.max_ticks     = 5
+        self.frame_rate    = 30
+        self.idle_rate     = 10
+        self.idle_delay    = 2
+        self.sim_time      = time.time()
+        self.accumulator   = 0
+        self.last_activity = time.time()
+
+    def get_surface(self, role, size, flags=pygame.SRCALPHA, depth=None):
+        """ Returns a pooled surface, creating it the first time a role needs that size.
+            Every layer is drawn at the size of the screen, so only a few surfaces are in use. The least recently used ones
+            are dropped beyond surface_pool_size; callers compare surfaces by identity and redraw a replaced one in full.
+            The contents are left over from the last use; surfaces that change size are redrawn in full anyway.
+
+            Parameters
+            ----------
+            role  : str or tuple; keeps surfaces that are in use at the same time apart
+            size  : tuple of int; width and height
+            flags : int; pygame surface flags
+            depth : pygame Surface; matches the pixel format of another surface, optional
+        """
+
+        key = (role, tuple(size), flags, depth.get_bitsize() if depth else None)
+        if key in self.surface_pool:
+            self.surface_pool.move_to_end(key)
+        
+        else:
+            if depth: self.surface_pool[key] = pygame.Surface(size, flags, depth)
+            else:     self.surface_pool[key] = pygame.Surface(size, flags)
+            if len(self.surface_pool) > self.surface_pool_size:
+                self.surface_pool.popitem(last=False)
+        
+        return self.surface_pool[key]
+
+    def set_zoom(self, zoom):
+        """ Sets the zoom level of the camera being drawn. The display is redrawn in full when it changes. """
+
+        if zoom != self.zoom:
+            self.zoom = zoom
+            self.mark_dirty('display')
+
     # Gameplay settings and shorthand
     def set_controls(self, controls):
         
@@ -272,37 +386,355 @@ class Pygame:
             self.screen_height = 480
             self.toggle_windowed(toggle=False)
 
-    def blit_to_screen(self, surface, apply_fx=None):
-        """ Scales the given surface to fit the screen while preserving aspect ratio,
-            then centers it and optionally applies a display effect.
+    def mark_dirty(self, layer='display'):
+        """ Redraws a whole layer on the next frame. Needed when a queued surface is changed in place.
+
+            Parameters
+            ----------
+            layer : str in ['display', 'hud', 'overlays', 'fade']
+        """
+
+        self.dirty_layers.add(layer)
+
+    def find_dirty_rects(self, layer, queue):
+        """ Compares a layer's queue with the one from the previous frame.
+            Surfaces are compared by identity, so the previous queue is kept to avoid reused ids.
+
+            Returns
+            -------
+            list of pygame Rects in layer coordinates, or None if the whole layer should be redrawn
+        """
+
+        surface = getattr(self, layer)
+        
+        # Redraw everything if marked or replaced
+        if (layer in self.dirty_layers) or (self.last_layers.get(layer) is not surface):
+            self.dirty_layers.discard(layer)
+            return None
+        
+        # Skip matching queues
+        last_queue = self.last_queues[layer]
+        if len(queue) == len(last_queue):
+            for (new_surface, new_pos), (old_surface, old_pos) in zip(queue, last_queue):
+                if (new_surface is not old_surface) or (tuple(new_pos) != tuple(old_pos)):
+                    break
+            else:
+                return []
+        
+        # Count entries from the previous frame
+        counts = {}
+        for (old_surface, old_pos) in last_queue:
+            key         = (id(old_surface), tuple(old_pos))
+            counts[key] = counts.get(key, 0) + 1
+        
+        # Find new entries
+        rects = []
+        for (new_surface, new_pos) in queue:
+            key = (id(new_surface), tuple(new_pos))
+            if counts.get(key): counts[key] -= 1
+            else:               rects.append(pygame.Rect(new_pos, new_surface.get_size()))
+        
+        # Find removed entries
+        for (old_surface, old_pos) in last_queue:
+            key = (id(old_surface), tuple(old_pos))
+            if counts.get(key):
+                counts[key] -= 1
+                rects.append(pygame.Rect(old_pos, old_surface.get_size()))
+        
+        # Redraw everything if the order changed or most of the layer changed
+        if not rects: return None
+        area = sum(rect.width * rect.height for rect in rects)
+        if area > (surface.get_width() * surface.get_height()) // 2: return None
+
+        return rects
+
+    def render_layer(self, layer, queue, apply_fx=None):
+        """ Blits the dirty regions of a layer from its queue and saves the result for present().
 
-            Parameters:
-            - surface: pygame.Surface to blit.
-            - apply_fx: function(surface) -> surface, optional effect to apply before blitting.
-            - fill_screen: if True, fills the screen with black before blit.
+            Parameters
+            ----------
+            layer    : str in ['display', 'hud', 'overlays', 'fade']
+            queue    : list; (surface, position) for each image in the layer
+            apply_fx : function(surface) -> surface, optional effect to apply before scaling
         """
 
-        # Apply effect if provided
-        if apply_fx:
-            surface = apply_fx(surface)
+        surface = getattr(self, layer)
+        if layer == 'display': color = self.black
+        else:                  color = (0, 0, 0, 0)
+
+        #########################################################
+        # Find regions to redraw
+        if apply_fx: rects = None
+        else:        rects = self.find_dirty_rects(layer, queue)
+        self.last_queues[layer] = queue
+        self.last_layers[layer] = surface
+        
+        #########################################################
+        # Redraw
+        ## Whole layer
+        if rects is None:
+            surface.fill(color)
+            surface.blits(queue, doreturn=False)
+        
+        ## Dirty regions
+        elif rects:
+            for rect in rects:
+                surface.set_clip(rect)
+                surface.fill(color, rect)
+                surface.blits(queue, doreturn=False)
+            surface.set_clip(None)
+        
+        ## Nothing changed
+        else:
+            return
 
-        # Compute scale preserving aspect ratio
-        scale = min(
-            self.screen_width  / surface.get_width(),
-            self.screen_height / surface.get_height()
-        )
-        scaled_w = int(surface.get_width() * scale)
-        scaled_h = int(surface.get_height() * scale)
+        #########################################################
+        # Save the result for composition
+        if apply_fx: surface = apply_fx(surface)
+        self.sources[layer] = surface
+        self.changed[layer] = rects
 
-        # Compute offsets to center
-        x = (self.screen_width - scaled_w) // 2
-        y = (self.screen_height - scaled_h) // 2
+    def zoom_queue(self, queue):
+        """ Moves a queue from world pixels to screen pixels at the current zoom level, in place.
+            Images are replaced with copies pre-scaled to the zoom level, so the display is drawn at its final size
+            and never rescaled as a whole. Nothing changes at a zoom of 1.
 
-        # Scale and blit
-        scaled_surface = pygame.transform.scale(surface, (scaled_w, scaled_h))
-        self.screen.blit(scaled_surface, (x, y))
+            Parameters
+            ----------
+            queue : list; (surface, position) for each image, with positions relative to the camera
+        """
+
+        zoom = self.zoom
+        if zoom == 1: return
+
+        img   = session.img
+        atlas = img.atlas(zoom)
+        for (i, (surface, (X, Y))) in enumerate(queue):
+            scaled = atlas.get(surface)
+            if scaled is None: scaled = img.zoomed(surface, zoom)
+            queue[i] = (scaled, (img.zoom_position(X, zoom), img.zoom_position(Y, zoom)))
+
+    def reset_queues(self):
+        """ Starts the next frame with empty queues. The queues rendered this frame are kept for comparison,
+            so each layer alternates between two lists instead of allocating a new one every frame.
+            A layer that was not rendered this frame keeps comparing against the last queue it did render. """
+
+        for layer in self.layers:
+            name  = self.queue_names[layer]
+            queue = getattr(self, name)
+            
+            # Discard entries of a layer that was skipped
+            if queue is not self.last_queues[layer]:
+                queue.clear()
+                continue
+            
+            spare = self.spare_queues[layer]
+            spare.clear()
+            self.spare_queues[layer] = queue
+            setattr(self, name, spare)
+
+    def find_fit(self, size):
+        """ Returns the scale, scaled size, and offset that fit a surface to the screen while preserving aspect ratio.
+            Results are kept until the window size or the surface size changes.
+
+            Parameters
+            ----------
+            size : tuple of int; width and height of the surface
+        """
+
+        key = (size, (self.screen_width, self.screen_height))
+        if key not in self.fits:
+            scale = min(
+                self.screen_width  / size[0],
+                self.screen_height / size[1])
+            scaled_w = int(size[0] * scale)
+            scaled_h = int(size[1] * scale)
+            x        = (self.screen_width - scaled_w) // 2
+            y        = (self.screen_height - scaled_h) // 2
+            self.fits[key] = [scale, (scaled_w, scaled_h), (x, y)]
+        
+        return self.fits[key]
+
+    def find_groups(self):
+        """ Returns consecutive layers that share a size, each of which can be stacked and scaled once. """
+
+        groups = []
+        for layer in self.layers:
+            if layer in self.sources:
+                size = self.sources[layer].get_size()
+                if groups and (groups[-1][0] == size): groups[-1] = (size, groups[-1][1] + (layer,))
+                else:                                  groups.append((size, (layer,)))
+        
+        return groups
+
+    def compose_group(self, size, layers, full=False):
+        """ Stacks the changed regions of a group of layers, then scales the stack into a persistent surface.
+
+            Parameters
+            ----------
+            size   : tuple of int; width and height shared by the layers
+            layers : tuple of str; layer names, from bottom to top
+            full   : bool; restacks the whole group
+        """
+
+        #########################################################
+        # Find regions that changed in any layer of the group
+        rects = []
+        for layer in layers:
+            if layer in self.changed:
+                if self.changed[layer] is None: full = True
+                else:                           rects += self.changed[layer]
+        if full:        rects = None
+        elif not rects: return
+        
+        #########################################################
+        # Stack layers at their shared resolution
+        if len(layers) == 1:
+            source = self.sources[layers[0]]
+        
+        else:
+            source = self.get_surface(('stack',) + layers, size)
+            if self.stacks.get(layers) is not source:
+                self.stacks[layers] = source
+                rects = None
+            
+            if rects is None: regions = [source.get_rect()]
+            else:             regions = rects
+            for rect in regions:
+                source.fill((0, 0, 0, 0), rect)
+                for layer in layers:
+                    source.blit(self.sources[layer], rect.topleft, rect)
+        
+        #########################################################
+        # Scale once into a persistent surface
+        scale, (scaled_w, scaled_h), (x, y) = self.find_fit(size)
+        if (scaled_w, scaled_h) == size:
+            scaled_surface = source
+        
+        else:
+            scaled_surface = self.get_surface(('scaled',) + layers, (scaled_w, scaled_h), source.get_flags() & pygame.SRCALPHA, source)
+            pygame.transform.scale(source, (scaled_w, scaled_h), scaled_surface)
+        
+        self.scaled[layers] = [scaled_surface, (x, y)]
+
+        #########################################################
+        # Note regions of the screen to update
+        if rects is None:
+            self.dirty_rects.append(pygame.Rect(x, y, scaled_w, scaled_h))
+        else:
+            for rect in rects:
+                self.dirty_rects.append(pygame.Rect(
+                    int(rect.x * scale) + x - 1,
+                    int(rect.y * scale) + y - 1,
+                    int(rect.width * scale) + 3,
+                    int(rect.height * scale) + 3))
+
+    def present(self):
+        """ Composes the dirty regions of each layer onto the screen and sends them to the window.
+            Flips the whole screen after a camera move, zoom, or resize. Does nothing if no layer changed. """
+
+        screen_rect = self.screen.get_rect()
+
+        #########################################################
+        # Stack and scale layers; restack everything if the groups changed
+        groups  = self.find_groups()
+        regroup = (groups != self.groups)
+        for (size, layers) in groups:
+            self.compose_group(size, layers, full=regroup)
+        
+        if regroup:
+            self.groups = groups
+            self.scaled = {layers: self.scaled[layers] for (_, layers) in groups}
+            self.stacks = {layers: surface for (layers, surface) in self.stacks.items() if layers in self.scaled}
+        self.changed = {}
+
+        #########################################################
+        # Select regions
+        if self.full_redraw or (self.last_layers.get('screen') is not self.screen):
+            rects = [screen_rect]
+            flip  = True
+        elif self.dirty_rects:
+            rects = [rect.clip(screen_rect) for rect in self.dirty_rects]
+            if len(rects) > 32: rects = [rects[0].unionall(rects[1:])]
+            flip  = screen_rect in rects
+            if flip: rects = [screen_rect]
+        else:
+            return
+        
+        #########################################################
+        # Compose groups from bottom to top
+        for rect in rects:
+            for (_, layers) in self.groups:
+                scaled_surface, (x, y) = self.scaled[layers]
+                area = rect.move(-x, -y).clip(scaled_surface.get_rect())
+                self.screen.blit(scaled_surface, (area.x + x, area.y + y), area)
+        
+        if flip: pygame.display.flip()
+        else:    pygame.display.update(rects)
+
+        # Leave the screen clear between frames
+        for rect in rects:
+            self.screen.fill((0, 0, 0, 0), rect)
+        
+        self.last_layers['screen'] = self.screen
+        self.dirty_rects           = []
+        self.full_redraw           = False
+
+    # Timing
+    def find_ticks(self):
+        """ Adds the length of the last frame to the accumulator and returns the number of simulation steps to run.
+            Time beyond max_ticks steps is dropped so that a slow frame does not cause a burst of catch-up steps. """
+
+        self.accumulator += self.clock.get_time() / 1000
+        ticks = int(self.accumulator // self.tick_time)
+
+        if ticks > self.max_ticks:
+            ticks            = self.max_ticks
+            self.accumulator = 0
+        else:
+            self.accumulator -= ticks * self.tick_time
+        
+        return ticks
+
+    def wake(self):
+        """ Leaves idle mode. Called on input, player movement, and fades.
+            AI movement does not wake the game, since steps are slow enough to show at the idle frame rate. """
+        
+        self.last_activity = time.time()
+
+    def wait_for_frame(self):
+        """ Ends the frame at the active frame rate, or at the idle frame rate if nothing has happened recently. """
+
+        if self.fade_state != 'off': self.wake()
+
+        if time.time() - self.last_activity > self.idle_delay: self.clock.tick(self.idle_rate)
+        else:                                                  self.clock.tick(self.frame_rate)
 
     # HUD tools
+    def render_text(self, font, text, color):
+        """ Returns a shared, antialiased surface for the text. Built on first use and evicted when least recently used.
+
+            Parameters
+            ----------
+            font  : pygame Font; usually pyg.font or pyg.minifont
+            text  : str
+            color : pygame Color or tuple of int
+        """
+
+        key = (font, text, tuple(color))
+        
+        # Reuse a cached surface
+        if key in self.text_cache:
+            self.text_cache.move_to_end(key)
+            return self.text_cache[key]
+        
+        # Render a new surface and drop the oldest if needed
+        surface = font.render(text, True, color)
+        self.text_cache[key] = surface
+        if len(self.text_cache) > self.text_cache_size:
+            self.text_cache.popitem(last=False)
+        return surface
+
     def textwrap(self, text, width):
         """ Separates long chunks of text into consecutive lines. """
         
@@ -371,8 +803,8 @@ class Pygame:
         ## Construct list for display
         self.msg = []
         for i in range(len(lines)):
-            if colors[i] in pyg.colors: self.msg.append(self.font.render(lines[i], True, colors[i]))
-            else:                       self.msg.append(self.font.render(lines[i], True, color))
+            if colors[i] in pyg.colors: self.msg.append(self.render_text(self.font, lines[i], colors[i]))
+            else:                       self.msg.append(self.render_text(self.font, lines[i], color))
         
         #########################################################
         # Stats (bottom GUI)
@@ -402,11 +834,11 @@ class Pygame:
         else: wallet, env = '', ''
         
         self.gui = {
-            'wallet':   self.minifont.render(wallet,  True, bottom_color),
-            'health':   self.minifont.render(health,  True, self.red),
-            'time':     self.minifont.render(time,    True, bottom_color),
-            'stamina':  self.minifont.render(stamina, True, self.green),
-            'location': self.minifont.render(env,     True, bottom_color)}
+            'wallet':   self.render_text(self.minifont, wallet,  bottom_color),
+            'health':   self.render_text(self.minifont, health,  self.red),
+            'time':     self.render_text(self.minifont, time,    bottom_color),
+            'stamina':  self.render_text(self.minifont, stamina, self.green),
+            'location': self.render_text(self.minifont, env,     bottom_color)}
 
     # Fade tools
     def update_fade(self):
@@ -415,7 +847,8 @@ class Pygame:
             
             A fadein/fadeout is triggered by setting fade_state. Intertitles are held in fade_cache and
             sent to fade_queue until the fadeout is complete. Functions to be delayed are held in fn_queue
-            and run in main after the fadein is complete.
+            and run one per frame once the screen is black, so the intertitles keep flickering in between.
+            The fadein starts after the functions finish and fade_hold seconds have passed.
 
             Example
             -------
@@ -428,6 +861,7 @@ class Pygame:
 
         # Update alpha
         if self.fade_state != 'off':
+            self.mark_dirty('fade')
             self.pause = True
             self.fade_surface.fill((0, 0, 0))
             
@@ -460,28 +894,25 @@ class Pygame:
                     self.fade_alpha = self.max_alpha
 
                     self.fade_state = 'on'
+                    self.fade_start = session.clock.now
 
             #########################################################
             # Run functions while holding a black screen
             elif self.fade_state == 'on':
                 
-                # Check current time
-                start_time = time.time()
-
-                # Process functions in queue
-                while self.fn_queue:
+                # Process the next function in queue
+                if self.fn_queue:
                     function, kwargs = self.fn_queue.pop(0)
                     function(**kwargs)
-                self.fade_state = 'in'
-
-                # Hold text for at least 3 seconds, including run time
-                remaining_time = 4 - (time.time() - start_time)
-                if remaining_time > 0: time.sleep(remaining_time)
+                
+                # Hold text for at least fade_hold seconds, including run time
+                elif session.clock.now - self.fade_start >= self.fade_hold:
+                    self.fade_state = 'in'
 
             #########################################################
             # Update surfaces
             self.fade_surface.set_alpha(self.fade_alpha)
-            self.fade_queue.append([self.fade_surface, (0, 0)])
+            self.fade_queue.append((self.fade_surface, (0, 0)))
 
             #if self.fade_alpha >= self.max_alpha * 0.8:
             for (surface, loc) in self.fade_cache:
@@ -491,7 +922,17 @@ class Pygame:
                 flicker_high = min(self.fade_alpha,     self.max_alpha-100)
 
                 surface.set_alpha(random.randint(flicker_low, flicker_high))
-                self.fade_queue.append([surface, loc])
+                self.fade_queue.append((surface, loc))
+
+    def hold(self, duration):
+        """ Ignores gameplay input for a moment without blocking the window, such as after changing levels.
+
+            Parameters
+            ----------
+            duration : float; seconds from now
+        """
+
+        self.hold_until = max(self.hold_until, session.clock.now + duration)
 
     def add_intertitle(self, text=None, surface=None, loc='centered'):
         
@@ -523,6 +964,55 @@ class EventBus:
     def clear(self):
         self.listeners = {}
 
+class FrameClock:
+
+    def __init__(self, timers=(2, 4, 6), step=None):
+        """ Samples the time once per frame for animations, so that tiles and effects do not call time.time().
+
+            Parameters
+            ----------
+            timers  : tuple of int; animation periods used by tiles (see Tile.img_ID_timer)
+            step    : float or None; fixed seconds per frame for replays and benchmarks; uses the wall time if None
+
+            frame   : int; number of frames since startup
+            start   : float; time at startup
+            now     : float; time at the start of the current frame
+            elapsed : float; seconds since startup
+            alt     : dict; timer -> bool; True if tiles with that timer show their alternate image
+        """
+
+        self.timers  = timers
+        self.step    = step
+        self.frame   = 0
+        self.start   = time.time()
+        self.now     = self.start
+        self.elapsed = 0
+        self.alt     = {}
+        self.update_alt()
+
+    def tick(self):
+        """ Advances to the next frame. Called once at the end of each frame. """
+
+        self.frame += 1
+        if self.step is None: self.now  = time.time()
+        else:                 self.now += self.step
+        self.elapsed = self.now - self.start
+        self.update_alt()
+
+    def update_alt(self):
+        """ Decides once per frame which timers show their alternate image. """
+
+        self.alt = {0: False}
+        for timer in self.timers:
+            self.alt[timer] = (self.now // timer) % timer == 0
+
+    def find_alt(self, timer):
+        """ Returns True if an animation with the given timer shows its alternate image this frame. """
+
+        if timer not in self.alt:
+            self.alt[timer] = (self.now // timer) % timer == 0
+        return self.alt[timer]
+
 # Needs updating
 class Images:
     """ Loads images from png file and sorts them in a global dictionary. One save for each file.
@@ -586,6 +1076,31 @@ class Images:
         self.blank_surface.set_colorkey(self.blank_surface.get_at((0,0)))
         self.render_log = []
 
+        # Cache of shifted tile variants
+        self.shift_cache      = OrderedDict()
+        self.shift_cache_size = 4096
+        self.shift_hits       = 0
+        self.shift_misses     = 0
+        self.shift_stats      = {'hits': 0, 'misses': 0}
+
+        # Cache of top halves for swimming entities
+        self.halved_cache = {}
+
+        # Images pre-scaled to the most recently used zoom levels
+        self.atlases     = OrderedDict() # zoom -> {image: scaled image}, dropped with the image
+        self.atlas_count = 3
+        self.native      = weakref.WeakSet() # images that are already drawn at the current zoom level, such as chunks
+
+        # Banks of shifted frames for water static
+        self.static_bank      = OrderedDict()
+        self.static_bank_size = 1024
+        self.static_frames    = 8
+
+        # Throttle for screen color sampling
+        self.average_key   = None
+        self.average_frame = None
+        self.average_rate  = 15
+
     def import_tiles(self, filename, flipped=False, effects=None):
         """ Converts an image to a pygame image, cuts it into tiles, then returns a matrix of tiles. """
         
@@ -778,8 +1293,20 @@ class Images:
 
     # Utility
     def average(self):
+        """ Samples the screen behind the GUI and sets colors that contrast with it.
+            Samples are reused until the camera or environment changes, or for at most average_rate frames. """
+        
         pyg = session.pyg
 
+        # Skip if nothing has moved recently
+        ent = session.player_obj.ent
+        if ent and ent.env: key = (id(ent.env), ent.env.camera.X, ent.env.camera.Y, ent.env.camera.zoom, pyg.screen.get_size())
+        else:               key = None
+        frame = session.clock.frame
+        if (self.average_frame is not None) and (key == self.average_key) and (frame - self.average_frame < self.average_rate): return
+        self.average_key   = key
+        self.average_frame = frame
+
         # Identify regions of interest
         top_rect     = pygame.Rect(0, 0, pyg.screen_width, 50)
         bottom_rect  = pygame.Rect(0, pyg.screen_height-50, pyg.screen_width, 50)
@@ -829,23 +1356,39 @@ class Images:
         elif type(obj) == dict:
             obj = {key: pygame.transform.flip(value, True, False) for (key, value) in obj.items()}
 
-    def static(self, image, offset, rate):
-        """ Shift the tile by an offset. """
+    def static(self, image, offset, rate, phase=0):
+        """ Returns the image or, once every so many frames, a shifted copy of it.
+            Shifted copies are kept in a bank for each image and reused on later frames.
+
+            Parameters
+            ----------
+            image  : pygame image or list of str; names in img.dict
+            offset : int; maximum pixel shift in each direction
+            rate   : int; number of frames between shifts
+            phase  : int; per-tile offset so that neighbors do not shift together
+        """
         
         if type(image) == list: image = self.dict[image[0]][image[1]]
         
-        if random.randint(1, rate) == 1:
-            X_offset, Y_offset = random.randint(0, offset), random.randint(0, offset)
-            X_offset %= image.get_width()
-            Y_offset %= image.get_height()
-            
-            shifted = pygame.Surface((image.get_width(), image.get_height()))
-            shifted.blit(image, (X_offset, Y_offset)) # draws shifted
-            shifted.blit(image, (X_offset - image.get_width(), Y_offset)) # wraps horizontally
-            shifted.blit(image, (X_offset, Y_offset - image.get_height())) # wraps vertically
-            shifted.blit(image, (X_offset - image.get_width(), Y_offset - image.get_height())) # wraps corners
-            return shifted
-        else: return image
+        # Only shift on one frame out of every rate
+        step = session.clock.frame + phase
+        if step % rate: return image
+
+        # Find or create the frame bank for this image
+        frames = self.static_bank.get(image)
+        if frames is None:
+            frames = [None] * self.static_frames
+            self.static_bank[image] = frames
+            if len(self.static_bank) > self.static_bank_size:
+                self.static_bank.popitem(last=False)
+        else:
+            self.static_bank.move_to_end(image)
+        
+        # Build the selected frame on first use
+        index = (step // rate) % self.static_frames
+        if frames[index] is None:
+            frames[index] = self.shift(image, [random.randint(0, offset), random.randint(0, offset)])
+        return frames[index]
 
     def shift(self, image, offset):
         """Shift the tile by an offset. """
@@ -863,8 +1406,57 @@ class Images:
         shifted.blit(image, (X_offset - image.get_width(), Y_offset - image.get_height())) # wraps corners
         return shifted
 
+    def shifted(self, img_IDs, offset, alt=False):
+        """ Returns a shared, pre-shifted copy of a tile image. Built on first use and evicted
+            when least recently used.
+
+            Parameters
+            ----------
+            img_IDs : list of str; names in img.other
+            offset  : list of int; pixel shift in each direction
+            alt     : bool; use the alternate animation frame
+        """
+
+        key = (img_IDs[0], img_IDs[1], alt, offset[0] % session.pyg.tile_width, offset[1] % session.pyg.tile_height)
+
+        # Reuse a cached variant
+        if key in self.shift_cache:
+            self.shift_cache.move_to_end(key)
+            self.shift_hits += 1
+            return self.shift_cache[key]
+
+        # Build a new variant and drop the oldest if needed
+        if alt: image = self.other_alt[img_IDs[0]][img_IDs[1]]
+        else:   image = self.other[img_IDs[0]][img_IDs[1]]
+        shifted = self.shift(image, offset)
+        
+        self.shift_cache[key] = shifted
+        if len(self.shift_cache) > self.shift_cache_size:
+            self.shift_cache.popitem(last=False)
+        self.shift_misses += 1
+        return shifted
+
+    def update_cache_stats(self):
+        """ Saves the hits and misses of the last frame, then resets the counters. """
+        
+        self.shift_stats  = {'hits': self.shift_hits, 'misses': self.shift_misses}
+        self.shift_hits   = 0
+        self.shift_misses = 0
+
     def halved(self, img_IDs, flipped=False):
+        """ Returns a shared copy of an entity or equipment image with only its top half.
+            Each variant is built on first use and kept for the rest of the session.
+
+            Parameters
+            ----------
+            img_IDs : list of str; names in img.dict
+            flipped : bool; use the mirrored image
+        """
         
+        key = (img_IDs[0], img_IDs[1], flipped)
+        if key in self.halved_cache:
+            return self.halved_cache[key]
+
         if flipped: image = self.flipped.dict[img_IDs[0]][img_IDs[1]]
         else:       image = self.dict[img_IDs[0]][img_IDs[1]]
         
@@ -877,8 +1469,57 @@ class Images:
         # Blit the bottom half of the original image onto the new surface, shifted downward
         #half.blit(image, (0, 16), (0, image.get_height() // 2, image.get_width(), image.get_height() // 2))
         half.blit(image, (0, 0),  (0,                       0, image.get_width(), image.get_height() // 2))
+        
+        self.halved_cache[key] = half
         return half
 
+    def atlas(self, zoom):
+        """ Returns the images pre-scaled to a zoom level. Only the atlas_count most recently used levels are kept,
+            which covers the current zoom level and the ones next to it. """
+
+        if zoom in self.atlases:
+            self.atlases.move_to_end(zoom)
+        
+        else:
+            self.atlases[zoom] = weakref.WeakKeyDictionary()
+            if len(self.atlases) > self.atlas_count:
+                self.atlases.popitem(last=False)
+        
+        return self.atlases[zoom]
+
+    def zoomed(self, image, zoom):
+        """ Returns a copy of an image scaled to a zoom level, building it on first use.
+            Sizes are rounded up, so that neighbouring tiles overlap instead of leaving gaps.
+
+            Parameters
+            ----------
+            image : pygame Surface; image in world pixels, or one in self.native
+            zoom  : float; zoom level of the camera
+        """
+
+        if (zoom == 1) or (image in self.native): return image
+
+        atlas  = self.atlas(zoom)
+        scaled = atlas.get(image)
+        if scaled is None:
+            (width, height) = image.get_size()
+            scaled = pygame.transform.scale(image, (self.zoom_size(width, zoom), self.zoom_size(height, zoom)))
+            if image.get_colorkey() is not None: scaled.set_colorkey(image.get_colorkey())
+            if image.get_alpha() is not None: scaled.set_alpha(image.get_alpha())
+            atlas[image] = scaled
+        
+        return scaled
+
+    def zoom_position(self, X, zoom):
+        """ Returns a position in world pixels as a position in screen pixels at a zoom level. """
+
+        return math.floor(round(X * zoom, 3))
+
+    def zoom_size(self, width, zoom):
+        """ Returns a length in world pixels as a length in screen pixels at a zoom level, rounded up. """
+
+        return math.ceil(round(width * zoom, 3))
+
     def scale(self, image):
         return pygame.transform.scale2x(image)
 
@@ -917,7 +1558,7 @@ class Images:
         image_pos = (x, y)
         duration  = 0.2
         delay     = 0
-        last_time = time.time()
+        last_time = session.clock.now
         self.render_log.append([image, image_pos, duration, last_time, delay])
 
     def vicinity_flash(self, ent, image):
@@ -934,7 +1575,7 @@ class Images:
             y         = vicinity_list[i%len(vicinity_list)].Y - session.player_obj.ent.env.camera.Y
             image_pos = (x, y)
             duration  = 0.5
-            last_time = time.time()
+            last_time = session.clock.now
             delay     = i*0.1
             
             self.render_log.append([image, image_pos, duration, last_time, delay])
@@ -944,7 +1585,7 @@ class Images:
         y         = vicinity_list[0].Y - session.player_obj.ent.env.camera.Y
         image_pos = (x, y)
         duration  = 0.5
-        last_time = time.time()
+        last_time = session.clock.now
         delay     = len(vicinity_list)*0.1
         
         self.render_log.append([image, image_pos, duration, last_time, delay])
@@ -964,7 +1605,7 @@ class Images:
         image_pos = (x, y)
         duration  = 0.8
         delay     = 0
-        last_time = time.time()
+        last_time = session.clock.now
         self.render_log.append([image, image_pos, duration, last_time, delay])
 
         x         = lambda: ent.X - session.player_obj.ent.env.camera.X
@@ -972,7 +1613,7 @@ class Images:
         image_pos = (x, y)
         duration  = 0.2
         delay     = 1.0
-        last_time = time.time()
+        last_time = session.clock.now
         self.render_log.append([image, image_pos, duration, last_time, delay])
 
     def flash_on(self, ent, image):
@@ -986,7 +1627,7 @@ class Images:
         image_pos = (x, y)
         duration  = 0.8
         delay     = 0
-        last_time = time.time()
+        last_time = session.clock.now
         self.render_log.append([image, image_pos, duration, last_time, delay])
 
         x         = lambda: ent.X - session.player_obj.ent.env.camera.X
@@ -994,7 +1635,7 @@ class Images:
         image_pos = (x, y)
         duration  = 0.2
         delay     = 1.0
-        last_time = time.time()
+        last_time = session.clock.now
         self.render_log.append([image, image_pos, duration, last_time, delay])
 
     def render(self):
@@ -1030,14 +1671,14 @@ class Images:
 
                     # Count down before showing image
                     if delay > 0:
-                        self.render_log[j][4] -= (time.time() - last_time)
-                        self.render_log[j][3] = time.time()
+                        self.render_log[j][4] -= (session.clock.now - last_time)
+                        self.render_log[j][3] = session.clock.now
                     
                     # Count down before hiding image
                     elif duration > 0:
-                        self.render_log[j][2] -= (time.time() - last_time)
-                        self.render_log[j][3] = time.time()
-                        session.pyg.display_queue.append([image, position])
+                        self.render_log[j][2] -= (session.clock.now - last_time)
+                        self.render_log[j][3] = session.clock.now
+                        session.pyg.display_queue.append((image, position))
                         
                     else:
                         self.render_log.pop(j)
@@ -1210,12 +1851,13 @@ def screenshot(folder, filename, blur=False):
     # Render display
     render_display()
     session.img.render()
-    for (surface, pos) in pyg.display_queue:
-        pyg.display.blit(surface, pos)
-    display = pygame.transform.scale(
-        pyg.display, (pyg.screen_width, pyg.screen_height))
+    pyg.zoom_queue(pyg.display_queue)
+    pyg.display.blits(pyg.display_queue, doreturn=False)
+    display = pyg.display.copy()
     pyg.screen.blit(display, (0, 0))
     pygame.display.flip()
+    pyg.mark_dirty('display')
+    pyg.full_redraw = True
     
     # Save image
     path = folder + '/' + filename
@@ -1257,54 +1899,61 @@ def render_display():
 
     ## Shorthand
     camera = ent.env.camera
+    pyg.set_zoom(camera.zoom)
 
     #########################################################
-    # Draw visible tiles
-    for y in range(int(camera.Y/32), int(camera.bottom/pyg.tile_height + 1)):
-        for x in range(int(camera.X/32), int(camera.right/pyg.tile_width + 1)):
-            try:    tile = ent.env.map[x][y]
-            except: continue
-            if not tile.hidden:
-                
-                # First tier (floor or walls)
-                image, (X, Y) = tile.draw()
-                pyg.display_queue.append([image, (X, Y)])
+    # Draw visible chunks
+    floors, roofs, dynamic = ent.env.chunks.draw(camera)
 
-                # Second tier (decor or item)
-                if tile.item:
-                    surface, pos = tile.item.draw()
+    # First tier (floor or walls)
+    pyg.display_queue += floors
+    for tile in dynamic:
+        image, (X, Y) = tile.draw()
+        pyg.display_queue.append((image, (X, Y)))
 
-                    # Handle single-tile images
-                    if type(surface) != list:
-                        pyg.display_queue.append([surface, pos])
+    #########################################################
+    # Draw visible objects
+    ents    = []
+    x_range = range(int(camera.X/32), int(camera.right/pyg.tile_width + 1))
+    y_range = range(int(camera.Y/32), int(camera.bottom/pyg.tile_height + 1))
+    for tile in ent.env.map.occupied(x_range, y_range):
 
-                    # Handle multi-tile images
-                    else:
-                        for i in range(len(surface)):
-                            pyg.display_queue.append([surface[i], pos])
-                
-                # Third tier (entity)
-                if tile.ent:
-                    tile.ent.draw()
-                    
-                    # Effects
-                    if tile.ent.active_effects:
-                        for effect in tile.ent.active_effects.values():
-                            if effect.trigger == 'on_render':
-                                effect.activate()
-                
-                # Fourth tier (effects)
-                if tile.active_effects:
-                    for effect in tile.active_effects.values():
-                        if effect.trigger == 'on_render':
-                            effect.activate()
-                
-                # Fifth tier (roof)
-                if tile.room:
-                    if tile.room.roof_img_IDs == tile.img_IDs:
-                        image, (X, Y) = tile.draw()
-                        pyg.display_queue.append([image, (X, Y)])
+        # Second tier (decor or item)
+        if tile.item:
+            surface, pos = tile.item.draw()
+
+            # Handle single-tile images
+            if type(surface) != list:
+                pyg.display_queue.append((surface, pos))
 
+            # Handle multi-tile images
+            else:
+                for i in range(len(surface)):
+                    pyg.display_queue.append((surface[i], pos))
+        
+        # Third tier (entity)
+        if tile.ent:
+            tile.ent.draw()
+            ents.append(tile.ent)
+            
+            # Effects
+            if tile.ent.active_effects:
+                for effect in tile.ent.active_effects.values():
+                    if effect.trigger == 'on_render':
+                        effect.activate()
+        
+        # Fourth tier (effects)
+        if tile.active_effects:
+            for effect in tile.active_effects.values():
+                if effect.trigger == 'on_render':
+                    effect.activate()
+
+    # Fifth tier (roof)
+    pyg.display_queue += roofs
+
+    # Sixth tier (bubbles)
+    for visible_ent in ents:
+        visible_ent.draw_bubble()
     
     ent.env.weather.render()
 
@@ -1324,7 +1973,7 @@ def render_hud():
             
             # Find how many messages to write
             for message in pyg.msg:
-                pyg.hud_queue.append([message, (5, Y)])
+                pyg.hud_queue.append((message, (5, Y)))
                 Y += 16
         
         #########################################################
@@ -1345,6 +1994,6 @@ def render_hud():
                 elif i == 4: x = pyg.screen_width - gui[i].get_width() - 16
                 
                 y = pyg.screen_height - 27
-                pyg.hud_queue.append([gui[i], (x, y)])
+                pyg.hud_queue.append((gui[i], (x, y)))
 
 ########################################################################################################################################################
\ No newline at end of file
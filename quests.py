@@ -146,12 +146,12 @@ class QuestMenu:
         #########################################################
         # Render surfaces
         ## Backdrop
-        pyg.overlay_queue.append([self.background_surface, (0, 0)])
-        pyg.overlay_queue.append([self.backdrop_surface,   self.backdrop_pos])
-        pyg.overlay_queue.append([self.border_surface,     self.backdrop_pos])
+        pyg.overlay_queue.append((self.background_surface, (0, 0)))
+        pyg.overlay_queue.append((self.backdrop_surface,   self.backdrop_pos))
+        pyg.overlay_queue.append((self.border_surface,     self.backdrop_pos))
 
         ## Header
-        pyg.overlay_queue.append([self.header_surface, self.header_pos])
+        pyg.overlay_queue.append((self.header_surface, self.header_pos))
 
         ## Choices, categories, and cursor
         categories, category_toggle = [], True
@@ -177,11 +177,11 @@ class QuestMenu:
             category_pos = (self.category_pos[0], self.category_pos[1] + offset)
             cursor_pos   = (self.cursor_pos[0],   self.cursor_pos[1]   + offset)
 
-            pyg.overlay_queue.append([self.choices_render[i], choice_pos])
+            pyg.overlay_queue.append((self.choices_render[i], choice_pos))
             if category_toggle:
-                pyg.overlay_queue.append([self.categories_render[i], category_pos])
+                pyg.overlay_queue.append((self.categories_render[i], category_pos))
             if (self.choice == i) and (self.mode == 'log'):
-                pyg.overlay_queue.append([self.cursor_surface, cursor_pos])
+                pyg.overlay_queue.append((self.cursor_surface, cursor_pos))
 
     # Keys
     def key_UP(self):
@@ -7,6 +7,7 @@ class Session:
         self.pyg              = None # Pygame
         self.aud              = None # Audio
         self.img              = None # Images
+        self.clock            = None # FrameClock
 
         self.player_obj       = None # PlayerData
 
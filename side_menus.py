@@ -172,7 +172,7 @@ class ColumnMenu:
         # Renders
         ## Background fade
         if not self.locked:
-            pyg.overlay_queue.append([self.background_fade, (0, 0)])
+            pyg.overlay_queue.append((self.background_fade, (0, 0)))
         
         ## Color
         session.img.average()
@@ -188,8 +188,8 @@ class ColumnMenu:
             
             ## Cursor fill
             if self.active == data:
-                if self.locked: pyg.overlay_queue.append([self.locked_cursor_fill, data.cursor_pos])
-                else:           pyg.overlay_queue.append([self.cursor_fill, data.cursor_pos])
+                if self.locked: pyg.overlay_queue.append((self.locked_cursor_fill, data.cursor_pos))
+                else:           pyg.overlay_queue.append((self.cursor_fill, data.cursor_pos))
 
             ## Items
             for i in range(data.offset, min(len(data.items), data.offset + 12)):
@@ -204,20 +204,20 @@ class ColumnMenu:
                     
                     # Create text surfaces
                     for text in self.details(item):
-                        surface = pyg.minifont.render(text, True, color)
-                        pyg.overlay_queue.append([
+                        surface = pyg.render_text(pyg.minifont, text, color)
+                        pyg.overlay_queue.append((
                             surface,
-                            (data.detail_pos(surface)[0], Y_detail)])
+                            (data.detail_pos(surface)[0], Y_detail)))
                         Y_detail += 12
                 
                 # Send to queue
                 img = session.img.dict[item.img_IDs[0]][item.img_IDs[1]]
-                pyg.overlay_queue.append([img, (data.cursor_pos[0], Y)])
+                pyg.overlay_queue.append((img, (data.cursor_pos[0], Y)))
                 
             ## Cursor border
             if self.active == data:
-                if self.locked: pyg.overlay_queue.append([self.locked_cursor, data.cursor_pos])
-                else:           pyg.overlay_queue.append([self.cursor,        data.cursor_pos])
+                if self.locked: pyg.overlay_queue.append((self.locked_cursor, data.cursor_pos))
+                else:           pyg.overlay_queue.append((self.cursor,        data.cursor_pos))
 
     # Keys
     def key_UP(self):
@@ -540,13 +540,13 @@ class AbilitiesMenu:
                 sequence   = ability.sequence
                 text_lines = [ability.name, sequence]
                 for text in text_lines:
-                    surface = pyg.minifont.render(text, True, color)
-                    pyg.overlay_queue.append([surface, (40, Y_cache)])
+                    surface = pyg.render_text(pyg.minifont, text, color)
+                    pyg.overlay_queue.append((surface, (40, Y_cache)))
                     Y_cache += 12
             
             # Render image
             img = session.img.dict[ability.img_IDs[0]][ability.img_IDs[1]]
-            pyg.overlay_queue.append([img, (0, Y)])
+            pyg.overlay_queue.append((img, (0, Y)))
             Y += pyg.tile_height
 
     # Keys
@@ -0,0 +1,181 @@
+########################################################################################################################################################
+# Environment tests
+#
+# Starts the game without a window or sound and checks the parts of environments.py that the rest of the game relies on.
+#
+# Run from the repository root: python -m pytest tests
+########################################################################################################################################################
+
+########################################################################################################################################################
+# Imports
+## Standard
+import os
+import sys
+import pickle
+import random
+
+## Specific
+import pytest
+
+## Local
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import main
+import session
+from entities import create_entity
+from items import create_item
+from environments import Environment, Camera, place_object
+
+########################################################################################################################################################
+# Setup
+@pytest.fixture(scope='module')
+def player_obj():
+    """ Initializes the game without entering the main loop and returns a new player. """
+
+    main.game_states = lambda: None
+    main.init()
+    session.new_game_obj.temp_obj = session.new_game_obj.init_player()
+    session.new_game_obj._finalize_player()
+    return session.player_obj
+
+def create_env(player_obj, biome):
+    """ Returns an open environment with the given biome on every tile. """
+
+    env = Environment(
+        envs          = player_obj.envs,
+        name          = 'test',
+        size          = 1,
+        soundtrack    = [],
+        lvl_num       = 0,
+        wall_img_IDs  = ['walls', 'gray'],
+        floor_img_IDs = ['floors', 'dirt1'],
+        roof_img_IDs  = None,
+        blocked       = False,
+        hidden        = False,
+        img_IDs       = ['floors', 'dirt1'])
+    env.camera = Camera(player_obj.ent)
+
+    grid = env.map
+    grid.paint('biome', [0] * (grid.width * grid.height), [biome])
+    return env
+
+########################################################################################################################################################
+# Tests
+def test_occupied_follows_moved_entity(player_obj):
+    ent  = create_entity('red_radish')
+    env  = create_env(player_obj, session.img.biomes[ent.habitat][0])
+    grid = env.map
+    place_object(ent, [5, 5], env)
+    old  = ent.tile.index
+
+    # Read effects as render_display does, then turn and step to the right
+    for tile in grid.occupied(range(grid.width), range(grid.height)): tile.active_effects
+    session.movement.move(ent, 32, 0)
+    session.movement.move(ent, 32, 0)
+    for tile in grid.occupied(range(grid.width), range(grid.height)): tile.active_effects
+
+    assert ent.tile.index != old
+    assert [tile.index for tile in grid.occupied(range(grid.width), range(grid.height))] == [ent.tile.index]
+    assert not grid.objects['active_effects']
+
+def test_tile_keeps_effect_of_placed_item(player_obj):
+    env  = create_env(player_obj, 'land')
+    lamp = create_item('lamp')
+    place_object(lamp, [3, 3], env)
+
+    assert list(lamp.tile.active_effects) == ['lamp']
+    assert list(env.map.objects['active_effects']) == [lamp.tile.index]
+
+def test_level_keeps_objects_when_restored(player_obj):
+    area = player_obj.envs.add_area('test store')
+    env  = create_env(player_obj, 'land')
+    env.area = area
+    area.levels['test'] = env
+    
+    ent  = create_entity('red_radish')
+    lamp = create_item('lamp')
+    place_object(ent,  [5, 5], env)
+    place_object(lamp, [3, 3], env)
+    
+    area.store_level(env)
+    assert env.saved
+    assert 'ents' not in env.__dict__
+    
+    assert area['test'] is env
+    assert not env.saved
+    assert ent in env.ents
+    assert ent.env is env
+    assert env.map[5][5].ent is ent
+    assert ent.tile.ent is ent
+    assert env.map[3][3].item is lamp
+    assert lamp.tile.item is lamp
+
+@pytest.mark.parametrize('name', ['dungeon level 1', 'hallucination 1'])
+def test_level_keeps_changes_when_saved_by_seed(player_obj, monkeypatch, name):
+    random.seed(0)
+    area = player_obj.envs.add_area(f'test {name}')
+    area.add_level(name, 1)
+    env   = area[name]
+    grid  = env.map
+    tiles = [tile for column in grid for tile in column]
+    
+    # Dig a wall
+    wall = next(tile for tile in tiles if tile.blocked and not tile.unbreakable and not tile.item)
+    wall.blocked = False
+    wall.img_IDs = env.floor_img_IDs
+    
+    # Take an item, kill an entity, and drop a shovel
+    taken = next(tile for tile in tiles if tile.item and tile.item.movable)
+    taken.item = None
+    
+    ent = next(ent for ent in env.ents if ent is not player_obj.ent)
+    session.interact.death(ent)
+    
+    floor = next(tile for tile in tiles if not tile.blocked and not tile.item and not tile.ent)
+    place_object(create_item('shovel'), [floor.index // grid.height, floor.index % grid.height], env)
+    
+    # Save and load the game, then rebuild the level from its seed
+    loaded = pickle.loads(pickle.dumps(player_obj))
+    monkeypatch.setattr(session, 'player_obj', loaded)
+    level = loaded.envs.areas[area.name].levels[name]
+    assert 'tiles' in level.saved
+    
+    level = loaded.envs.areas[area.name][name]
+    tile  = lambda index: level.map.view(index)
+    assert not tile(wall.index).blocked
+    assert tile(wall.index).img_IDs == env.floor_img_IDs
+    assert not tile(taken.index).item
+    assert tile(floor.index).item.name == 'shovel'
+    assert {(ent.X, ent.Y, ent.name) for ent in level.ents} == {(ent.X, ent.Y, ent.name) for ent in env.ents if not ent.dead}
+    assert sorted((index, item.name) for (index, item) in level.map.objects['item'].items()) == sorted((index, item.name) for (index, item) in grid.objects['item'].items())
+
+def test_dungeon_keeps_monsters_when_stored(player_obj):
+    random.seed(0)
+    envs  = player_obj.envs
+    area  = envs.add_area('test dungeon')
+    area.add_level('dungeon level 1', 1)
+    area.add_level('dungeon level 2', 2)
+    env   = area['dungeon level 1']
+    ent   = next(ent for ent in env.ents if ent is not player_obj.ent)
+    ent.hp = 1
+    
+    # Entering another level with no room left stores the first one
+    budget = envs.level_budget
+    envs.level_budget = len(env.map.flags)
+    try:
+        area['dungeon level 2']
+        assert env.saved
+        assert area['dungeon level 1'] is env
+    finally:
+        envs.level_budget = budget
+    
+    assert ent in env.ents
+    assert ent.hp == 1
+    assert ent.tile.ent is ent
+    assert env.journal['ents'][ent.tile.index] is ent
+
+########################################################################################################################################################